@@ -10,6 +10,10 @@
  *   npm run adapt -- --skills            # Generate skills-registry.json only
  *   npm run adapt -- --rules             # Generate rules entry files only
  *   npm run adapt -- --verbose           # Show detailed output
+ *   npm run adapt -- --no-cache          # Ignore the persistent parse cache
+ *   npm run adapt -- --jobs 8            # Compile with up to 8 concurrent jobs
+ *   npm run adapt -- --hardlink          # Hardlink byte-identical mirrored files
+ *   npm run adapt -- --watch             # Recompile affected outputs on source changes
  *   npm run adapt -- --help              # Show help
  *
  * Exit Codes:
@@ -22,6 +26,26 @@ const { compile, PLATFORMS } = require('../lib/compiler/index.js');
 const { generateSkillsRegistryV2, writeSkillsRegistry } = require('../lib/compiler/skills-registry.js');
 const { emitAllRules } = require('../lib/compiler/rules-emitters/index.js');
 
+// ============================================================
+// argumentError - 参数错误（exitCode = 3），由 runAdapt 统一输出
+// ============================================================
+function argumentError(message) {
+  const error = new Error(message);
+  error.exitCode = 3;
+  return error;
+}
+
+// ============================================================
+// parseJobs - 解析 --jobs 数值
+// ============================================================
+function parseJobs(value) {
+  const jobs = Number(value);
+  if (!Number.isInteger(jobs) || jobs < 1) {
+    throw argumentError(`Invalid --jobs value: ${value}. Use a positive integer.`);
+  }
+  return jobs;
+}
+
 // ============================================================
 // parseArgs - 解析命令行参数
 // ============================================================
@@ -33,7 +57,11 @@ function parseArgs(argv) {
     verbose: false,
     help: false,
     skills: false,
-    rules: false
+    rules: false,
+    cache: true,
+    jobs: 1,
+    linkMode: 'copy',
+    watch: false
   };
 
   for (let i = 0; i < argv.length; i++) {
@@ -62,10 +90,27 @@ function parseArgs(argv) {
       case '--rules':
         args.rules = true;
         break;
+      case '--no-cache':
+        args.cache = false;
+        break;
+      case '--hardlink':
+        args.linkMode = 'hardlink';
+        break;
+      case '--watch':
+      case '-w':
+        args.watch = true;
+        break;
+      case '--jobs':
+      case '-j':
+        args.jobs = parseJobs(argv[++i]);
+        break;
       default:
+        if (arg.startsWith('--jobs=')) {
+          args.jobs = parseJobs(arg.slice('--jobs='.length));
+          break;
+        }
         if (arg.startsWith('-')) {
-          console.error(`Unknown option: ${arg}`);
-          process.exit(3);
+          throw argumentError(`Unknown option: ${arg}`);
         }
     }
   }
@@ -89,6 +134,10 @@ Options:
   --skills            Generate skills-registry.json only
   --rules             Generate rules entry files only
   --verbose           Show detailed compilation output
+  --no-cache          Re-parse and re-hash every file instead of using persistent caches
+  --jobs, -j <n>      Run up to <n> compile jobs concurrently (default: 1)
+  --hardlink          Hardlink byte-identical mirrored files instead of copying
+  --watch, -w         Keep running and recompile only outputs affected by changes
   --help, -h          Show this help message
 
 Examples:
@@ -98,6 +147,8 @@ Examples:
   npm run adapt -- --rules             # Generate rules entry files
   npm run adapt -- --check             # Check for drift
   npm run adapt -- --verbose           # Show detailed output
+  npm run adapt -- --jobs 8            # Parallel four-platform rebuild
+  npm run adapt -- --watch             # Incremental rebuilds while editing
 
 Exit Codes:
   0 - Success
@@ -108,15 +159,24 @@ Exit Codes:
 }
 
 // ============================================================
-// main - 主函数
+// runAdapt - 执行 adapt 命令，返回退出码（供 cc-devflow CLI 进程内调用）
 // ============================================================
-async function main() {
-  const args = parseArgs(process.argv.slice(2));
+async function runAdapt(argv) {
+  let args;
+  try {
+    args = parseArgs(argv);
+  } catch (error) {
+    if (error.exitCode) {
+      console.error(error.message);
+      return error.exitCode;
+    }
+    throw error;
+  }
 
   // 显示帮助
   if (args.help) {
     showHelp();
-    process.exit(0);
+    return 0;
   }
 
   // 确定目标平台
@@ -125,13 +185,43 @@ async function main() {
     if (!PLATFORMS.includes(args.platform)) {
       console.error(`Unknown platform: ${args.platform}`);
       console.error(`Available platforms: ${PLATFORMS.join(', ')}`);
-      process.exit(3);
+      return 3;
     }
     platforms = [args.platform];
   } else {
     platforms = PLATFORMS;
   }
 
+  // 处理 --watch 常驻模式
+  if (args.watch) {
+    if (args.check || args.skills || args.rules) {
+      console.error('--watch cannot be combined with --check, --skills or --rules');
+      return 3;
+    }
+
+    try {
+      const { watchCompile } = require('../lib/compiler/watch.js');
+      const session = await watchCompile({
+        platforms,
+        verbose: args.verbose,
+        jobs: args.jobs,
+        linkMode: args.linkMode,
+        cache: args.cache
+      });
+
+      for (const error of session.initial.errors) {
+        console.error(`  - ${error}`);
+      }
+
+      await new Promise((resolve) => process.once('SIGINT', resolve));
+      await session.close();
+      return 0;
+    } catch (error) {
+      console.error(`Error: ${error.message}`);
+      return 1;
+    }
+  }
+
   // 处理 --skills 单独模式
   if (args.skills && !args.rules) {
     try {
@@ -141,10 +231,10 @@ async function main() {
 
       console.log(`Skills registry generated: ${outputPath}`);
       console.log(`  Skills found: ${registry.skills.length}`);
-      process.exit(0);
+      return 0;
     } catch (error) {
       console.error(`Error generating skills registry: ${error.message}`);
-      process.exit(1);
+      return 1;
     }
   }
 
@@ -169,10 +259,10 @@ async function main() {
       }
 
       console.log(`Rules entry files generated: ${rulesGenerated}`);
-      process.exit(0);
+      return 0;
     } catch (error) {
       console.error(`Error generating rules: ${error.message}`);
-      process.exit(1);
+      return 1;
     }
   }
 
@@ -183,7 +273,10 @@ async function main() {
       verbose: args.verbose,
       check: args.check,
       rules: true,
-      skills: true
+      skills: true,
+      cache: args.cache,
+      jobs: args.jobs,
+      linkMode: args.linkMode
     };
 
     // 如果只指定 --skills 或 --rules，调整选项
@@ -201,10 +294,10 @@ async function main() {
         for (const item of result.drift) {
           console.log(`  - ${item.source}: ${item.issue}`);
         }
-        process.exit(2);
+        return 2;
       }
       console.log('No drift detected.');
-      process.exit(0);
+      return 0;
     }
 
     // 输出编译结果
@@ -213,28 +306,37 @@ async function main() {
       console.log(`  Platforms: ${result.platforms.join(', ')}`);
       console.log(`  Files compiled: ${result.filesCompiled}`);
       console.log(`  Files skipped: ${result.filesSkipped}`);
+      console.log(`  Files removed: ${result.filesRemoved}`);
       console.log(`  Resources copied: ${result.resourcesCopied}`);
       console.log(`  Resources skipped: ${result.resourcesSkipped}`);
       console.log(`  Skills registered: ${result.skillsRegistered}`);
       console.log(`  Rules generated: ${result.rulesGenerated}`);
-      process.exit(0);
+      return 0;
     } else {
       console.error('Compilation failed:');
       for (const error of result.errors) {
         console.error(`  - ${error}`);
       }
-      process.exit(1);
+      return 1;
     }
   } catch (error) {
     console.error(`Error: ${error.message}`);
-    process.exit(1);
+    return 1;
   }
 }
 
-// 导出 parseArgs 供测试使用
-module.exports = { parseArgs };
+// 导出 parseArgs 供测试使用，runAdapt 供 CLI 进程内调用
+module.exports = { parseArgs, runAdapt };
 
-// 如果是直接运行则执行 main
+// 如果是直接运行则执行 runAdapt
 if (require.main === module) {
-  main();
+  runAdapt(process.argv.slice(2))
+    .then((code) => {
+      // watch 模式下 runAdapt 在 SIGINT 后才返回
+      process.exit(code);
+    })
+    .catch((error) => {
+      console.error(`Error: ${error.message}`);
+      process.exit(1);
+    });
 }
@@ -1,19 +1,13 @@
 #!/usr/bin/env node
 const fs = require('fs');
 const path = require('path');
-const { spawnSync } = require('child_process');
 
 const PACKAGE_ROOT = path.resolve(__dirname, '..');
+enableCompileCache();
+
 const TEMPLATE_DIR = path.join(PACKAGE_ROOT, '.claude');
 const TEMPLATE_SKILLS_DIR = path.join(TEMPLATE_DIR, 'skills');
 const DISTRIBUTION_CONFIG = require(path.join(PACKAGE_ROOT, 'config', 'distributable-skills.json'));
-const {
-  doctorUserConfig,
-  getConfigValue,
-  resolveUserConfig,
-  setConfigValue,
-  writeConfigTemplate
-} = require(path.join(PACKAGE_ROOT, 'lib/skill-runtime/config.js'));
 const ADAPT_BIN = path.join(PACKAGE_ROOT, 'bin', 'adapt.js');
 const ADAPTER_BIN = path.join(PACKAGE_ROOT, 'bin', 'cc-devflow.js');
 const TEMPLATE_IGNORES = new Set(['.DS_Store', 'tsc-cache']);
@@ -22,6 +16,34 @@ const DISTRIBUTED_SKILLS = Array.from(
 );
 const DISTRIBUTED_SKILL_SET = new Set(DISTRIBUTED_SKILLS);
 
+// ============================================================
+// enableCompileCache - 可选 V8 编译缓存（Node >= 22.1）
+// CC_DEVFLOW_COMPILE_CACHE=1 使用默认缓存目录，或直接指定缓存目录
+// ============================================================
+function enableCompileCache() {
+  const setting = process.env.CC_DEVFLOW_COMPILE_CACHE;
+  const { enableCompileCache: enable } = require('module');
+  if (!setting || setting === '0' || typeof enable !== 'function') {
+    return;
+  }
+
+  try {
+    enable(setting === '1' ? undefined : path.resolve(setting));
+  } catch {
+    // 缓存只是加速手段，不可用时按普通方式加载
+  }
+}
+
+// 子命令按需加载依赖，避免每次启动都加载 js-yaml / 编译器
+function loadModule(relativePath) {
+  return require(path.join(PACKAGE_ROOT, relativePath));
+}
+
+function createIoLimiter() {
+  const { DEFAULT_IO_CONCURRENCY, createLimiter } = loadModule('lib/concurrency.js');
+  return createLimiter(DEFAULT_IO_CONCURRENCY);
+}
+
 function shouldIncludeTemplatePath(src) {
   const relativePath = path.relative(TEMPLATE_DIR, src);
 
@@ -54,7 +76,7 @@ Commands:
   config set          Set one project/user/local config value
   config resolve      Print resolved YAML config with key-level trace
   config doctor       Validate config and local ignore safety
-  next-change-key     Compute the next REQ/FIX change key
+  next-change-key     Allocate (reserve) the next REQ/FIX change key
   archive-change      Archive a completed change to devflow/changes/archive/YYYY-MM/
   restore-change      Restore an archived change back to devflow/changes/
   list-archived       List all archived changes
@@ -71,6 +93,10 @@ Adapt options:
   --skills             Generate skills registry only
   --rules              Generate rules entry files only
   --verbose            Show detailed output
+  --no-cache           Re-parse and re-hash every file instead of using persistent caches
+  --jobs <n>           Run up to <n> compile jobs concurrently
+  --hardlink           Hardlink byte-identical mirrored files instead of copying
+  --watch              Keep running and recompile only outputs affected by changes
 
 Config options:
   --cwd <path>         Project path used for project/local config lookup
@@ -87,6 +113,8 @@ Next-change-key options:
   --prefix <REQ|FIX>   Change type prefix (required)
   --description <text> Short description, will be slugified (required)
   --cwd <path>         Project path (default: cwd)
+  --reserve            Hold the returned number for 15 minutes (default)
+  --no-reserve         Preview the next key without holding the number
 
 Examples:
   cc-devflow init
@@ -150,53 +178,51 @@ function parseCliArgs(args) {
   return { options, rest };
 }
 
-function copyManagedDirectory(src, dest, options = {}) {
+// 目录并行遍历，文件同步受共享闸门限流；返回按遍历顺序排列的日志事件
+async function copyManagedDirectory(src, dest, options = {}) {
   const { force = false } = options;
+  const limit = options.limit || createIoLimiter();
 
   if (!shouldIncludeTemplatePath(src)) {
-    return;
+    return [];
   }
 
-  const stats = fs.statSync(src);
+  const stats = await fs.promises.stat(src);
   if (stats.isDirectory()) {
-    fs.mkdirSync(dest, { recursive: true });
-    if (force) {
-      pruneManagedDirectory(src, dest);
-    }
-    const entries = fs.readdirSync(src);
-    for (const entry of entries) {
-      copyManagedDirectory(path.join(src, entry), path.join(dest, entry), options);
-    }
-    return;
-  }
-
-  if (!fs.existsSync(dest)) {
-    fs.mkdirSync(path.dirname(dest), { recursive: true });
-    fs.copyFileSync(src, dest);
-    console.log(`[NEW] ${path.relative(process.cwd(), dest)}`);
-    return;
-  }
-
+    await fs.promises.mkdir(dest, { recursive: true });
+    const events = force ? pruneManagedDirectory(src, dest) : [];
+    const entries = await fs.promises.readdir(src);
+    const nested = await Promise.all(
+      entries.map((entry) =>
+        copyManagedDirectory(path.join(src, entry), path.join(dest, entry), { ...options, limit })
+      )
+    );
+    return events.concat(...nested);
+  }
+
+  const relativeDest = path.relative(process.cwd(), dest);
+  const { mirrorFile } = loadModule('lib/compiler/file-mirror.js');
   try {
-    const srcContent = fs.readFileSync(src);
-    const destContent = fs.readFileSync(dest);
-
-    if (!force && srcContent.equals(destContent)) {
-      return;
+    // 大小不同直接复制；大小相同才流式比较哈希；复制优先使用 copy-on-write 克隆
+    const { status } = await limit(() => mirrorFile(src, dest, { force }));
+    if (status === 'created') {
+      return [{ level: 'log', message: `[NEW] ${relativeDest}` }];
     }
-
-    fs.copyFileSync(src, dest);
-    console.log(`[UPDATE] ${path.relative(process.cwd(), dest)}`);
+    if (status === 'updated') {
+      return [{ level: 'log', message: `[UPDATE] ${relativeDest}` }];
+    }
+    return [];
   } catch (err) {
-    console.warn(`[WARN] Could not compare ${path.relative(process.cwd(), dest)}: ${err.message}`);
+    return [{ level: 'warn', message: `[WARN] Could not compare ${relativeDest}: ${err.message}` }];
   }
 }
 
 function pruneManagedDirectory(src, dest) {
   if (!fs.existsSync(dest) || !fs.statSync(dest).isDirectory()) {
-    return;
+    return [];
   }
 
+  const events = [];
   const sourceEntries = new Set(fs.readdirSync(src));
   for (const entry of fs.readdirSync(dest)) {
     if (sourceEntries.has(entry)) {
@@ -205,11 +231,12 @@ function pruneManagedDirectory(src, dest) {
 
     const targetPath = path.join(dest, entry);
     fs.rmSync(targetPath, { recursive: true, force: true });
-    console.log(`[DELETE] ${path.relative(process.cwd(), targetPath)}`);
+    events.push({ level: 'log', message: `[DELETE] ${path.relative(process.cwd(), targetPath)}` });
   }
+  return events;
 }
 
-function syncDistributedSkills(targetRoot, options = {}) {
+async function syncDistributedSkills(targetRoot, options = {}) {
   const { force = false } = options;
   const targetClaudeDir = path.join(targetRoot, '.claude');
   const targetSkillsDir = path.join(targetClaudeDir, 'skills');
@@ -218,17 +245,29 @@ function syncDistributedSkills(targetRoot, options = {}) {
 
   for (const skillName of DISTRIBUTED_SKILLS) {
     const sourceSkillDir = path.join(TEMPLATE_SKILLS_DIR, skillName);
-    const targetSkillDir = path.join(targetSkillsDir, skillName);
-
     if (!fs.existsSync(sourceSkillDir)) {
       throw new Error(`Managed skill template not found: ${sourceSkillDir}`);
     }
+  }
+
+  // 各 skill 并行同步，输出仍按 skill 与目录顺序打印
+  const limit = createIoLimiter();
+  const skillEvents = await Promise.all(
+    DISTRIBUTED_SKILLS.map((skillName) =>
+      copyManagedDirectory(
+        path.join(TEMPLATE_SKILLS_DIR, skillName),
+        path.join(targetSkillsDir, skillName),
+        { force, limit }
+      )
+    )
+  );
 
-    copyManagedDirectory(sourceSkillDir, targetSkillDir, { force });
+  for (const event of skillEvents.flat()) {
+    console[event.level](event.message);
   }
 }
 
-function runInit(args) {
+async function runInit(args) {
   const { options } = parseCliArgs(args);
 
   if (options.help) {
@@ -246,7 +285,7 @@ function runInit(args) {
 
   // Case 1: Directory does not exist - Create managed skill roots only
   if (!fs.existsSync(targetDir)) {
-    syncDistributedSkills(targetRoot);
+    await syncDistributedSkills(targetRoot);
     console.log(`Initialized managed .claude skills in ${targetRoot}`);
     return 0;
   }
@@ -254,14 +293,14 @@ function runInit(args) {
   // Case 2: Directory exists + Force - Force-upgrade managed skills only
   if (options.force) {
     console.log('Force flag detected. Reinstalling managed skills without deleting unrelated .claude files...');
-    syncDistributedSkills(targetRoot, { force: true });
+    await syncDistributedSkills(targetRoot, { force: true });
     console.log(`Reinstalled managed .claude skills in ${targetRoot}`);
     return 0;
   }
 
   // Case 3: Directory exists - Incremental Update
   console.log(`Target ${targetDir} already exists. Performing incremental update...`);
-  syncDistributedSkills(targetRoot);
+  await syncDistributedSkills(targetRoot);
   console.log('Incremental update complete. Existing .claude files were preserved.');
   return 0;
 }
@@ -365,6 +404,13 @@ function parseConfigOverrides(options) {
 }
 
 function runConfig(args) {
+  const {
+    doctorUserConfig,
+    getConfigValue,
+    resolveUserConfig,
+    setConfigValue,
+    writeConfigTemplate
+  } = loadModule('lib/skill-runtime/config.js');
   const [subcommand, ...rest] = args;
   const options = parseConfigArgs(rest);
   const cwd = path.resolve(options.cwd || process.cwd());
@@ -462,7 +508,7 @@ function runConfig(args) {
 }
 
 function runNextChangeKey(args) {
-  const parsed = { prefix: null, description: null, cwd: null };
+  const parsed = { prefix: null, description: null, cwd: null, reserve: true };
 
   for (let i = 0; i < args.length; i++) {
     const arg = args[i];
@@ -472,21 +518,23 @@ function runNextChangeKey(args) {
     if (arg.startsWith('--description=')) { parsed.description = arg.slice('--description='.length); continue; }
     if (arg === '--cwd') { parsed.cwd = args[++i]; continue; }
     if (arg.startsWith('--cwd=')) { parsed.cwd = arg.slice('--cwd='.length); continue; }
+    if (arg === '--reserve') { parsed.reserve = true; continue; }
+    if (arg === '--no-reserve') { parsed.reserve = false; continue; }
   }
 
   if (!parsed.prefix || !parsed.description) {
-    console.error('Use: cc-devflow next-change-key --prefix REQ|FIX --description "short description"');
+    console.error('Use: cc-devflow next-change-key --prefix REQ|FIX --description "short description" [--no-reserve]');
     return 1;
   }
 
-  const { nextChangeKey } = require(path.join(PACKAGE_ROOT, 'lib/skill-runtime/paths.js'));
+  const { nextChangeKey } = loadModule('lib/skill-runtime/paths.js');
   const repoRoot = path.resolve(parsed.cwd || process.cwd());
-  const result = nextChangeKey(repoRoot, parsed.prefix, parsed.description);
+  const result = nextChangeKey(repoRoot, parsed.prefix, parsed.description, { reserve: parsed.reserve });
   process.stdout.write(`${result.changeId}\n${result.changeKey}\n`);
   return 0;
 }
 
-function runAdapt(args) {
+async function runAdapt(args) {
   const { options, rest } = parseCliArgs(args);
 
   if (options.help) {
@@ -503,30 +551,28 @@ function runAdapt(args) {
     return 1;
   }
 
-  const result = spawnSync(process.execPath, [ADAPT_BIN, ...rest], {
-    stdio: 'inherit',
-    cwd: targetRoot
-  });
-
-  if (result.error) {
-    console.error(`Failed to run adapt: ${result.error.message}`);
+  // 进程内调用编译器；编译器按 cwd 解析 .claude 与输出路径，结束后恢复 cwd
+  const previousCwd = process.cwd();
+  try {
+    const adapt = require(ADAPT_BIN);
+    process.chdir(targetRoot);
+    return await adapt.runAdapt(rest);
+  } catch (error) {
+    console.error(`Error: ${error.message}`);
     return 1;
+  } finally {
+    process.chdir(previousCwd);
   }
-
-  return typeof result.status === 'number' ? result.status : 1;
 }
 
-function runAdapter(command, args) {
-  const result = spawnSync(process.execPath, [ADAPTER_BIN, command, ...args], {
-    stdio: 'inherit'
-  });
-
-  if (result.error) {
-    console.error(`Failed to run adapter: ${result.error.message}`);
+async function runAdapter(command, args) {
+  try {
+    const { runAdapterCommand } = require(ADAPTER_BIN);
+    return await runAdapterCommand(command, args);
+  } catch (error) {
+    console.error(`Error: ${error.message}`);
     return 1;
   }
-
-  return typeof result.status === 'number' ? result.status : 1;
 }
 
 function runArchiveChange(args) {
@@ -544,7 +590,7 @@ function runArchiveChange(args) {
     return 1;
   }
 
-  const { archiveChange } = require(path.join(PACKAGE_ROOT, 'lib/skill-runtime/archive-change.js'));
+  const { archiveChange } = loadModule('lib/skill-runtime/archive-change.js');
   const repoRoot = path.resolve(parsed.cwd || process.cwd());
   const result = archiveChange(repoRoot, parsed.changeKey);
   process.stdout.write(`Archived to ${result.archived}\n`);
@@ -566,7 +612,7 @@ function runRestoreChange(args) {
     return 1;
   }
 
-  const { restoreChange } = require(path.join(PACKAGE_ROOT, 'lib/skill-runtime/archive-change.js'));
+  const { restoreChange } = loadModule('lib/skill-runtime/archive-change.js');
   const repoRoot = path.resolve(parsed.cwd || process.cwd());
   const archivePath = path.resolve(parsed.archivedPath);
   const result = restoreChange(repoRoot, archivePath);
@@ -583,7 +629,7 @@ function runListArchived(args) {
     if (arg.startsWith('--cwd=')) { parsed.cwd = arg.slice('--cwd='.length); continue; }
   }
 
-  const { listArchived } = require(path.join(PACKAGE_ROOT, 'lib/skill-runtime/archive-change.js'));
+  const { listArchived } = loadModule('lib/skill-runtime/archive-change.js');
   const repoRoot = path.resolve(parsed.cwd || process.cwd());
   const items = listArchived(repoRoot);
 
@@ -598,8 +644,7 @@ function runListArchived(args) {
   return 0;
 }
 
-async function main() {
-  const argv = process.argv.slice(2);
+async function main(argv = process.argv.slice(2)) {
   const [command, ...rest] = argv;
 
   if (!command || command === 'help' || command === '--help' || command === '-h') {
@@ -649,6 +694,8 @@ async function main() {
   return runAdapter(command, rest);
 }
 
+module.exports = { main };
+
 if (require.main === module) {
   main()
     .then((code) => process.exit(code))
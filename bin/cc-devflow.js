@@ -1,6 +1,5 @@
 #!/usr/bin/env node
 
-const { spawnSync } = require('child_process');
 const path = require('path');
 
 const CLI_BIN = path.resolve(__dirname, 'cc-devflow-cli.js');
@@ -18,98 +17,99 @@ const CLI_COMMANDS = new Set([
     'list-archived'
 ]);
 
-function runCli(args) {
-    const result = spawnSync(process.execPath, [CLI_BIN, ...args], {
-        stdio: 'inherit'
-    });
+// CLI 子命令在当前进程内执行，避免再启动一个 Node 进程
+async function runCli(args) {
+    const { main: runCliMain } = require(CLI_BIN);
+    return runCliMain(args);
+}
 
-    if (result.error) {
-        console.error(`Failed to run cc-devflow CLI: ${result.error.message}`);
-        return 1;
+// ============================================================
+// runAdapterCommand - 通过 adapter registry 执行命令，返回退出码
+// ============================================================
+async function runAdapterCommand(command, args) {
+    const AdapterRegistry = require('../lib/adapters/registry');
+    const ClaudeAdapter = require('../lib/adapters/claude-adapter');
+    const CodexAdapter = require('../lib/adapters/codex-adapter');
+    const { validateConfig, getDefaultConfig } = require('../lib/adapters/config-validator');
+    const logger = require('../lib/adapters/logger');
+    const fs = require('fs');
+
+    // 1. Initialize Registry
+    const registry = AdapterRegistry.getInstance();
+
+    // 2. Register known adapters
+    registry.register(new ClaudeAdapter());
+    registry.register(new CodexAdapter());
+
+    // 3. Load and Validate Config
+    let config = getDefaultConfig();
+    const configPath = path.resolve(__dirname, '../config/adapters.yml');
+
+    if (fs.existsSync(configPath)) {
+        try {
+            const yaml = require('js-yaml');
+            const fileContents = fs.readFileSync(configPath, 'utf8');
+            const rawConfig = yaml.load(fileContents);
+            const result = validateConfig(rawConfig);
+
+            if (result.success) {
+                config = result.data;
+                logger.debug('Config loaded', { path: configPath });
+            } else {
+                logger.error('Config validation failed', { error: result.error });
+                return 1;
+            }
+        } catch (e) {
+            logger.warn('Failed to load config, using defaults', { error: e.message });
+        }
     }
 
-    return typeof result.status === 'number' ? result.status : 1;
-}
+    registry.setConfig(config.adapters);
 
-async function main() {
-    try {
-        const cliArgs = process.argv.slice(2);
-        const cliCommand = cliArgs[0];
+    // 4. Parse Command
+    // Usage: cc-devflow <command> [args...]
+    if (!command) {
+        logger.info('Usage: cc-devflow <command> [args...]');
+        return 0;
+    }
 
-        if (!cliCommand || CLI_COMMANDS.has(cliCommand)) {
-            process.exit(runCli(cliArgs));
-        }
+    // 5. Detect & Execute
+    // Note: executeCommand will auto-detect if no adapter specified
+    logger.info('Processing command', { command });
 
-        const AdapterRegistry = require('../lib/adapters/registry');
-        const ClaudeAdapter = require('../lib/adapters/claude-adapter');
-        const CodexAdapter = require('../lib/adapters/codex-adapter');
-        const { validateConfig, getDefaultConfig } = require('../lib/adapters/config-validator');
-        const logger = require('../lib/adapters/logger');
-        const fs = require('fs');
-        const yaml = require('js-yaml');
-
-        // 1. Initialize Registry
-        const registry = AdapterRegistry.getInstance();
-
-        // 2. Register known adapters
-        registry.register(new ClaudeAdapter());
-        registry.register(new CodexAdapter());
-
-        // 3. Load and Validate Config
-        let config = getDefaultConfig();
-        const configPath = path.resolve(__dirname, '../config/adapters.yml');
-
-        if (fs.existsSync(configPath)) {
-            try {
-                const fileContents = fs.readFileSync(configPath, 'utf8');
-                const rawConfig = yaml.load(fileContents);
-                const result = validateConfig(rawConfig);
-
-                if (result.success) {
-                    config = result.data;
-                    logger.debug('Config loaded', { path: configPath });
-                } else {
-                    logger.error('Config validation failed', { error: result.error });
-                    process.exit(1);
-                }
-            } catch (e) {
-                logger.warn('Failed to load config, using defaults', { error: e.message });
-            }
+    try {
+        const result = await registry.executeCommand(command, args);
+        // If result has output/code, handle it.
+        // Claude adapter pipes to stdio, so result might be just an exit code.
+        if (result && result.msg) {
+            logger.info('Command completed', { msg: result.msg, code: result.code });
         }
+        return result.code || 0;
+    } catch (err) {
+        logger.error('Execution failed', { error: err.message });
+        return 1;
+    }
+}
 
-        registry.setConfig(config.adapters);
-
-        // 4. Parse Command
-        // Usage: cc-devflow <command> [args...]
-        const [, , command, ...args] = process.argv;
+async function main() {
+    const cliArgs = process.argv.slice(2);
+    const cliCommand = cliArgs[0];
 
-        if (!command) {
-            logger.info('Usage: cc-devflow <command> [args...]');
-            process.exit(0);
-        }
+    if (!cliCommand || CLI_COMMANDS.has(cliCommand)) {
+        return runCli(cliArgs);
+    }
 
-        // 5. Detect & Execute
-        // Note: executeCommand will auto-detect if no adapter specified
-        logger.info('Processing command', { command });
+    const [command, ...args] = cliArgs;
+    return runAdapterCommand(command, args);
+}
 
-        try {
-            const result = await registry.executeCommand(command, args);
-            // If result has output/code, handle it. 
-            // Claude adapter pipes to stdio, so result might be just an exit code.
-            if (result && result.msg) {
-                logger.info('Command completed', { msg: result.msg, code: result.code });
-            }
-            process.exit(result.code || 0);
+module.exports = { runAdapterCommand };
 
-        } catch (err) {
-            logger.error('Execution failed', { error: err.message });
+if (require.main === module) {
+    main()
+        .then((code) => process.exit(code))
+        .catch((error) => {
+            console.error(`Fatal error: ${error.message}`);
             process.exit(1);
-        }
-
-    } catch (error) {
-        logger.error('Fatal error', { error: error.message, stack: error.stack });
-        process.exit(1);
-    }
+        });
 }
-
-main();
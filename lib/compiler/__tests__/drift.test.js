@@ -6,6 +6,7 @@
  * 2. 手动修改时返回 exit code 2 并输出 diff
  * 3. 目标文件缺失时返回 exit code 2
  * 4. 规则入口文件包含在漂移检测中
+ * 5. 迁移条目缺少 targetHash 时如实报告；拆分变少时删除孤儿分片
  *
  * Reference: contracts/cli-spec.yaml#check_output
  */
@@ -122,6 +123,185 @@ describe('Drift Detection', () => {
     });
   });
 
+  describe('checkDrift() v3 entries', () => {
+    async function writeTarget(name, content) {
+      const targetPath = path.join(tempDir, name);
+      await fs.promises.writeFile(targetPath, content);
+      const stats = await fs.promises.stat(targetPath);
+      return {
+        source: `${name}.src`,
+        target: targetPath,
+        platform: 'codex',
+        sourceHash: hashContentOf('source'),
+        targetHash: hashContentOf(content),
+        targetSize: stats.size,
+        targetMtimeMs: stats.mtimeMs
+      };
+    }
+
+    function hashContentOf(content) {
+      return require('../manifest').hashContent(content);
+    }
+
+    afterEach(() => {
+      jest.restoreAllMocks();
+    });
+
+    test('should skip reading targets whose size and mtime are unchanged', async () => {
+      const { checkDrift } = require('../manifest');
+      const entry = await writeTarget('fast.md', 'compiled output');
+      const readSpy = jest.spyOn(fs.promises, 'readFile');
+
+      const drift = await checkDrift({ entries: [entry] });
+
+      expect(drift).toEqual([]);
+      expect(readSpy).not.toHaveBeenCalled();
+    });
+
+    test('should report size changes without hashing', async () => {
+      const { checkDrift } = require('../manifest');
+      const entry = await writeTarget('grown.md', 'compiled output');
+      await fs.promises.writeFile(entry.target, 'compiled output plus manual edits');
+      const readSpy = jest.spyOn(fs.promises, 'readFile');
+
+      const drift = await checkDrift({ entries: [entry] });
+
+      expect(drift).toHaveLength(1);
+      expect(drift[0].issue).toBe('target file modified since last compile');
+      expect(readSpy).not.toHaveBeenCalled();
+    });
+
+    test('should compare against targetHash rather than sourceHash', async () => {
+      const { checkDrift } = require('../manifest');
+      const entry = await writeTarget('touched.md', 'compiled output');
+      const later = new Date(Date.now() + 5000);
+      await fs.promises.utimes(entry.target, later, later);
+
+      const drift = await checkDrift({ entries: [entry] });
+
+      expect(drift).toEqual([]);
+    });
+
+    test('should refresh the recorded stat of touched but unchanged targets', async () => {
+      const { checkDrift } = require('../manifest');
+      const entry = await writeTarget('restored.md', 'compiled output');
+      // 模拟 touch / git checkout：内容不变，mtime 落在 racy 窗口之外
+      const earlier = new Date(Date.now() - 60 * 1000);
+      await fs.promises.utimes(entry.target, earlier, earlier);
+
+      const first = { statHits: 0, hashed: 0, refreshed: 0 };
+      expect(await checkDrift({ entries: [entry] }, { stats: first })).toEqual([]);
+      expect(first).toEqual({ statHits: 0, hashed: 1, refreshed: 1 });
+      expect(entry.targetMtimeMs).toBe((await fs.promises.stat(entry.target)).mtimeMs);
+
+      const second = { statHits: 0, hashed: 0, refreshed: 0 };
+      expect(await checkDrift({ entries: [entry] }, { stats: second })).toEqual([]);
+      expect(second).toEqual({ statHits: 1, hashed: 0, refreshed: 0 });
+    });
+
+    test('should flag same-size edits once mtime changes', async () => {
+      const { checkDrift } = require('../manifest');
+      const entry = await writeTarget('edited.md', 'compiled output');
+      await fs.promises.writeFile(entry.target, 'COMPILED OUTPUT');
+      const later = new Date(Date.now() + 5000);
+      await fs.promises.utimes(entry.target, later, later);
+
+      const drift = await checkDrift({ entries: [entry] });
+
+      expect(drift.map((item) => item.issue)).toEqual(['target file modified since last compile']);
+    });
+
+    test('should ask for a recompile when a migrated entry has no target hash', async () => {
+      const { checkDrift, migrateToV3 } = require('../manifest');
+      const targetPath = path.join(tempDir, 'legacy.md');
+      await fs.promises.writeFile(targetPath, 'compiled output');
+
+      const manifest = migrateToV3({
+        version: '2.0',
+        entries: [{ source: 'legacy.src', target: targetPath, hash: 'source-hash', platform: 'codex' }]
+      });
+      const drift = await checkDrift(manifest);
+
+      expect(drift).toHaveLength(1);
+      expect(drift[0].issue).toMatch(/target hash not recorded/);
+    });
+
+    test('should report migrated entries in check mode and regenerate them on compile', async () => {
+      const { compile } = require('../index');
+      const previousCwd = process.cwd();
+      process.chdir(tempDir);
+      try {
+        await fs.promises.mkdir('.claude/commands', { recursive: true });
+        await fs.promises.writeFile('.claude/commands/cc-plan.md', '---\nname: cc-plan\ndescription: Plan\n---\nPlan\n');
+        const options = { platforms: ['cursor'], rules: false, skills: false };
+        await compile(options);
+
+        // 降级为 v2 manifest，并手工改动产物
+        const manifestPath = 'devflow/.generated/manifest.json';
+        const stored = JSON.parse(await fs.promises.readFile(manifestPath, 'utf8'));
+        const [entry] = stored.entries;
+        await fs.promises.writeFile(manifestPath, JSON.stringify({
+          version: '2.0',
+          entries: [{ source: entry.source, target: entry.target, platform: entry.platform, hash: entry.sourceHash }]
+        }));
+        const compiled = await fs.promises.readFile(entry.target, 'utf8');
+        await fs.promises.writeFile(entry.target, 'edited by hand');
+
+        const checked = await compile({ ...options, check: true });
+        expect(checked.drift.map((item) => item.issue)).toEqual([
+          'target hash not recorded; run adapt to refresh manifest'
+        ]);
+
+        const result = await compile(options);
+        expect(result.filesCompiled).toBe(1);
+        expect(await fs.promises.readFile(entry.target, 'utf8')).toBe(compiled);
+        expect((await compile({ ...options, check: true })).drift).toEqual([]);
+      } finally {
+        process.chdir(previousCwd);
+      }
+    });
+
+    test('should delete orphaned split targets returned by setEntries', async () => {
+      const { createManifest, createEntry, setEntries, removeOrphanedTargets } = require('../manifest');
+      const part = (name) => createEntry({
+        source: 'big.md',
+        target: path.join(tempDir, name),
+        platform: 'antigravity',
+        sourceHash: 'src',
+        targetHash: 'x'
+      });
+      for (const name of ['big-part1.md', 'big-part2.md', 'big.md']) {
+        await fs.promises.writeFile(path.join(tempDir, name), name);
+      }
+
+      const manifest = createManifest();
+      setEntries(manifest, 'big.md', 'antigravity', [part('big-part1.md'), part('big-part2.md')]);
+      const orphaned = setEntries(manifest, 'big.md', 'antigravity', [part('big.md')]);
+      const errors = [];
+
+      expect(await removeOrphanedTargets(orphaned, errors)).toBe(2);
+      expect(errors).toEqual([]);
+      expect(fs.readdirSync(tempDir).sort()).toEqual(['big.md']);
+    });
+
+    test('should keep report order stable under bounded concurrency', async () => {
+      const { checkDrift } = require('../manifest');
+      const entries = [];
+      for (let i = 0; i < 20; i++) {
+        entries.push({
+          source: `missing-${i}.src`,
+          target: path.join(tempDir, `missing-${i}.md`),
+          targetHash: 'x',
+          platform: 'codex'
+        });
+      }
+
+      const drift = await checkDrift({ entries }, { concurrency: 3 });
+
+      expect(drift.map((item) => item.source)).toEqual(entries.map((entry) => entry.source));
+    });
+  });
+
   describe('Rules Entry Drift Detection', () => {
     test('should include rules entry files in drift check', async () => {
       // 规则入口文件应该和其他编译产物一样被检测
@@ -0,0 +1,203 @@
+/**
+ * File Mirror Tests
+ *
+ * 测试镜像引擎:
+ * 1. 新建/更新/未变更判定
+ * 2. 持久化记录命中时不读取文件内容
+ * 3. 改写内容（content，可延迟生成）与 hardlink 模式
+ * 4. copy 模式断开遗留硬链接，不写穿源文件
+ * 5. 流式哈希与整文件哈希一致
+ */
+
+const path = require('path');
+const fs = require('fs');
+const os = require('os');
+const crypto = require('crypto');
+
+const {
+  STREAM_HASH_THRESHOLD,
+  hashFileStreaming,
+  normalizeLinkMode,
+  createMirrorState,
+  loadMirrorState,
+  saveMirrorState,
+  forgetMirrorTarget,
+  mirrorFile
+} = require('../file-mirror.js');
+
+function setMtime(filePath, secondsAgo) {
+  const time = new Date(Date.now() - secondsAgo * 1000);
+  fs.utimesSync(filePath, time, time);
+}
+
+describe('File Mirror', () => {
+  let tmpDir;
+  let previousCwd;
+  let sourcePath;
+  let targetPath;
+
+  beforeEach(() => {
+    previousCwd = process.cwd();
+    tmpDir = fs.realpathSync(fs.mkdtempSync(path.join(os.tmpdir(), 'cc-devflow-mirror-')));
+    process.chdir(tmpDir);
+    sourcePath = path.join(tmpDir, '.claude/scripts/check.sh');
+    targetPath = path.join(tmpDir, '.codex/scripts/check.sh');
+    fs.mkdirSync(path.dirname(sourcePath), { recursive: true });
+    fs.writeFileSync(sourcePath, '#!/bin/bash\necho ok\n', { mode: 0o755 });
+  });
+
+  afterEach(() => {
+    jest.restoreAllMocks();
+    process.chdir(previousCwd);
+    fs.rmSync(tmpDir, { recursive: true, force: true });
+  });
+
+  test('should create, skip and update a mirrored file', async () => {
+    expect((await mirrorFile(sourcePath, targetPath)).status).toBe('created');
+    expect(fs.readFileSync(targetPath, 'utf8')).toBe('#!/bin/bash\necho ok\n');
+    expect(fs.statSync(targetPath).mode & 0o777).toBe(0o755);
+
+    expect((await mirrorFile(sourcePath, targetPath)).status).toBe('unchanged');
+
+    fs.writeFileSync(sourcePath, '#!/bin/bash\necho changed\n');
+    expect((await mirrorFile(sourcePath, targetPath)).status).toBe('updated');
+    expect(fs.readFileSync(targetPath, 'utf8')).toBe('#!/bin/bash\necho changed\n');
+  });
+
+  test('should apply an explicit target mode', async () => {
+    await mirrorFile(sourcePath, targetPath, { mode: 0o644 });
+    expect(fs.statSync(targetPath).mode & 0o777).toBe(0o644);
+  });
+
+  test('should skip without reading bytes when the record matches', async () => {
+    const state = createMirrorState();
+    await mirrorFile(sourcePath, targetPath, { state });
+
+    // 让记录脱离 racy 窗口
+    setMtime(sourcePath, 60);
+    setMtime(targetPath, 60);
+    await mirrorFile(sourcePath, targetPath, { state });
+    expect(state.files['.codex/scripts/check.sh'].racy).toBe(false);
+
+    const readSpy = jest.spyOn(fs.promises, 'readFile');
+    const result = await mirrorFile(sourcePath, targetPath, { state });
+
+    expect(result.status).toBe('unchanged');
+    expect(readSpy).not.toHaveBeenCalled();
+  });
+
+  test('should detect target edits even when the record exists', async () => {
+    const state = createMirrorState();
+    await mirrorFile(sourcePath, targetPath, { state });
+    setMtime(sourcePath, 60);
+    setMtime(targetPath, 60);
+    await mirrorFile(sourcePath, targetPath, { state });
+
+    fs.writeFileSync(targetPath, '#!/bin/bash\necho no!\n');
+    expect((await mirrorFile(sourcePath, targetPath, { state })).status).toBe('updated');
+    expect(fs.readFileSync(targetPath, 'utf8')).toBe('#!/bin/bash\necho ok\n');
+  });
+
+  test('should compare rewritten content instead of source bytes', async () => {
+    const content = 'rewritten\n';
+    expect((await mirrorFile(sourcePath, targetPath, { content })).status).toBe('created');
+    expect(fs.readFileSync(targetPath, 'utf8')).toBe(content);
+    expect((await mirrorFile(sourcePath, targetPath, { content })).status).toBe('unchanged');
+    expect((await mirrorFile(sourcePath, targetPath, { content: 'other\n' })).status).toBe('updated');
+  });
+
+  test('should not generate lazy content when the record matches', async () => {
+    const state = createMirrorState();
+    const probePath = path.join(tmpDir, '.claude/scripts/guide.md');
+    const render = jest.fn(async () => {
+      const exists = fs.existsSync(probePath);
+      const body = fs.readFileSync(sourcePath, 'utf8').toUpperCase();
+      return { content: exists ? `${body}# guide\n` : body, probes: [{ path: probePath, exists }] };
+    });
+
+    expect((await mirrorFile(sourcePath, targetPath, { state, content: render })).status).toBe('created');
+    expect(fs.readFileSync(targetPath, 'utf8')).toBe('#!/BIN/BASH\nECHO OK\n');
+    setMtime(sourcePath, 60);
+    setMtime(targetPath, 60);
+    await mirrorFile(sourcePath, targetPath, { state, content: render });
+    render.mockClear();
+
+    expect((await mirrorFile(sourcePath, targetPath, { state, content: render })).status).toBe('unchanged');
+    expect(render).not.toHaveBeenCalled();
+
+    // 源文件未变，但改写依赖的探测路径出现了
+    fs.writeFileSync(probePath, 'guide\n');
+    expect((await mirrorFile(sourcePath, targetPath, { state, content: render })).status).toBe('updated');
+    expect(render).toHaveBeenCalledTimes(1);
+    expect(fs.readFileSync(targetPath, 'utf8')).toBe('#!/BIN/BASH\nECHO OK\n# guide\n');
+
+    fs.writeFileSync(sourcePath, '#!/bin/bash\necho changed\n');
+    expect((await mirrorFile(sourcePath, targetPath, { state, content: render })).status).toBe('updated');
+    expect(render).toHaveBeenCalledTimes(2);
+    expect(fs.readFileSync(targetPath, 'utf8')).toBe('#!/BIN/BASH\nECHO CHANGED\n# guide\n');
+  });
+
+  test('should hardlink in hardlink mode and unlink in copy mode', async () => {
+    await mirrorFile(sourcePath, targetPath, { linkMode: 'hardlink' });
+    expect(fs.statSync(targetPath).ino).toBe(fs.statSync(sourcePath).ino);
+    expect((await mirrorFile(sourcePath, targetPath, { linkMode: 'hardlink' })).status).toBe('unchanged');
+
+    expect((await mirrorFile(sourcePath, targetPath)).status).toBe('updated');
+    expect(fs.statSync(targetPath).ino).not.toBe(fs.statSync(sourcePath).ino);
+
+    fs.writeFileSync(targetPath, 'target edit\n');
+    expect(fs.readFileSync(sourcePath, 'utf8')).toBe('#!/bin/bash\necho ok\n');
+  });
+
+  test('should not write through a hardlink when rewriting content', async () => {
+    await mirrorFile(sourcePath, targetPath, { linkMode: 'hardlink' });
+    await mirrorFile(sourcePath, targetPath, { content: 'rewritten\n' });
+
+    expect(fs.readFileSync(sourcePath, 'utf8')).toBe('#!/bin/bash\necho ok\n');
+    expect(fs.readFileSync(targetPath, 'utf8')).toBe('rewritten\n');
+  });
+
+  test('should leave the target untouched in dry-run mode', async () => {
+    expect((await mirrorFile(sourcePath, targetPath, { dryRun: true })).status).toBe('created');
+    expect(fs.existsSync(targetPath)).toBe(false);
+  });
+
+  test('should reject unknown link modes', () => {
+    expect(normalizeLinkMode('hardlink')).toBe('hardlink');
+    expect(() => normalizeLinkMode('symlink')).toThrow(/Invalid link mode/);
+  });
+
+  test('should stream-hash large files', async () => {
+    const largePath = path.join(tmpDir, 'large.bin');
+    const buffer = Buffer.alloc(STREAM_HASH_THRESHOLD + 4096, 7);
+    fs.writeFileSync(largePath, buffer);
+
+    expect(await hashFileStreaming(largePath)).toBe(
+      crypto.createHash('sha256').update(buffer).digest('hex')
+    );
+    expect(await hashFileStreaming(path.join(tmpDir, 'missing.bin'))).toBeNull();
+  });
+
+  describe('state persistence', () => {
+    test('should round-trip records and drop missing unseen targets', async () => {
+      const statePath = path.join(tmpDir, 'devflow/.generated/mirror-state.json');
+      const state = createMirrorState();
+      await mirrorFile(sourcePath, targetPath, { state });
+      state.files['.codex/scripts/gone.sh'] = { sourceSize: 1 };
+      state.dirty = true;
+
+      expect(await saveMirrorState(state, statePath)).toBe(true);
+
+      const loaded = await loadMirrorState(statePath);
+      expect(Object.keys(loaded.files)).toEqual(['.codex/scripts/check.sh']);
+    });
+
+    test('should forget pruned targets', async () => {
+      const state = createMirrorState();
+      await mirrorFile(sourcePath, targetPath, { state });
+      forgetMirrorTarget(state, path.dirname(targetPath));
+
+      expect(state.files).toEqual({});
+    });
+  });
+});
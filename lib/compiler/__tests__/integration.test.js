@@ -114,11 +114,11 @@ describe('Full Compilation Integration', () => {
       // expect(registry.skills).toBeDefined();
     });
 
-    test('should generate manifest.json v2.0', async () => {
+    test('should generate manifest.json v3.0', async () => {
       const { MANIFEST_PATH, MANIFEST_VERSION } = require('../manifest');
 
       expect(MANIFEST_PATH).toBe('devflow/.generated/manifest.json');
-      expect(MANIFEST_VERSION).toBe('2.0');
+      expect(MANIFEST_VERSION).toBe('3.0');
 
       // TODO: Phase 4 完成后验证文件生成
       // const content = fs.readFileSync(MANIFEST_PATH, 'utf8');
@@ -1,9 +1,9 @@
 /**
- * T009: Manifest v2.0 Schema Tests
+ * T009: Manifest v3.0 Schema Tests
  *
- * 测试 Manifest v2.0:
- * 1. v2.0 schema 接受 skills 和 rulesEntry 字段
- * 2. v1.0 → v2.0 向后兼容迁移
+ * 测试 Manifest v3.0:
+ * 1. v3.0 schema 接受 skills 和 rulesEntry 字段
+ * 2. v1.0 / v2.0 → v3.0 向后兼容迁移
  * 3. Hash 格式验证 (64 字符十六进制)
  * 4. Timestamp 格式验证 (ISO8601)
  *
@@ -13,7 +13,13 @@
 const {
   MANIFEST_VERSION,
   createManifest,
+  createEntry,
   migrateToV2,
+  migrateToV3,
+  addEntry,
+  setEntries,
+  findEntries,
+  needsRecompile,
       addSkillEntry,
       replaceSkillEntries,
       addRulesEntry,
@@ -22,12 +28,12 @@ const {
   hashContent
 } = require('../manifest');
 
-describe('Manifest v2.0', () => {
+describe('Manifest v3.0', () => {
   describe('createManifest()', () => {
-    test('should create v2.0 manifest with skills and rulesEntry fields', () => {
+    test('should create v3.0 manifest with skills and rulesEntry fields', () => {
       const manifest = createManifest();
 
-      expect(manifest.version).toBe('2.0');
+      expect(manifest.version).toBe('3.0');
       expect(manifest).toHaveProperty('generatedAt');
       expect(manifest).toHaveProperty('entries');
       expect(manifest).toHaveProperty('skills');
@@ -47,8 +53,8 @@ describe('Manifest v2.0', () => {
     });
   });
 
-  describe('migrateToV2()', () => {
-    test('should migrate v1.0 manifest to v2.0', () => {
+  describe('migrateToV3()', () => {
+    test('should migrate v1.0 manifest to v3.0', () => {
       const v1Manifest = {
         version: '1.0.0',
         generatedAt: '2025-01-01T00:00:00.000Z',
@@ -57,37 +63,156 @@ describe('Manifest v2.0', () => {
         ]
       };
 
-      const v2Manifest = migrateToV2(v1Manifest);
+      const v3Manifest = migrateToV3(v1Manifest);
 
-      expect(v2Manifest.version).toBe('2.0');
-      expect(v2Manifest.entries).toEqual(v1Manifest.entries);
-      expect(v2Manifest.skills).toEqual([]);
-      expect(v2Manifest.rulesEntry).toEqual({});
+      expect(v3Manifest.version).toBe('3.0');
+      expect(v3Manifest.entries[0]).toMatchObject({
+        source: 'test.md',
+        target: 'out/test.md',
+        platform: 'codex',
+        sourceHash: 'abc',
+        targetHash: null
+      });
+      expect(v3Manifest.skills).toEqual([]);
+      expect(v3Manifest.rulesEntry).toEqual({});
     });
 
-    test('should preserve v2.0 manifest unchanged', () => {
+    test('should keep v2.0 skills and rulesEntry while moving hash to sourceHash', () => {
       const v2Manifest = {
         version: '2.0',
         generatedAt: '2025-01-01T00:00:00.000Z',
-        entries: [],
+        entries: [
+          {
+            source: 'a.md',
+            target: '.codex/prompts/a.md',
+            hash: 'src',
+            timestamp: '2025-01-01T00:00:00.000Z',
+            platform: 'codex'
+          }
+        ],
         skills: [{ name: 'test', sourceHash: 'abc', timestamp: '2025-01-01T00:00:00.000Z' }],
         rulesEntry: { cursor: { path: '.cursor/rules/devflow.mdc', hash: 'def' } }
       };
 
-      const result = migrateToV2(v2Manifest);
+      const result = migrateToV3(v2Manifest);
+
+      expect(result.skills).toEqual(v2Manifest.skills);
+      expect(result.rulesEntry).toEqual(v2Manifest.rulesEntry);
+      expect(result.entries[0].sourceHash).toBe('src');
+      expect(result.entries[0]).not.toHaveProperty('hash');
+    });
+
+    test('should preserve v3.0 manifest unchanged', () => {
+      const v3Manifest = createManifest();
 
-      expect(result).toEqual(v2Manifest);
+      expect(migrateToV3(v3Manifest)).toBe(v3Manifest);
     });
 
-    test('should create new v2.0 manifest from null', () => {
-      const result = migrateToV2(null);
+    test('should keep migrateToV2 as a compatibility alias', () => {
+      expect(migrateToV2).toBe(migrateToV3);
+    });
+
+    test('should create new v3.0 manifest from null', () => {
+      const result = migrateToV3(null);
 
-      expect(result.version).toBe('2.0');
+      expect(result.version).toBe('3.0');
       expect(result.skills).toEqual([]);
       expect(result.rulesEntry).toEqual({});
     });
   });
 
+  describe('keyed entries', () => {
+    function entry(source, platform, target, sourceHash = 'src') {
+      return createEntry({
+        source,
+        target,
+        platform,
+        sourceHash,
+        targetHash: hashContent(target),
+        targetSize: target.length,
+        targetMtimeMs: 1
+      });
+    }
+
+    test('createEntry should record source and target hashes separately', () => {
+      const created = entry('a.md', 'codex', '.codex/prompts/a.md');
+
+      expect(created.sourceHash).toBe('src');
+      expect(created.targetHash).toBe(hashContent('.codex/prompts/a.md'));
+      expect(created.targetSize).toBe('.codex/prompts/a.md'.length);
+      expect(created.targetMtimeMs).toBe(1);
+    });
+
+    test('should look up entries by (source, platform)', () => {
+      const manifest = createManifest();
+      addEntry(manifest, entry('a.md', 'codex', '.codex/prompts/a.md'));
+      addEntry(manifest, entry('a.md', 'cursor', '.cursor/commands/a.md'));
+
+      expect(findEntries(manifest, 'a.md', 'cursor').map((e) => e.target))
+        .toEqual(['.cursor/commands/a.md']);
+      expect(needsRecompile('a.md', 'src', manifest, 'codex')).toBe(false);
+      expect(needsRecompile('a.md', 'changed', manifest, 'codex')).toBe(true);
+      expect(needsRecompile('b.md', 'src', manifest, 'codex')).toBe(true);
+    });
+
+    test('addEntry should replace the existing entry in place', () => {
+      const manifest = createManifest();
+      addEntry(manifest, entry('a.md', 'codex', '.codex/prompts/a.md', 'v1'));
+      addEntry(manifest, entry('b.md', 'codex', '.codex/prompts/b.md'));
+      addEntry(manifest, entry('a.md', 'codex', '.codex/prompts/a.md', 'v2'));
+
+      expect(manifest.entries.map((e) => [e.source, e.sourceHash]))
+        .toEqual([['a.md', 'v2'], ['b.md', 'src']]);
+    });
+
+    test('setEntries should track every split part and return stale parts', () => {
+      const manifest = createManifest();
+      setEntries(manifest, 'big.md', 'antigravity', [
+        entry('big.md', 'antigravity', '.agent/workflows/big-part1.md'),
+        entry('big.md', 'antigravity', '.agent/workflows/big-part2.md'),
+        entry('big.md', 'antigravity', '.agent/workflows/big-part3.md')
+      ]);
+      addEntry(manifest, entry('other.md', 'antigravity', '.agent/workflows/other.md'));
+
+      const orphaned = setEntries(manifest, 'big.md', 'antigravity', [
+        entry('big.md', 'antigravity', '.agent/workflows/big.md')
+      ]);
+
+      expect(orphaned.map((e) => e.target)).toEqual([
+        '.agent/workflows/big-part1.md',
+        '.agent/workflows/big-part2.md',
+        '.agent/workflows/big-part3.md'
+      ]);
+      expect(setEntries(manifest, 'big.md', 'antigravity', [
+        entry('big.md', 'antigravity', '.agent/workflows/big.md', 'v2')
+      ])).toEqual([]);
+      expect(manifest.entries.map((e) => e.target)).toEqual([
+        '.agent/workflows/big.md',
+        '.agent/workflows/other.md'
+      ]);
+      expect(findEntries(manifest, 'other.md', 'antigravity')).toHaveLength(1);
+    });
+
+    test('should rebuild the index when entries are replaced externally', () => {
+      const manifest = createManifest();
+      addEntry(manifest, entry('a.md', 'codex', '.codex/prompts/a.md'));
+
+      manifest.entries = [entry('b.md', 'codex', '.codex/prompts/b.md')];
+
+      expect(findEntries(manifest, 'a.md', 'codex')).toEqual([]);
+      expect(findEntries(manifest, 'b.md', 'codex')).toHaveLength(1);
+    });
+
+    test('migrated entries without targetHash should force one recompile', () => {
+      const manifest = migrateToV3({
+        version: '2.0',
+        entries: [{ source: 'a.md', target: 'out/a.md', hash: 'src', platform: 'codex' }]
+      });
+
+      expect(needsRecompile('a.md', 'src', manifest, 'codex')).toBe(true);
+    });
+  });
+
   describe('addSkillEntry()', () => {
     test('should add new skill entry', () => {
       const manifest = createManifest();
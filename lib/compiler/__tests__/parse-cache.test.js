@@ -0,0 +1,258 @@
+/**
+ * Parse Cache Tests
+ *
+ * 测试持久化解析缓存:
+ * 1. stat 命中时不读取文件
+ * 2. 内容变化时重新解析
+ * 3. 仅 mtime 变化时复用解析结果
+ * 4. 指纹/版本不匹配时整体失效
+ * 5. skill-rules.json 片段变化时技能条目失效
+ * 6. 保存时清理已删除文件的条目
+ * 7. skill 条目哈希按仓库根解析，不随 cwd 变化
+ * 8. 返回的 IR 是副本，调用方修改不会污染缓存
+ */
+
+const path = require('path');
+const fs = require('fs');
+const os = require('os');
+
+const {
+  PARSE_CACHE_VERSION,
+  createParseCache,
+  loadParseCache,
+  saveParseCache,
+  getSkillEntryHash
+} = require('../parse-cache.js');
+const { parsePromptFile, parseAllPromptFiles } = require('../parser.js');
+const { hashContent: manifestHashContent } = require('../manifest.js');
+const { STREAM_HASH_THRESHOLD, hashFileStreaming } = require('../file-mirror.js');
+const { generateSkillsRegistryV2 } = require('../skills-registry.js');
+
+const PROMPT = `---
+name: cc-plan
+description: Plan one requirement
+---
+# Plan
+
+Use $ARGUMENTS
+`;
+
+function setMtime(filePath, secondsAgo) {
+  const time = new Date(Date.now() - secondsAgo * 1000);
+  fs.utimesSync(filePath, time, time);
+}
+
+describe('Parse Cache', () => {
+  let tmpDir;
+  let previousCwd;
+
+  beforeEach(() => {
+    tmpDir = fs.realpathSync(fs.mkdtempSync(path.join(os.tmpdir(), 'cc-devflow-parse-cache-')));
+    previousCwd = process.cwd();
+    process.chdir(tmpDir);
+  });
+
+  afterEach(() => {
+    jest.restoreAllMocks();
+    process.chdir(previousCwd);
+    fs.rmSync(tmpDir, { recursive: true, force: true });
+  });
+
+  function writePrompt(name, content) {
+    const commandsDir = path.join(tmpDir, '.claude', 'commands');
+    fs.mkdirSync(commandsDir, { recursive: true });
+    const filePath = path.join(commandsDir, `${name}.md`);
+    fs.writeFileSync(filePath, content);
+    setMtime(filePath, 60);
+    return filePath;
+  }
+
+  describe('prompt files', () => {
+    test('should skip reading unchanged files on a warm cache', async () => {
+      const filePath = writePrompt('cc-plan', PROMPT);
+      const cachePath = path.join(tmpDir, 'parse-cache.json');
+
+      const cold = await loadParseCache(cachePath);
+      const first = await parseAllPromptFiles('.claude/commands', { cache: cold });
+      await saveParseCache(cold, cachePath);
+
+      const readSpy = jest.spyOn(fs, 'readFileSync');
+      const warm = await loadParseCache(cachePath);
+      const second = await parseAllPromptFiles('.claude/commands', { cache: warm });
+
+      expect(second).toEqual(first);
+      expect(readSpy.mock.calls.some(([target]) => target === filePath)).toBe(false);
+    });
+
+    test('should re-parse when content changes', async () => {
+      const filePath = writePrompt('cc-plan', PROMPT);
+      const cache = createParseCache();
+
+      await parseAllPromptFiles('.claude/commands', { cache });
+      fs.writeFileSync(filePath, PROMPT.replace('Plan one requirement', 'Plan two requirements'));
+      setMtime(filePath, 30);
+
+      const [ir] = await parseAllPromptFiles('.claude/commands', { cache });
+
+      expect(ir.frontmatter.description).toBe('Plan two requirements');
+    });
+
+    test('should reuse parsed IR when only mtime changes', async () => {
+      const filePath = writePrompt('cc-plan', PROMPT);
+      const cache = createParseCache();
+
+      const [first] = await parseAllPromptFiles('.claude/commands', { cache });
+      setMtime(filePath, 30);
+      const [second] = await parseAllPromptFiles('.claude/commands', { cache });
+
+      expect(second).toEqual(first);
+      expect(cache.entries[filePath].mtimeMs).toBe(fs.statSync(filePath).mtimeMs);
+    });
+
+    test('should not let callers mutate the cached IR', async () => {
+      writePrompt('cc-plan', PROMPT);
+      const cache = createParseCache();
+
+      const [first] = await parseAllPromptFiles('.claude/commands', { cache });
+      first.body = 'mutated';
+      first.frontmatter.description = 'mutated';
+
+      const [second] = await parseAllPromptFiles('.claude/commands', { cache });
+
+      expect(second.body).toContain('Use $ARGUMENTS');
+      expect(second.frontmatter.description).toBe('Plan one requirement');
+    });
+
+    test('should not cache files that fail validation', async () => {
+      const filePath = writePrompt('broken', '# no frontmatter\n');
+      const cache = createParseCache();
+
+      await expect(parseAllPromptFiles('.claude/commands', { cache })).rejects.toThrow();
+      expect(cache.entries[filePath]).toBeUndefined();
+    });
+  });
+
+  describe('invalidation', () => {
+    test('should discard caches written by a different parser fingerprint', async () => {
+      const cachePath = path.join(tmpDir, 'parse-cache.json');
+      fs.writeFileSync(cachePath, JSON.stringify({
+        version: PARSE_CACHE_VERSION,
+        fingerprint: 'stale',
+        cwd: process.cwd(),
+        entries: { '/tmp/x.md': { kind: 'prompt', size: 1, mtimeMs: 1, hash: 'h', value: {} } }
+      }));
+
+      const cache = await loadParseCache(cachePath);
+
+      expect(cache.entries).toEqual({});
+    });
+
+    test('should treat a corrupt cache file as cold', async () => {
+      const cachePath = path.join(tmpDir, 'parse-cache.json');
+      fs.writeFileSync(cachePath, '{not json');
+
+      const cache = await loadParseCache(cachePath);
+
+      expect(cache.entries).toEqual({});
+    });
+
+    test('should prune entries for deleted files on save', async () => {
+      const keep = writePrompt('keep', PROMPT);
+      const removed = writePrompt('removed', PROMPT.replace('cc-plan', 'removed'));
+      const cachePath = path.join(tmpDir, 'parse-cache.json');
+
+      const first = await loadParseCache(cachePath);
+      await parseAllPromptFiles('.claude/commands', { cache: first });
+      await saveParseCache(first, cachePath);
+
+      fs.unlinkSync(removed);
+      const second = await loadParseCache(cachePath);
+      await parseAllPromptFiles('.claude/commands', { cache: second });
+      await saveParseCache(second, cachePath);
+
+      const stored = JSON.parse(fs.readFileSync(cachePath, 'utf8'));
+      expect(Object.keys(stored.entries)).toEqual([keep]);
+    });
+  });
+
+  describe('skills registry', () => {
+    function writeSkill(name, rules) {
+      const skillDir = path.join(tmpDir, '.claude', 'skills', name);
+      fs.mkdirSync(skillDir, { recursive: true });
+      const skillMdPath = path.join(skillDir, 'SKILL.md');
+      fs.writeFileSync(skillMdPath, `---\nname: ${name}\ndescription: ${name} skill\nreads:\n  - references/guide.md\n---\n# ${name}\n`);
+      setMtime(skillMdPath, 60);
+      fs.writeFileSync(
+        path.join(tmpDir, '.claude', 'skills', 'skill-rules.json'),
+        JSON.stringify({ skills: { [name]: rules } })
+      );
+      return skillDir;
+    }
+
+    test('should return the same registry on cold and warm runs', async () => {
+      writeSkill('cc-plan', { priority: 'high' });
+      const cache = createParseCache();
+
+      const uncached = await generateSkillsRegistryV2('.claude/skills');
+      const cold = await generateSkillsRegistryV2('.claude/skills', { cache });
+      const warm = await generateSkillsRegistryV2('.claude/skills', { cache });
+
+      expect(cold.skills).toEqual(uncached.skills);
+      expect(warm.skills).toEqual(uncached.skills);
+      expect(getSkillEntryHash(cache, warm.skills[0]))
+        .toBe(require('../manifest.js').hashContent(JSON.stringify(uncached.skills[0])));
+    });
+
+    test('should resolve cached skill hashes against the repo root, not the cwd', async () => {
+      writeSkill('cc-plan', { priority: 'high' });
+      const cache = createParseCache();
+      const [skill] = (await generateSkillsRegistryV2('.claude/skills', { cache })).skills;
+
+      // 篡改缓存中的 entryHash：命中缓存时应原样返回
+      const key = path.join(tmpDir, skill.skillPath);
+      cache.entries[key].entryHash = 'cached-entry-hash';
+
+      process.chdir(os.tmpdir());
+      expect(getSkillEntryHash(cache, skill, tmpDir)).toBe('cached-entry-hash');
+      expect(getSkillEntryHash(cache, skill)).toBe('cached-entry-hash');
+    });
+
+    test('should agree on content hashes across parser, manifest and mirror', async () => {
+      const filePath = writePrompt('cc-plan', PROMPT);
+      const largePath = path.join(tmpDir, 'large.bin');
+      const large = Buffer.alloc(STREAM_HASH_THRESHOLD + 1, 'a');
+      fs.writeFileSync(largePath, large);
+
+      const ir = parsePromptFile(filePath);
+
+      expect(ir.source.hash).toBe(manifestHashContent(PROMPT));
+      expect(await hashFileStreaming(filePath)).toBe(ir.source.hash);
+      // 超过阈值走流式哈希，结果仍与整块哈希一致
+      expect(await hashFileStreaming(largePath)).toBe(manifestHashContent(large));
+    });
+
+    test('should invalidate a skill when its skill-rules.json config changes', async () => {
+      writeSkill('cc-plan', { priority: 'high' });
+      const cache = createParseCache();
+      await generateSkillsRegistryV2('.claude/skills', { cache });
+
+      writeSkill('cc-plan', { priority: 'low' });
+      const registry = await generateSkillsRegistryV2('.claude/skills', { cache });
+
+      expect(registry.skills[0].priority).toBe('low');
+    });
+
+    test('should invalidate a skill when a bundled read appears', async () => {
+      const skillDir = writeSkill('cc-plan', {});
+      const cache = createParseCache();
+      const before = await generateSkillsRegistryV2('.claude/skills', { cache });
+
+      fs.mkdirSync(path.join(skillDir, 'references'), { recursive: true });
+      fs.writeFileSync(path.join(skillDir, 'references', 'guide.md'), '# guide\n');
+      const after = await generateSkillsRegistryV2('.claude/skills', { cache });
+
+      expect(before.skills[0].reads).toEqual(['references/guide.md']);
+      expect(after.skills[0].reads).toEqual(['.claude/skills/cc-plan/references/guide.md']);
+    });
+  });
+});
@@ -0,0 +1,165 @@
+/**
+ * Compile Pipeline Tests
+ *
+ * 测试并发编译流水线:
+ * 1. jobs > 1 与串行路径输出逐字节一致
+ * 2. worker 池路径与主线程路径输出一致
+ * 3. 结果顺序与任务顺序一致（manifest 合并确定）
+ * 4. 单任务失败不影响其他任务
+ */
+
+const path = require('path');
+const fs = require('fs');
+const os = require('os');
+
+const { runCompileTasks, normalizeJobs, shouldUseWorkers } = require('../pipeline.js');
+const { PLATFORMS } = require('../platforms.js');
+
+function createIr(name, body) {
+  return {
+    source: {
+      path: path.join('/virtual/.claude/commands', `${name}.md`),
+      filename: name,
+      hash: `hash-${name}`
+    },
+    frontmatter: {
+      name,
+      description: `${name} description`,
+      scripts: { prereq: '.claude/scripts/check.sh' }
+    },
+    body,
+    placeholders: []
+  };
+}
+
+function createTasks() {
+  const irs = [
+    createIr('cc-plan', 'Run {SCRIPT:prereq} with $ARGUMENTS\nSee .claude/scripts/check.sh\n'),
+    createIr('cc-do', `# Do\n\n${'Large section body.\n'.repeat(900)}\n## Next\n\n$ARGUMENTS\n`),
+    createIr('cc-check', 'Check $ARGUMENTS\n')
+  ];
+  const tasks = [];
+  for (const ir of irs) {
+    for (const platform of PLATFORMS) {
+      tasks.push({ ir, platform, sourceRelative: `.claude/commands/${ir.source.filename}.md` });
+    }
+  }
+  return tasks;
+}
+
+const pathMaps = Object.fromEntries(
+  PLATFORMS.map((platform) => [platform, { '.claude/scripts/check.sh': `.${platform}/scripts/check.sh` }])
+);
+
+function readTree(rootDir) {
+  const files = {};
+  const walk = (dir) => {
+    for (const entry of fs.readdirSync(dir, { withFileTypes: true })) {
+      const fullPath = path.join(dir, entry.name);
+      if (entry.isDirectory()) {
+        walk(fullPath);
+      } else {
+        files[path.relative(rootDir, fullPath)] = fs.readFileSync(fullPath, 'utf8');
+      }
+    }
+  };
+  walk(rootDir);
+  return files;
+}
+
+function stableEntries(outcomes) {
+  return outcomes.map((outcome) => ({
+    source: outcome.task.sourceRelative,
+    platform: outcome.task.platform,
+    error: outcome.error ? outcome.error.message : null,
+    entries: (outcome.entries || []).map(({ target, sourceHash, targetHash, targetSize }) => ({
+      target,
+      sourceHash,
+      targetHash,
+      targetSize
+    }))
+  }));
+}
+
+describe('Compile Pipeline', () => {
+  let previousCwd;
+  const tmpDirs = [];
+
+  beforeEach(() => {
+    previousCwd = process.cwd();
+  });
+
+  afterEach(() => {
+    process.chdir(previousCwd);
+    for (const dir of tmpDirs.splice(0)) {
+      fs.rmSync(dir, { recursive: true, force: true });
+    }
+  });
+
+  async function runIn(options) {
+    const dir = fs.mkdtempSync(path.join(os.tmpdir(), 'cc-devflow-pipeline-'));
+    tmpDirs.push(dir);
+    process.chdir(dir);
+    const outcomes = await runCompileTasks(createTasks(), { pathMaps, ...options });
+    process.chdir(previousCwd);
+    return { files: readTree(dir), outcomes: stableEntries(outcomes) };
+  }
+
+  test('should produce byte-identical output with concurrent jobs', async () => {
+    const serial = await runIn({ jobs: 1 });
+    const parallel = await runIn({ jobs: 6, workers: false });
+
+    expect(Object.keys(serial.files).length).toBeGreaterThan(PLATFORMS.length);
+    expect(parallel.files).toEqual(serial.files);
+    expect(parallel.outcomes).toEqual(serial.outcomes);
+  });
+
+  test('should produce identical output through the worker pool', async () => {
+    const serial = await runIn({ jobs: 1 });
+    const pooled = await runIn({ jobs: 3, workers: true });
+
+    expect(pooled.files).toEqual(serial.files);
+    expect(pooled.outcomes).toEqual(serial.outcomes);
+  }, 20000);
+
+  test('should record every split part for oversized outputs', async () => {
+    const { outcomes } = await runIn({ jobs: 4, workers: false });
+    const split = outcomes.find((o) => o.source.endsWith('cc-do.md') && o.platform === 'antigravity');
+
+    expect(split.entries.length).toBeGreaterThan(1);
+  });
+
+  test('should isolate task failures and keep result order', async () => {
+    const tasks = createTasks();
+    tasks.splice(1, 0, {
+      ir: { ...createIr('broken', 'x'), frontmatter: null },
+      platform: 'codex',
+      sourceRelative: '.claude/commands/broken.md'
+    });
+
+    const dir = fs.mkdtempSync(path.join(os.tmpdir(), 'cc-devflow-pipeline-'));
+    tmpDirs.push(dir);
+    process.chdir(dir);
+    const outcomes = await runCompileTasks(tasks, { pathMaps, jobs: 4, workers: false });
+
+    expect(outcomes.map((o) => o.task)).toEqual(tasks);
+    expect(outcomes[1].error).toBeDefined();
+    expect(outcomes.filter((o) => o.error)).toHaveLength(1);
+  });
+
+  describe('options', () => {
+    test('normalizeJobs should reject non-positive values', () => {
+      expect(normalizeJobs(4)).toBe(4);
+      expect(() => normalizeJobs(0)).toThrow(/Invalid jobs value/);
+      expect(() => normalizeJobs('two')).toThrow(/Invalid jobs value/);
+    });
+
+    test('shouldUseWorkers should stay off for serial runs and small corpora', () => {
+      expect(shouldUseWorkers('auto', 1, 10000)).toBe(false);
+      expect(shouldUseWorkers(true, 1, 10000)).toBe(false);
+      expect(shouldUseWorkers('auto', 8, 10)).toBe(false);
+      expect(shouldUseWorkers(false, 8, 10000)).toBe(false);
+      expect(shouldUseWorkers(true, 8, 10)).toBe(true);
+    });
+  });
+});
@@ -0,0 +1,131 @@
+/**
+ * Tokenizer Tests
+ *
+ * 测试单次扫描 tokenizer 与多模式替换器:
+ * 1. tokenize() 按位置返回全部占位符与内联路径
+ * 2. 路径 token 不吞掉其中的占位符
+ * 3. compileReplacer() 最左最长匹配，等价于按长度降序逐键替换
+ * 4. getPathRewriter() 缓存编译结果并合并 $ARGUMENTS 映射
+ * 5. transformForPlatform() 复用 parser token 与重新扫描结果一致
+ */
+
+const {
+  tokenize,
+  splitTokens,
+  tokensMatchContent,
+  compileReplacer,
+  getPathRewriter
+} = require('../tokenizer.js');
+const { transformForPlatform } = require('../transformer.js');
+
+describe('tokenize()', () => {
+  test('should return every token type in position order', () => {
+    const body = 'Run {SCRIPT:prereq} with $ARGUMENTS, see {TEMPLATE:plan} and {GUIDE:style}.\n'
+      + '{AGENT_SCRIPT} then .claude/scripts/check.sh.';
+    const tokens = tokenize(body);
+
+    expect(tokens.map((token) => token.type)).toEqual([
+      'SCRIPT', 'ARGUMENTS', 'TEMPLATE', 'GUIDE', 'AGENT_SCRIPT', 'PATH'
+    ]);
+    expect(tokens[0]).toEqual({
+      type: 'SCRIPT',
+      raw: '{SCRIPT:prereq}',
+      alias: 'prereq',
+      position: { start: 4, end: 19 }
+    });
+    expect(tokens[5].path).toBe('.claude/scripts/check.sh');
+    expect(tokensMatchContent(tokens, body)).toBe(true);
+  });
+
+  test('should keep placeholders embedded in a path', () => {
+    const tokens = tokenize('.claude/scripts/run.sh$ARGUMENTS');
+
+    expect(tokens.map((token) => token.type)).toEqual(['PATH', 'ARGUMENTS']);
+    expect(tokens[0].raw).toBe('.claude/scripts/run.sh$ARGUMENTS');
+  });
+
+  test('should split placeholders from de-duplicated inline paths', () => {
+    const { placeholders, inlinePaths } = splitTokens(tokenize(
+      'a .claude/docs/guides/g.md, b .claude/docs/guides/g.md; $ARGUMENTS'
+    ));
+
+    expect(placeholders).toHaveLength(1);
+    expect(inlinePaths).toEqual(['.claude/docs/guides/g.md']);
+  });
+
+  test('should detect stale token positions', () => {
+    const tokens = tokenize('Run {SCRIPT:a}');
+    expect(tokensMatchContent(tokens, 'Now run {SCRIPT:a}')).toBe(false);
+  });
+});
+
+describe('compileReplacer()', () => {
+  test('should prefer the longest key at each position', () => {
+    const replace = compileReplacer({
+      '.claude/scripts/a.sh': '.codex/scripts/a.sh',
+      '.claude/scripts/a.sh.bak': '.codex/scripts/a.sh.bak'
+    });
+
+    expect(replace('x .claude/scripts/a.sh.bak y .claude/scripts/a.sh'))
+      .toBe('x .codex/scripts/a.sh.bak y .codex/scripts/a.sh');
+  });
+
+  test('should return the input unchanged when nothing matches', () => {
+    const content = 'no paths here';
+    expect(compileReplacer({ '.claude/x': '.codex/x' })(content)).toBe(content);
+    expect(compileReplacer({})(content)).toBe(content);
+  });
+});
+
+describe('getPathRewriter()', () => {
+  test('should reuse the compiled rewriter for the same pathMap', () => {
+    const pathMap = { '.claude/scripts/a.sh': '.qwen/scripts/a.sh' };
+
+    expect(getPathRewriter(pathMap, '{{args}}')).toBe(getPathRewriter(pathMap, '{{args}}'));
+    expect(getPathRewriter(pathMap)).not.toBe(getPathRewriter(pathMap, '{{args}}'));
+  });
+
+  test('should map arguments and paths in one pass', () => {
+    const rewrite = getPathRewriter({ '.claude/scripts/a.sh': '.qwen/scripts/a.sh' }, '{{args}}');
+    expect(rewrite('bash .claude/scripts/a.sh $ARGUMENTS')).toBe('bash .qwen/scripts/a.sh {{args}}');
+  });
+});
+
+describe('transformForPlatform() token reuse', () => {
+  const frontmatter = {
+    name: 'cc-plan',
+    description: 'Plan',
+    scripts: { prereq: '.claude/scripts/check.sh' },
+    templates: { plan: '.claude/docs/templates/PLAN.md' },
+    agent_scripts: { sh: '.claude/scripts/update.sh __AGENT__' }
+  };
+  const pathMap = {
+    '.claude/scripts/check.sh': '.agent/scripts/check.sh',
+    '.claude/scripts/update.sh': '.agent/scripts/update.sh',
+    '.claude/docs/templates/PLAN.md': '.agent/docs/templates/PLAN.md'
+  };
+  const body = 'bash   {SCRIPT:prereq} $ARGUMENTS\n{TEMPLATE:plan}\n{AGENT_SCRIPT}\n';
+
+  test('should match a fresh scan when reusing parser tokens', () => {
+    const { placeholders, inlinePaths } = splitTokens(tokenize(body));
+    const parsed = { frontmatter, body, placeholders, inlinePaths };
+    const unscanned = { frontmatter, body, placeholders: [] };
+
+    const reused = transformForPlatform(parsed, 'antigravity', { pathMap }).body;
+    const rescanned = transformForPlatform(unscanned, 'antigravity', { pathMap }).body;
+
+    expect(reused).toBe(rescanned);
+    expect(reused).toBe(
+      'bash .agent/scripts/check.sh [arguments]\n.agent/docs/templates/PLAN.md\n'
+      + '.agent/scripts/update.sh antigravity\n'
+    );
+  });
+
+  test('should rescan when parser tokens no longer match the body', () => {
+    const { placeholders } = splitTokens(tokenize(body));
+    const edited = { frontmatter, body: `Intro\n${body}`, placeholders, inlinePaths: [] };
+
+    expect(transformForPlatform(edited, 'codex', { pathMap }).body)
+      .toContain('bash .agent/scripts/check.sh $ARGUMENTS');
+  });
+});
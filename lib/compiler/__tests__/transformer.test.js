@@ -206,77 +206,88 @@ describe('Transformer Module', () => {
   });
 
   // ----------------------------------------------------------
-  // expandScriptPlaceholders() tests
+  // {SCRIPT:alias} expansion tests
   // ----------------------------------------------------------
-  describe('expandScriptPlaceholders()', () => {
+  describe('SCRIPT placeholder expansion', () => {
+    const expand = (body, scripts) => transformer.transformForPlatform(
+      { body, frontmatter: { scripts } },
+      'codex'
+    ).body;
+
     it('should expand {SCRIPT:alias} to bash path', () => {
-      const scripts = { prereq: '.claude/scripts/prereq.sh' };
-      const result = transformer.expandScriptPlaceholders('Run {SCRIPT:prereq}', scripts);
+      const result = expand('Run {SCRIPT:prereq}', { prereq: '.claude/scripts/prereq.sh' });
       expect(result).toBe('Run bash .claude/scripts/prereq.sh');
     });
 
     it('should handle multiple placeholders', () => {
-      const scripts = { a: 'path/a.sh', b: 'path/b.sh' };
-      const result = transformer.expandScriptPlaceholders('{SCRIPT:a} then {SCRIPT:b}', scripts);
+      const result = expand('{SCRIPT:a} then {SCRIPT:b}', { a: 'path/a.sh', b: 'path/b.sh' });
       expect(result).toBe('bash path/a.sh then bash path/b.sh');
     });
 
+    it('should not duplicate an existing bash prefix', () => {
+      const result = expand('bash {SCRIPT:a}', { a: 'path/a.sh' });
+      expect(result).toBe('bash path/a.sh');
+    });
+
     it('should handle content without placeholders', () => {
-      const result = transformer.expandScriptPlaceholders('No placeholders here', {});
+      const result = expand('No placeholders here', {});
       expect(result).toBe('No placeholders here');
     });
   });
 
   // ----------------------------------------------------------
-  // expandAgentScript() tests
+  // {AGENT_SCRIPT} expansion tests
   // ----------------------------------------------------------
-  describe('expandAgentScript()', () => {
+  describe('AGENT_SCRIPT placeholder expansion', () => {
+    const expand = (body, agentScripts, platform) => transformer.transformForPlatform(
+      { body, frontmatter: { agent_scripts: agentScripts } },
+      platform
+    ).body;
+
     it('should expand {AGENT_SCRIPT} with sh content', () => {
-      const agentScripts = { sh: 'echo "test"' };
-      const result = transformer.expandAgentScript('Run: {AGENT_SCRIPT}', agentScripts, 'codex');
+      const result = expand('Run: {AGENT_SCRIPT}', { sh: 'echo "test"' }, 'codex');
       expect(result).toContain('echo "test"');
       expect(result).not.toContain('{AGENT_SCRIPT}');
     });
 
     it('should replace __AGENT__ marker', () => {
-      const agentScripts = { sh: 'platform=__AGENT__' };
-      const result = transformer.expandAgentScript('{AGENT_SCRIPT}', agentScripts, 'qwen');
+      const result = expand('{AGENT_SCRIPT}', { sh: 'platform=__AGENT__' }, 'qwen');
       expect(result).toContain('platform=qwen');
     });
 
     it('should handle missing agent_scripts gracefully', () => {
-      const result = transformer.expandAgentScript('{AGENT_SCRIPT}', undefined, 'codex');
+      const result = expand('{AGENT_SCRIPT}', undefined, 'codex');
       expect(result).toBe('{AGENT_SCRIPT}');
     });
   });
 
   // ----------------------------------------------------------
-  // mapArguments() tests
+  // $ARGUMENTS mapping tests
   // ----------------------------------------------------------
-  describe('mapArguments()', () => {
+  describe('$ARGUMENTS mapping', () => {
+    const map = (body, platform) => transformer.transformForPlatform(
+      { body, frontmatter: {} },
+      platform
+    ).body;
+
     it('should keep $ARGUMENTS for codex', () => {
-      const result = transformer.mapArguments('Input: $ARGUMENTS', 'codex');
-      expect(result).toBe('Input: $ARGUMENTS');
+      expect(map('Input: $ARGUMENTS', 'codex')).toBe('Input: $ARGUMENTS');
     });
 
     it('should keep $ARGUMENTS for cursor', () => {
-      const result = transformer.mapArguments('Input: $ARGUMENTS', 'cursor');
-      expect(result).toBe('Input: $ARGUMENTS');
+      expect(map('Input: $ARGUMENTS', 'cursor')).toBe('Input: $ARGUMENTS');
     });
 
     it('should map to {{args}} for qwen', () => {
-      const result = transformer.mapArguments('Input: $ARGUMENTS', 'qwen');
-      expect(result).toBe('Input: {{args}}');
+      expect(map('Input: $ARGUMENTS', 'qwen')).toBe('Input: {{args}}');
     });
 
     it('should map to [arguments] for antigravity', () => {
-      const result = transformer.mapArguments('Input: $ARGUMENTS', 'antigravity');
-      expect(result).toBe('Input: [arguments]');
+      expect(map('Input: $ARGUMENTS', 'antigravity')).toBe('Input: [arguments]');
     });
 
     it('should handle multiple $ARGUMENTS occurrences', () => {
-      const result = transformer.mapArguments('$ARGUMENTS and $ARGUMENTS again', 'qwen');
-      expect(result).toBe('{{args}} and {{args}} again');
+      expect(map('$ARGUMENTS and $ARGUMENTS again', 'qwen')).toBe('{{args}} and {{args}} again');
     });
   });
 });
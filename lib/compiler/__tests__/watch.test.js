@@ -0,0 +1,174 @@
+/**
+ * Watch Mode Tests
+ *
+ * 测试 adapt --watch 的增量重建:
+ * 1. 反向依赖图覆盖 frontmatter 资源、agent_scripts、内联路径与 skill reads
+ * 2. 变更路径映射到受影响的命令 / 资源 / skill / registry
+ * 3. 资源变更只重编译引用它的命令，并刷新 transformer 文件缓存
+ * 4. 删除命令源时清理其产物与 manifest 条目；--no-cache 不写盘缓存
+ */
+
+const path = require('path');
+const fs = require('fs');
+const os = require('os');
+
+const { buildDependencyGraph, classifyChanges, createWatchSession } = require('../watch.js');
+
+function writeFile(filePath, content) {
+  fs.mkdirSync(path.dirname(filePath), { recursive: true });
+  fs.writeFileSync(filePath, content);
+}
+
+describe('Watch Mode', () => {
+  let tmpDir;
+  let previousCwd;
+
+  beforeEach(() => {
+    previousCwd = process.cwd();
+    tmpDir = fs.realpathSync(fs.mkdtempSync(path.join(os.tmpdir(), 'cc-devflow-watch-')));
+    process.chdir(tmpDir);
+  });
+
+  afterEach(() => {
+    process.chdir(previousCwd);
+    fs.rmSync(tmpDir, { recursive: true, force: true });
+  });
+
+  describe('buildDependencyGraph()', () => {
+    test('should map resources and skill reads to their dependents', () => {
+      const commandPath = path.join(tmpDir, '.claude/commands/cc-plan.md');
+      const irs = [{
+        source: { path: commandPath },
+        frontmatter: {
+          scripts: { prereq: '.claude/scripts/check.sh' },
+          templates: { plan: '.claude/docs/templates/PLAN.md' },
+          agent_scripts: { sh: '.claude/scripts/update.sh __AGENT__' }
+        },
+        inlinePaths: ['.claude/docs/guides/style.md']
+      }];
+      const registry = {
+        skills: [{ name: 'cc-dev', reads: ['.claude/docs/guides/style.md', '.claude/skills/cc-dev/refs.md'] }]
+      };
+
+      const graph = buildDependencyGraph(irs, registry, '.claude/skills');
+      const dependents = (relativePath) => Array.from(graph.get(path.join(tmpDir, relativePath)) || []);
+
+      expect(dependents('.claude/scripts/check.sh')).toEqual([`command:${commandPath}`]);
+      expect(dependents('.claude/scripts/update.sh')).toEqual([`command:${commandPath}`]);
+      expect(dependents('.claude/docs/templates/PLAN.md')).toEqual([`command:${commandPath}`]);
+      expect(dependents('.claude/docs/guides/style.md')).toEqual([`command:${commandPath}`, 'skill:cc-dev']);
+      // skill 目录内的 reads 由路径前缀归属，不单独登记
+      expect(dependents('.claude/skills/cc-dev/refs.md')).toEqual([]);
+    });
+  });
+
+  describe('classifyChanges()', () => {
+    const layout = () => ({
+      commandsDir: path.join(tmpDir, '.claude/commands'),
+      skillsDir: path.join(tmpDir, '.claude/skills'),
+      resourceDirs: [path.join(tmpDir, '.claude/scripts')]
+    });
+
+    test('should route skill files and skill-rules.json to the registry', () => {
+      const affected = classifyChanges([
+        path.join(tmpDir, '.claude/skills/cc-dev/SKILL.md'),
+        path.join(tmpDir, '.claude/skills/_shared/notes.md')
+      ], new Map(), layout());
+
+      expect(Array.from(affected.skills)).toEqual(['cc-dev']);
+      expect(affected.registry).toBe(true);
+      expect(affected.rules).toBe(false);
+
+      const rulesChange = classifyChanges(
+        [path.join(tmpDir, '.claude/skills/skill-rules.json')],
+        new Map(),
+        layout()
+      );
+      expect(rulesChange.registry).toBe(true);
+      expect(rulesChange.rules).toBe(true);
+      expect(rulesChange.skills.size).toBe(0);
+    });
+
+    test('should route resources to dependent commands only', () => {
+      const commandPath = path.join(tmpDir, '.claude/commands/cc-plan.md');
+      const scriptPath = path.join(tmpDir, '.claude/scripts/check.sh');
+      const graph = new Map([[scriptPath, new Set([`command:${commandPath}`])]]);
+
+      const affected = classifyChanges([scriptPath], graph, layout());
+
+      expect(Array.from(affected.commands)).toEqual([commandPath]);
+      expect(Array.from(affected.resources)).toEqual(['.claude/scripts/check.sh']);
+      expect(affected.registry).toBe(false);
+    });
+  });
+
+  describe('createWatchSession()', () => {
+    test('should rebuild only commands that depend on a changed template', async () => {
+      writeFile('.claude/docs/templates/PLAN.md', 'Plan v1\n');
+      writeFile('.claude/commands/cc-plan.md', [
+        '---',
+        'name: cc-plan',
+        'description: Plan',
+        'templates:',
+        '  plan: .claude/docs/templates/PLAN.md',
+        '---',
+        'Use {TEMPLATE:plan}',
+        ''
+      ].join('\n'));
+      writeFile('.claude/commands/cc-other.md', [
+        '---',
+        'name: cc-other',
+        'description: Other',
+        '---',
+        'Nothing to inline',
+        ''
+      ].join('\n'));
+
+      const session = await createWatchSession({ platforms: ['cursor'], rules: false });
+      expect(session.initial.filesCompiled).toBe(2);
+
+      const templatePath = path.join(tmpDir, '.claude/docs/templates/PLAN.md');
+      writeFile(templatePath, 'Plan v2, longer\n');
+      const summary = await session.rebuild([templatePath]);
+
+      expect(summary.errors).toEqual([]);
+      expect(summary.compiled).toBe(1);
+      expect(summary.resourcesCopied).toBe(1);
+      expect(fs.readFileSync('.cursor/docs/templates/PLAN.md', 'utf8')).toBe('Plan v2, longer\n');
+    });
+
+    test('should prune outputs and manifest entries of deleted commands', async () => {
+      writeFile('.claude/commands/cc-plan.md', '---\nname: cc-plan\ndescription: Plan\n---\nPlan\n');
+      writeFile('.claude/commands/cc-other.md', '---\nname: cc-other\ndescription: Other\n---\nOther\n');
+
+      const session = await createWatchSession({ platforms: ['cursor'], rules: false });
+      const manifestPath = path.join(tmpDir, 'devflow/.generated/manifest.json');
+      const readSources = () => JSON.parse(fs.readFileSync(manifestPath, 'utf8')).entries
+        .map((entry) => entry.source);
+      const otherOutputs = readSources().filter((source) => source.endsWith('cc-other.md'));
+      expect(otherOutputs.length).toBe(1);
+
+      const commandPath = path.join(tmpDir, '.claude/commands/cc-other.md');
+      fs.rmSync(commandPath);
+      const summary = await session.rebuild([commandPath]);
+
+      expect(summary.errors).toEqual([]);
+      expect(summary.removed).toBe(1);
+      expect(fs.existsSync('.cursor/commands/cc-other.md')).toBe(false);
+      expect(fs.existsSync('.cursor/commands/cc-plan.md')).toBe(true);
+      expect(readSources().filter((source) => source.endsWith('cc-other.md'))).toEqual([]);
+    });
+
+    test('should keep caches in memory when cache is disabled', async () => {
+      writeFile('.claude/commands/cc-plan.md', '---\nname: cc-plan\ndescription: Plan\n---\nPlan\n');
+
+      const session = await createWatchSession({ platforms: ['cursor'], rules: false, cache: false });
+      const commandPath = path.join(tmpDir, '.claude/commands/cc-plan.md');
+      writeFile(commandPath, '---\nname: cc-plan\ndescription: Plan\n---\nPlan v2\n');
+      const summary = await session.rebuild([commandPath]);
+
+      expect(summary.compiled).toBe(1);
+      expect(fs.existsSync(path.join(tmpDir, 'devflow/.generated/parse-cache.json'))).toBe(false);
+    });
+  });
+});
@@ -59,12 +59,15 @@ class BaseEmitter {
     // ✅ SECURITY FIX (FINDING-005): Set explicit file permissions
     await fs.promises.writeFile(filePath, content, { encoding: 'utf8', mode: 0o644 });
 
-    // 计算哈希
+    // 计算哈希，并记录 size/mtime 供漂移检测 stat 短路
     const hash = crypto.createHash('sha256').update(content).digest('hex');
+    const stats = await fs.promises.stat(filePath);
 
     return {
       path: filePath,
       hash,
+      size: stats.size,
+      mtimeMs: stats.mtimeMs,
       timestamp: new Date().toISOString()
     };
   }
@@ -0,0 +1,388 @@
+/**
+ * File Mirror Engine
+ *
+ * 避免重复读写的文件镜像:
+ * - stat 快速路径: 源/目标的 size + mtime 与持久化记录一致时直接跳过，不读字节
+ * - 改写内容可延迟生成: 快速路径命中时不读取源文件、不执行改写；
+ *   改写依赖的外部输入（探测路径是否存在、cwd）记录为签名，变化时不走快速路径
+ * - 大小不同直接判定需要复制；大小相同才做流式哈希比较
+ * - 大文件使用流式哈希，避免整文件读入内存
+ * - 复制优先尝试 copy-on-write 克隆 (COPYFILE_FICLONE)，不支持时自动退回普通复制
+ * - linkMode = 'hardlink' 时对逐字节相同的文件建立硬链接（需显式开启）
+ *
+ * 记录文件: devflow/.generated/mirror-state.json
+ */
+const fs = require('fs');
+const path = require('path');
+const crypto = require('crypto');
+
+const { RACY_WINDOW_MS, hashContent } = require('./parse-cache.js');
+
+const MIRROR_STATE_PATH = 'devflow/.generated/mirror-state.json';
+const MIRROR_STATE_VERSION = '1.0';
+const LINK_MODES = ['copy', 'hardlink'];
+
+// 超过该大小的文件改用流式哈希
+const STREAM_HASH_THRESHOLD = 1024 * 1024;
+
+// ============================================================
+// hashFileStreaming - 计算文件哈希，大文件流式读取；失败返回 null
+// ============================================================
+async function hashFileStreaming(filePath, size = null) {
+  try {
+    const fileSize = size === null ? (await fs.promises.stat(filePath)).size : size;
+
+    if (fileSize < STREAM_HASH_THRESHOLD) {
+      return hashContent(await fs.promises.readFile(filePath));
+    }
+
+    return await new Promise((resolve, reject) => {
+      const hash = crypto.createHash('sha256');
+      fs.createReadStream(filePath)
+        .on('error', reject)
+        .on('data', (chunk) => hash.update(chunk))
+        .on('end', () => resolve(hash.digest('hex')));
+    });
+  } catch {
+    return null;
+  }
+}
+
+async function statOrNull(filePath) {
+  try {
+    return await fs.promises.stat(filePath);
+  } catch (error) {
+    if (error.code === 'ENOENT' || error.code === 'ENOTDIR') {
+      return null;
+    }
+    throw error;
+  }
+}
+
+function toStateKey(targetPath) {
+  return path.relative(process.cwd(), path.resolve(targetPath)).split(path.sep).join('/');
+}
+
+// ============================================================
+// normalizeLinkMode - 校验 linkMode 参数
+// ============================================================
+function normalizeLinkMode(linkMode = 'copy') {
+  if (!LINK_MODES.includes(linkMode)) {
+    throw new Error(`Invalid link mode: ${linkMode}. Use one of: ${LINK_MODES.join(', ')}`);
+  }
+  return linkMode;
+}
+
+// ============================================================
+// createMirrorState - 创建空记录
+// ============================================================
+function createMirrorState() {
+  return {
+    version: MIRROR_STATE_VERSION,
+    cwd: process.cwd(),
+    files: {},
+    seen: new Set(),
+    dirty: false
+  };
+}
+
+// ============================================================
+// loadMirrorState - 加载记录，版本或目录不匹配时返回空记录
+// ============================================================
+async function loadMirrorState(statePath = MIRROR_STATE_PATH) {
+  const state = createMirrorState();
+
+  let stored;
+  try {
+    stored = JSON.parse(await fs.promises.readFile(statePath, 'utf8'));
+  } catch {
+    // 缺失或损坏的记录等同于冷启动
+    return state;
+  }
+
+  if (
+    !stored ||
+    stored.version !== state.version ||
+    stored.cwd !== state.cwd ||
+    !stored.files ||
+    typeof stored.files !== 'object'
+  ) {
+    state.dirty = true;
+    return state;
+  }
+
+  state.files = stored.files;
+  return state;
+}
+
+// ============================================================
+// saveMirrorState - 保存记录，清理目标已不存在的未访问条目
+// ============================================================
+async function saveMirrorState(state, statePath = MIRROR_STATE_PATH) {
+  if (!state) {
+    return false;
+  }
+
+  for (const key of Object.keys(state.files)) {
+    if (!state.seen.has(key) && !fs.existsSync(path.resolve(key))) {
+      delete state.files[key];
+      state.dirty = true;
+    }
+  }
+
+  if (!state.dirty) {
+    return false;
+  }
+
+  const payload = {
+    version: state.version,
+    cwd: state.cwd,
+    files: state.files
+  };
+
+  await fs.promises.mkdir(path.dirname(statePath), { recursive: true });
+  const tempPath = `${statePath}.${process.pid}.tmp`;
+  await fs.promises.writeFile(tempPath, JSON.stringify(payload), 'utf8');
+  await fs.promises.rename(tempPath, statePath);
+  state.dirty = false;
+  return true;
+}
+
+// ============================================================
+// forgetMirrorTarget - 目标被删除时移除记录
+// ============================================================
+function forgetMirrorTarget(state, targetPath) {
+  if (!state) {
+    return;
+  }
+
+  const prefix = toStateKey(targetPath);
+  for (const key of Object.keys(state.files)) {
+    if (key === prefix || key.startsWith(`${prefix}/`)) {
+      delete state.files[key];
+      state.dirty = true;
+    }
+  }
+}
+
+function statMatches(record, sourceStat, targetStat) {
+  return (
+    record.sourceSize === sourceStat.size &&
+    record.sourceMtimeMs === sourceStat.mtimeMs &&
+    record.targetSize === targetStat.size &&
+    record.targetMtimeMs === targetStat.mtimeMs
+  );
+}
+
+// 延迟改写的结果除源文件外还取决于 probes 的存在性与 cwd
+function createRewriteSignature(probes) {
+  return {
+    cwd: process.cwd(),
+    probes: (probes || []).map((probe) => ({ path: probe.path, exists: Boolean(probe.exists) }))
+  };
+}
+
+function rewriteInputsUnchanged(signature) {
+  return Boolean(signature) &&
+    signature.cwd === process.cwd() &&
+    Array.isArray(signature.probes) &&
+    signature.probes.every((probe) => fs.existsSync(probe.path) === probe.exists);
+}
+
+function recordMirror(state, key, sourceStat, targetStat, hash, rewrite = null) {
+  if (!state) {
+    return;
+  }
+
+  const now = Date.now();
+  const racy = now - sourceStat.mtimeMs < RACY_WINDOW_MS || now - targetStat.mtimeMs < RACY_WINDOW_MS;
+  const previous = state.files[key];
+  const next = {
+    sourceSize: sourceStat.size,
+    sourceMtimeMs: sourceStat.mtimeMs,
+    targetSize: targetStat.size,
+    targetMtimeMs: targetStat.mtimeMs,
+    hash: hash || null,
+    racy
+  };
+  if (rewrite) {
+    next.rewrite = rewrite;
+  }
+
+  if (
+    previous &&
+    statMatches(previous, sourceStat, targetStat) &&
+    previous.hash === next.hash &&
+    previous.racy === racy &&
+    JSON.stringify(previous.rewrite || null) === JSON.stringify(next.rewrite || null)
+  ) {
+    return;
+  }
+
+  state.files[key] = next;
+  state.dirty = true;
+}
+
+// ============================================================
+// writeMirrorTarget - 写出目标文件（内容 / 克隆 / 硬链接）
+// 返回是否建立了硬链接
+// ============================================================
+async function writeMirrorTarget(sourcePath, targetPath, options = {}) {
+  const { content = null, linkMode = 'copy', targetExists = false } = options;
+
+  await fs.promises.mkdir(path.dirname(targetPath), { recursive: true, mode: 0o755 });
+
+  if (content !== null) {
+    if (targetExists) {
+      // 目标可能是指向源文件的硬链接，先断开再写，避免改写源文件
+      await fs.promises.rm(targetPath, { force: true });
+    }
+    await fs.promises.writeFile(targetPath, content, 'utf8');
+    return false;
+  }
+
+  if (linkMode === 'hardlink') {
+    if (targetExists) {
+      await fs.promises.rm(targetPath, { force: true });
+    }
+    try {
+      await fs.promises.link(sourcePath, targetPath);
+      return true;
+    } catch (error) {
+      // 跨设备或文件系统不支持硬链接时退回复制
+      if (!['EXDEV', 'EPERM', 'EMLINK', 'ENOTSUP', 'EOPNOTSUPP'].includes(error.code)) {
+        throw error;
+      }
+    }
+  } else if (targetExists) {
+    // 目标可能是早先 hardlink 模式建立的链接；复制前断开，避免写穿到源文件
+    await fs.promises.rm(targetPath, { force: true });
+  }
+
+  await fs.promises.copyFile(sourcePath, targetPath, fs.constants.COPYFILE_FICLONE);
+  return false;
+}
+
+// ============================================================
+// mirrorFile - 将单个文件同步到目标路径
+// options:
+//   state     - loadMirrorState() 返回的记录（可为 null，仅用 size 快速判定）
+//   content   - 目标期望内容（源文件需要改写时传入，否则逐字节复制）；
+//               也可传 async () => { content, probes }，仅在 stat 快速路径未命中或
+//               probes（改写时探测过的路径及其存在性）/ cwd 变化时调用
+//   mode      - 目标权限；未传时沿用源文件权限
+//   linkMode  - 'copy'（默认，优先 COPYFILE_FICLONE）或 'hardlink'
+//   force     - 跳过比较直接写入
+//   dryRun    - 只判定，不写入
+// 返回 { status: 'created' | 'updated' | 'unchanged', hash }
+// ============================================================
+async function mirrorFile(sourcePath, targetPath, options = {}) {
+  const {
+    state = null,
+    mode = null,
+    force = false,
+    dryRun = false
+  } = options;
+  const linkMode = normalizeLinkMode(options.linkMode);
+  const key = toStateKey(targetPath);
+
+  if (state) {
+    state.seen.add(key);
+  }
+
+  const sourceStat = await fs.promises.stat(sourcePath);
+  const targetStat = await statOrNull(targetPath);
+
+  const contentOption = options.content === undefined ? null : options.content;
+  const rewrites = contentOption !== null;
+  const lazy = typeof contentOption === 'function';
+  let content = lazy ? null : contentOption;
+  let expectedHash = content !== null ? hashContent(content) : null;
+  let rewrite = null;
+
+  // 延迟生成的改写内容只在需要比较或写入时求值一次
+  async function resolveContent() {
+    if (lazy && content === null) {
+      const generated = await contentOption();
+      content = generated.content;
+      expectedHash = hashContent(content);
+      rewrite = createRewriteSignature(generated.probes);
+    }
+  }
+
+  const sameInode = Boolean(targetStat) &&
+    sourceStat.ino === targetStat.ino &&
+    sourceStat.dev === targetStat.dev;
+  // hardlink 模式只需确认目标已链接到源文件；copy 模式必须断开遗留的链接
+  const needsRelink = !rewrites && (linkMode === 'hardlink' ? !sameInode : sameInode);
+
+  if (targetStat && !force && !needsRelink) {
+    // 1. 硬链接到同一 inode：内容必然一致
+    if (!rewrites && sameInode) {
+      return { status: 'unchanged', hash: null };
+    }
+
+    // 2. stat 快速路径：与上次同步后的 size + mtime 一致
+    //    延迟改写还要求改写输入签名（probes + cwd）未变
+    const record = state ? state.files[key] : null;
+    if (
+      record &&
+      !record.racy &&
+      statMatches(record, sourceStat, targetStat) &&
+      (!rewrites || (lazy
+        ? Boolean(record.hash) && rewriteInputsUnchanged(record.rewrite)
+        : record.hash === expectedHash))
+    ) {
+      return { status: 'unchanged', hash: record.hash };
+    }
+
+    // 3. 大小相同才需要比较内容
+    await resolveContent();
+    const expectedSize = content !== null ? Buffer.byteLength(content, 'utf8') : sourceStat.size;
+    if (targetStat.size === expectedSize) {
+      const [sourceHash, targetHash] = await Promise.all([
+        expectedHash || hashFileStreaming(sourcePath, sourceStat.size),
+        hashFileStreaming(targetPath, targetStat.size)
+      ]);
+
+      if (sourceHash && sourceHash === targetHash) {
+        recordMirror(state, key, sourceStat, targetStat, targetHash, rewrite);
+        return { status: 'unchanged', hash: targetHash };
+      }
+    }
+  }
+
+  await resolveContent();
+  const status = targetStat ? 'updated' : 'created';
+  if (dryRun) {
+    return { status, hash: expectedHash };
+  }
+
+  const linked = await writeMirrorTarget(sourcePath, targetPath, {
+    content,
+    linkMode,
+    targetExists: Boolean(targetStat)
+  });
+
+  // 硬链接与源文件共享 inode，改权限会同时改动源文件
+  if (!linked) {
+    await fs.promises.chmod(targetPath, mode === null ? sourceStat.mode & 0o777 : mode);
+  }
+
+  recordMirror(state, key, sourceStat, await fs.promises.stat(targetPath), expectedHash, rewrite);
+  return { status, hash: expectedHash };
+}
+
+module.exports = {
+  MIRROR_STATE_PATH,
+  MIRROR_STATE_VERSION,
+  LINK_MODES,
+  STREAM_HASH_THRESHOLD,
+  hashFileStreaming,
+  normalizeLinkMode,
+  createMirrorState,
+  loadMirrorState,
+  saveMirrorState,
+  forgetMirrorTarget,
+  mirrorFile
+};
@@ -6,6 +6,10 @@
  * - 协调 parser, transformer, emitters, manifest
  * - 复制资源文件并重写路径
  * - 生成 skills-registry.json 和规则入口文件
+ * - 通过 parse cache 跳过未变更的 SKILL.md / 命令文件
+ * - jobs > 1 时并发执行各平台写入（pipeline.js），manifest 按任务顺序合并
+ * - 资源/skill 镜像通过 mirror-state 记录走 stat 快速路径（file-mirror.js）
+ * - timings: true 时在 result.timings 中返回各阶段耗时（毫秒）
  *
  * v2.0 (REQ-006): 支持 --rules, --skills 参数
  */
@@ -13,17 +17,16 @@ const fs = require('fs');
 const path = require('path');
 
 const { parseAllPromptFiles } = require('./parser.js');
-const { transformForPlatform } = require('./transformer.js');
-const { getEmitter, getAllEmitters, PLATFORMS } = require('./emitters/index.js');
+const { runCompileTasks, normalizeJobs } = require('./pipeline.js');
+const { PLATFORMS } = require('./emitters/index.js');
 const {
   loadManifest,
   saveManifest,
   needsRecompile,
-  addEntry,
-  createEntry,
+  setEntries,
+  removeOrphanedTargets,
   createManifest,
-  hashContent,
-  migrateToV2,
+  migrateToV3,
   replaceSkillEntries,
   addRulesEntry,
   needsSkillRecompile,
@@ -37,6 +40,18 @@ const {
   mirrorSkillDirectoriesForPlatform
 } = require('./resource-copier.js');
 const { generateSkillsRegistryV2, writeSkillsRegistry } = require('./skills-registry.js');
+const {
+  loadParseCache,
+  saveParseCache,
+  getSkillEntryHash,
+  PARSE_CACHE_PATH
+} = require('./parse-cache.js');
+const {
+  loadMirrorState,
+  saveMirrorState,
+  normalizeLinkMode,
+  MIRROR_STATE_PATH
+} = require('./file-mirror.js');
 const { getRulesEmitter, emitAllRules } = require('./rules-emitters/index.js');
 const DISTRIBUTION_CONFIG = require('../../config/distributable-skills.json');
 
@@ -51,6 +66,54 @@ function getDistributedCodexSkillNames(registry) {
     .filter((skillName) => DISTRIBUTED_SKILLS.has(skillName));
 }
 
+// ============================================================
+// buildSkillManifestEntries - registry → manifest 技能记录
+// repoRoot: registry 中 skillPath 的相对基准
+// ============================================================
+function buildSkillManifestEntries(registry, parseCache, repoRoot) {
+  return registry.skills.map((skill) => ({
+    name: skill.name,
+    sourceHash: getSkillEntryHash(parseCache, skill, repoRoot),
+    timestamp: new Date().toISOString()
+  }));
+}
+
+// ============================================================
+// summarizeCommands - 规则入口文件使用的命令摘要
+// ============================================================
+function summarizeCommands(promptIrs) {
+  return promptIrs.map(ir => ({
+    name: ir.source.filename.replace(/\.md$/, ''),
+    description: ir.frontmatter?.description || ''
+  }));
+}
+
+// ============================================================
+// createPhaseTimer - 可选的阶段计时，每次 mark 记录距上次 mark 的耗时
+// ============================================================
+function createPhaseTimer(enabled) {
+  const startedAt = process.hrtime.bigint();
+  let lastMark = startedAt;
+  const phases = {};
+
+  return {
+    mark(phase) {
+      if (!enabled) {
+        return;
+      }
+      const now = process.hrtime.bigint();
+      phases[phase] = (phases[phase] || 0) + Number(now - lastMark) / 1e6;
+      lastMark = now;
+    },
+    attach(result) {
+      if (enabled) {
+        result.timings = { ...phases, total: Number(process.hrtime.bigint() - startedAt) / 1e6 };
+      }
+      return result;
+    }
+  };
+}
+
 async function saveManagedCodexSkills(skillNames) {
   const managedPath = path.resolve(CODEX_MANAGED_SKILLS_PATH);
   await fs.promises.mkdir(path.dirname(managedPath), { recursive: true, mode: 0o755 });
@@ -75,8 +138,16 @@ async function compile(options = {}) {
     verbose = false,
     check = false,
     rules = true,
-    skills = true
+    skills = true,
+    cache = true,
+    jobs = 1,
+    workers = 'auto',
+    linkMode = 'copy',
+    timings = false
   } = options;
+  const timer = createPhaseTimer(timings);
+  // registry 的 skillPath 相对于编译开始时的仓库根，后续查缓存都以它为基准
+  const repoRoot = process.cwd();
   const effectivePromptsDir = promptsDir || commandsDir || sourceDir || '.claude/commands/';
 
   // 验证平台参数
@@ -85,12 +156,15 @@ async function compile(options = {}) {
       throw new Error(`Unknown platform: ${platform}`);
     }
   }
+  const concurrency = normalizeJobs(jobs);
+  normalizeLinkMode(linkMode);
 
   const result = {
     success: true,
     platforms: platforms,
     filesCompiled: 0,
     filesSkipped: 0,
+    filesRemoved: 0,
     resourcesCopied: 0,
     resourcesSkipped: 0,
     rulesGenerated: 0,
@@ -98,41 +172,46 @@ async function compile(options = {}) {
     errors: []
   };
 
-  // 加载 manifest 并迁移到 v2.0
+  // 加载 manifest 并迁移到 v3.0
   const manifestPath = path.join(outputBaseDir, MANIFEST_PATH);
   let manifest = await loadManifest(manifestPath);
-  manifest = migrateToV2(manifest);
+  manifest = migrateToV3(manifest);
+  timer.mark('manifestLoad');
 
   // 如果是 check 模式，只做漂移检测
   if (check) {
     const { checkDrift } = require('./manifest.js');
-    const drift = await checkDrift(manifest);
-    return {
+    const checkStats = { statHits: 0, hashed: 0, refreshed: 0 };
+    const drift = await checkDrift(manifest, { stats: checkStats });
+    // 只回写内容已验证一致的条目的 stat 记录，不改变任何哈希
+    if (checkStats.refreshed > 0) {
+      await saveManifest(manifest, manifestPath);
+    }
+    timer.mark('check');
+    return timer.attach({
       ...result,
       check: true,
+      checkStats,
       drift,
       success: drift.length === 0
-    };
+    });
   }
 
+  // 加载解析缓存
+  const parseCachePath = path.join(outputBaseDir, PARSE_CACHE_PATH);
+  const parseCache = cache ? await loadParseCache(parseCachePath) : null;
+  timer.mark('cacheLoad');
+
   // 生成 skills registry
   let registry = null;
   if (skills) {
     try {
-      registry = await generateSkillsRegistryV2(skillsDir);
+      registry = await generateSkillsRegistryV2(skillsDir, { cache: parseCache });
       await writeSkillsRegistry(registry);
       result.skillsRegistered = registry.skills.length;
 
       // 用当前 registry 替换 manifest 技能记录，删除已移除能力的残留。
-      const skillEntries = registry.skills.map((skill) => {
-        const skillHash = hashContent(JSON.stringify(skill));
-        return {
-          name: skill.name,
-          sourceHash: skillHash,
-          timestamp: new Date().toISOString()
-        };
-      });
-      replaceSkillEntries(manifest, skillEntries);
+      replaceSkillEntries(manifest, buildSkillManifestEntries(registry, parseCache, repoRoot));
 
       if (verbose) {
         console.log(`Generated skills-registry.json with ${registry.skills.length} skills`);
@@ -141,16 +220,30 @@ async function compile(options = {}) {
       result.errors.push(`Skills registry: ${error.message}`);
     }
   }
+  timer.mark('registry');
 
   // 解析可选提示词文件
   const absolutePromptsDir = path.resolve(effectivePromptsDir);
   let promptIrs = [];
+  let parseError = null;
+  try {
+    promptIrs = await parseAllPromptFiles(absolutePromptsDir, { cache: parseCache });
+  } catch (error) {
+    parseError = error;
+  }
+
+  // 持久化解析缓存（即使解析失败，已成功的条目也可复用）
   try {
-    promptIrs = await parseAllPromptFiles(absolutePromptsDir);
+    await saveParseCache(parseCache, parseCachePath);
   } catch (error) {
+    result.errors.push(`Parse cache: ${error.message}`);
+  }
+  timer.mark('parse');
+
+  if (parseError) {
     result.success = false;
-    result.errors.push(error.message);
-    return result;
+    result.errors.push(parseError.message);
+    return timer.attach(result);
   }
 
   if (verbose) {
@@ -164,12 +257,9 @@ async function compile(options = {}) {
   // 生成规则入口文件
   if (rules && registry) {
     try {
-      const commands = promptIrs.map(ir => ({
-        name: ir.source.filename.replace(/\.md$/, ''),
-        description: ir.frontmatter?.description || ''
-      }));
+      const commands = summarizeCommands(promptIrs);
 
-      const rulesResults = await emitAllRules(registry, commands, { platforms });
+      const rulesResults = await emitAllRules(registry, commands, { platforms, concurrency });
 
       for (const ruleResult of rulesResults) {
         if (ruleResult.error) {
@@ -193,15 +283,26 @@ async function compile(options = {}) {
       result.errors.push(`Rules generation: ${error.message}`);
     }
   }
+  timer.mark('rules');
+
+  // 加载镜像记录（--no-cache 时只用 size 快速判定）
+  const mirrorStatePath = path.join(outputBaseDir, MIRROR_STATE_PATH);
+  const mirrorState = cache ? await loadMirrorState(mirrorStatePath) : null;
 
   // 复制资源文件到各平台目录
-  const copyResult = await copyResourcesForAllPlatforms(promptIrs, platforms, { verbose });
+  const copyResult = await copyResourcesForAllPlatforms(promptIrs, platforms, {
+    verbose,
+    concurrency,
+    state: mirrorState,
+    linkMode
+  });
   result.resourcesCopied = copyResult.totalCopied;
   result.resourcesSkipped = copyResult.totalSkipped;
 
   if (verbose && copyResult.totalCopied > 0) {
     console.log(`Copied ${copyResult.totalCopied} resource files (${copyResult.totalSkipped} unchanged)`);
   }
+  timer.mark('resourceCopy');
 
   // Codex 需要独立 skill 目录，而不是只有聚合入口
   if (registry && platforms.includes('codex')) {
@@ -211,7 +312,7 @@ async function compile(options = {}) {
         skillsDir,
         'codex',
         codexSkillNames,
-        { verbose }
+        { verbose, state: mirrorState, linkMode }
       );
       await saveManagedCodexSkills(codexSkillNames);
 
@@ -227,10 +328,18 @@ async function compile(options = {}) {
     }
   }
 
+  try {
+    await saveMirrorState(mirrorState, mirrorStatePath);
+  } catch (error) {
+    result.errors.push(`Mirror state: ${error.message}`);
+  }
+  timer.mark('codexMirror');
+
   // 为每个平台构建路径映射
   const platformPathMaps = copyResult.allPathMaps;
 
-  // 编译每个文件到每个平台
+  // 编译每个文件到每个平台：先按串行顺序筛出需要重编译的任务
+  const tasks = [];
   for (const ir of promptIrs) {
     for (const platform of platforms) {
       // 检查是否需要重新编译
@@ -243,70 +352,60 @@ async function compile(options = {}) {
         continue;
       }
 
-      try {
-        // 获取该平台的路径映射
-        const pathMap = platformPathMaps[platform] || {};
-
-        // 转换（传入 pathMap 以重写路径）
-        const transformed = transformForPlatform(ir, platform, { pathMap });
-
-        // 获取 emitter
-        const emitter = getEmitter(platform);
-
-        // 格式化
-        const formatted = emitter.format(ir, transformed.body);
-
-        // 处理拆分文件（Antigravity 可能返回数组）
-        if (Array.isArray(formatted)) {
-          for (const part of formatted) {
-            const emitResult = await emitter.emit(part.filename, part.content);
+      tasks.push({ ir, platform, sourceRelative });
+    }
+  }
 
-            // 更新 manifest
-            addEntry(manifest, createEntry({
-              source: sourceRelative,
-              target: emitResult.path,
-              sourceHash: ir.source.hash,
-              targetHash: emitResult.hash,
-              platform
-            }));
+  const outcomes = await runCompileTasks(tasks, {
+    jobs: concurrency,
+    pathMaps: platformPathMaps,
+    workers
+  });
 
-            if (verbose) {
-              console.log(`Compiled: ${ir.source.filename} -> ${platform} (${part.filename})`);
-            }
-          }
-        } else {
-          const emitResult = await emitter.emit(ir.source.filename, formatted);
+  // 按任务顺序合并结果，保证 manifest 与串行路径一致
+  const orphaned = [];
+  for (const outcome of outcomes) {
+    const { ir, platform, sourceRelative } = outcome.task;
 
-          // 更新 manifest
-          addEntry(manifest, createEntry({
-            source: sourceRelative,
-            target: emitResult.path,
-            sourceHash: ir.source.hash,
-            targetHash: emitResult.hash,
-            platform
-          }));
+    if (outcome.error) {
+      result.success = false;
+      result.errors.push(`${ir.source.filename} -> ${platform}: ${outcome.error.message}`);
+      continue;
+    }
 
-          if (verbose) {
-            console.log(`Compiled: ${ir.source.filename} -> ${platform}`);
-          }
-        }
+    // 更新 manifest（拆分输出的每个分片都记录在同一 (source, platform) 下）
+    orphaned.push(...setEntries(manifest, sourceRelative, platform, outcome.entries));
+    result.filesCompiled++;
 
-        result.filesCompiled++;
-      } catch (error) {
-        result.success = false;
-        result.errors.push(`${ir.source.filename} -> ${platform}: ${error.message}`);
+    if (verbose) {
+      const partNames = outcome.partNames || [null];
+      for (const partName of partNames) {
+        const suffix = partName ? ` (${partName})` : '';
+        console.log(`Compiled: ${ir.source.filename} -> ${platform}${suffix}`);
       }
     }
   }
 
+  // 拆分分片变少或改名后，旧分片不再被 manifest 跟踪，直接删除
+  result.filesRemoved = await removeOrphanedTargets(orphaned, result.errors);
+
+  timer.mark('transformEmit');
+
   // 保存 manifest
   manifest.generatedAt = new Date().toISOString();
   await saveManifest(manifest, manifestPath);
+  timer.mark('manifestSave');
 
-  return result;
+  return timer.attach(result);
 }
 
 module.exports = {
   compile,
-  PLATFORMS
+  PLATFORMS,
+  // 供 watch.js 增量构建复用
+  CODEX_MANAGED_SKILLS_PATH,
+  buildSkillManifestEntries,
+  summarizeCommands,
+  getDistributedCodexSkillNames,
+  saveManagedCodexSkills
 };
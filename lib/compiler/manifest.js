@@ -1,5 +1,5 @@
 /**
- * T039: Manifest Module (v2.0)
+ * T039: Manifest Module (v3.0)
  *
  * 管理编译清单:
  * - hashContent(): 计算 SHA-256 哈希
@@ -12,32 +12,117 @@
  * - skills: 技能编译记录
  * - rulesEntry: 规则入口文件记录
  * - migrateToV2(): v1.0 → v2.0 迁移
+ *
+ * v3.0 新增:
+ * - 条目同时记录 sourceHash 与 targetHash / targetSize / targetMtimeMs
+ * - (source, platform) 键控索引，needsRecompile / addEntry 为 O(1)
+ * - checkDrift(): stat 短路 + 按需哈希 + 有界并行 I/O
+ * - migrateToV3(): v1/v2 → v3 迁移（旧条目缺少 targetHash，--check 如实报告，下次编译重新生成并补齐）
+ * - setEntries() 返回不再被引用的旧条目，removeOrphanedTargets() 删除其目标文件
  */
 const fs = require('fs');
 const path = require('path');
-const crypto = require('crypto');
+const { DEFAULT_IO_CONCURRENCY, mapWithConcurrency } = require('../concurrency.js');
+// hashContent 由 parse-cache 统一实现，此处沿用既有导出
+const { hashContent, RACY_WINDOW_MS } = require('./parse-cache.js');
 
 const MANIFEST_PATH = 'devflow/.generated/manifest.json';
-const MANIFEST_VERSION = '2.0';
-
-// ============================================================
-// hashContent - 计算 SHA-256 哈希
-// ============================================================
-function hashContent(content) {
-  return crypto.createHash('sha256').update(content).digest('hex');
-}
+const MANIFEST_VERSION = '3.0';
 
 // ============================================================
 // createEntry - 创建 manifest 条目
 // ============================================================
-function createEntry({ source, target, sourceHash, targetHash, platform }) {
-  return {
+function createEntry({
+  source,
+  target,
+  sourceHash,
+  targetHash,
+  targetSize,
+  targetMtimeMs,
+  platform
+}) {
+  const entry = {
     source,
     target,
-    hash: sourceHash,
-    timestamp: new Date().toISOString(),
-    platform
+    platform,
+    sourceHash,
+    targetHash,
+    timestamp: new Date().toISOString()
   };
+
+  if (typeof targetSize === 'number') {
+    entry.targetSize = targetSize;
+  }
+
+  if (typeof targetMtimeMs === 'number') {
+    entry.targetMtimeMs = targetMtimeMs;
+  }
+
+  return entry;
+}
+
+// ============================================================
+// Entry Index - (source, platform) → entries 下标
+// 索引不落盘；entries 数组被替换或长度变化时自动重建
+// ============================================================
+const entryIndexes = new WeakMap();
+
+function entryKey(source, platform) {
+  return `${platform}\0${source}`;
+}
+
+function buildEntryIndex(manifest) {
+  const positions = new Map();
+
+  manifest.entries.forEach((entry, index) => {
+    const key = entryKey(entry.source, entry.platform);
+    const list = positions.get(key);
+    if (list) {
+      list.push(index);
+    } else {
+      positions.set(key, [index]);
+    }
+  });
+
+  const index = { entries: manifest.entries, length: manifest.entries.length, positions };
+  entryIndexes.set(manifest, index);
+  return index;
+}
+
+function getEntryIndex(manifest) {
+  const index = entryIndexes.get(manifest);
+  if (index && index.entries === manifest.entries && index.length === manifest.entries.length) {
+    return index;
+  }
+  return buildEntryIndex(manifest);
+}
+
+// ============================================================
+// findEntries - 获取 (source, platform) 对应的全部条目
+// ============================================================
+function findEntries(manifest, sourcePath, platform) {
+  if (!manifest || !Array.isArray(manifest.entries)) {
+    return [];
+  }
+
+  let index = getEntryIndex(manifest);
+  let positions = index.positions.get(entryKey(sourcePath, platform)) || [];
+
+  // 条目被外部原地改写时索引可能过期，校验后必要时重建
+  const stale = positions.some((position) => {
+    const entry = manifest.entries[position];
+    return !entry || entry.source !== sourcePath || entry.platform !== platform;
+  });
+  if (stale) {
+    index = buildEntryIndex(manifest);
+    positions = index.positions.get(entryKey(sourcePath, platform)) || [];
+  }
+
+  return positions.map((position) => manifest.entries[position]);
+}
+
+function getEntrySourceHash(entry) {
+  return entry.sourceHash !== undefined ? entry.sourceHash : entry.hash;
 }
 
 // ============================================================
@@ -68,72 +153,159 @@ async function saveManifest(manifest, manifestPath = MANIFEST_PATH) {
 // needsRecompile - 检查是否需要重新编译
 // ============================================================
 function needsRecompile(sourcePath, sourceHash, manifest, platform) {
-  if (!manifest || !manifest.entries) {
+  const entries = findEntries(manifest, sourcePath, platform);
+  if (entries.length === 0) {
     return true;
   }
 
-  const entry = manifest.entries.find(e => e.source === sourcePath && e.platform === platform);
-  if (!entry) {
-    return true;
+  // 迁移自 v2 的条目没有真实 targetHash，需要重新编译一次补齐
+  return entries.some((entry) => !entry.targetHash || getEntrySourceHash(entry) !== sourceHash);
+}
+
+// ============================================================
+// setEntries - 替换 (source, platform) 的全部条目（支持拆分输出）
+// 返回目标不再出现在新条目中的旧条目（拆分变少或分片改名），由调用方清理
+// ============================================================
+function setEntries(manifest, sourcePath, platform, nextEntries) {
+  // findEntries 负责校验并在必要时重建索引
+  const previousEntries = findEntries(manifest, sourcePath, platform);
+  const nextTargets = new Set(nextEntries.map((entry) => entry.target));
+  const orphaned = previousEntries.filter((entry) => !nextTargets.has(entry.target));
+
+  const index = getEntryIndex(manifest);
+  const key = entryKey(sourcePath, platform);
+  const positions = index.positions.get(key) || [];
+  const shared = Math.min(positions.length, nextEntries.length);
+
+  // 原地覆盖已有槽位，保持 entries 顺序稳定
+  for (let i = 0; i < shared; i++) {
+    manifest.entries[positions[i]] = nextEntries[i];
+  }
+
+  if (nextEntries.length > shared) {
+    const nextPositions = positions.slice();
+    for (const entry of nextEntries.slice(shared)) {
+      nextPositions.push(manifest.entries.length);
+      manifest.entries.push(entry);
+    }
+    index.positions.set(key, nextPositions);
+    index.length = manifest.entries.length;
+  } else if (positions.length > shared) {
+    // 拆分输出变少：删除多余条目后重建索引
+    const removed = new Set(positions.slice(shared));
+    manifest.entries = manifest.entries.filter((_, position) => !removed.has(position));
+    entryIndexes.delete(manifest);
+  }
+
+  return orphaned;
+}
+
+// ============================================================
+// removeOrphanedTargets - 删除 setEntries 返回的孤儿目标文件，返回删除数
+// ============================================================
+async function removeOrphanedTargets(entries, errors = []) {
+  let removed = 0;
+
+  for (const entry of entries) {
+    try {
+      await fs.promises.rm(entry.target, { force: true });
+      removed++;
+    } catch (error) {
+      errors.push(`Remove ${entry.target}: ${error.message}`);
+    }
   }
 
-  return entry.hash !== sourceHash;
+  return removed;
 }
 
 // ============================================================
 // addEntry - 添加或更新条目
 // ============================================================
 function addEntry(manifest, entry) {
-  const existingIndex = manifest.entries.findIndex(e => e.source === entry.source && e.platform === entry.platform);
+  setEntries(manifest, entry.source, entry.platform, [entry]);
+}
 
-  if (existingIndex >= 0) {
-    manifest.entries[existingIndex] = entry;
-  } else {
-    manifest.entries.push(entry);
+// ============================================================
+// checkEntryDrift - 检查单个目标文件
+// ============================================================
+async function checkEntryDrift(entry, stats) {
+  const report = (issue) => ({ source: entry.source, target: entry.target, issue });
+  const expectedHash = entry.targetHash !== undefined ? entry.targetHash : entry.hash;
+
+  let targetStats;
+  try {
+    targetStats = await fs.promises.stat(entry.target);
+  } catch (error) {
+    if (error.code === 'ENOENT') {
+      return report('target file missing');
+    }
+    return null;
+  }
+
+  if (!expectedHash) {
+    return report('target hash not recorded; run adapt to refresh manifest');
+  }
+
+  // stat 短路：size + mtime 与编译时一致则视为未修改
+  if (typeof entry.targetSize === 'number') {
+    if (targetStats.size !== entry.targetSize) {
+      return report('target file modified since last compile');
+    }
+    if (targetStats.mtimeMs === entry.targetMtimeMs) {
+      stats.statHits++;
+      return null;
+    }
+  }
+
+  stats.hashed++;
+  try {
+    // 漂移检测：比较目标文件当前哈希与 manifest 记录的目标哈希
+    const targetContent = await fs.promises.readFile(entry.target);
+    if (hashContent(targetContent) !== expectedHash) {
+      return report('target file modified since last compile');
+    }
+
+    // 内容一致但 stat 变了（touch / checkout / stash）：刷新记录，下次重新走 stat 短路；
+    // racy 窗口内的 mtime 不可信，留待下次再刷新
+    if (entry.targetHash && Date.now() - targetStats.mtimeMs >= RACY_WINDOW_MS) {
+      entry.targetSize = targetStats.size;
+      entry.targetMtimeMs = targetStats.mtimeMs;
+      stats.refreshed = (stats.refreshed || 0) + 1;
+    }
+  } catch (error) {
+    if (error.code === 'ENOENT') {
+      return report('target file missing');
+    }
   }
+
+  return null;
 }
 
 // ============================================================
 // checkDrift - 检查漂移（目标文件被手动修改）
 // ============================================================
-async function checkDrift(manifest) {
-  const driftReport = [];
+async function checkDrift(manifest, options = {}) {
+  // stats: 可选计数器，记录 stat 短路命中、实际哈希与刷新了 stat 记录的条目数
+  // 有刷新时 manifest 条目已原地更新，由调用方决定是否保存
+  const {
+    concurrency = DEFAULT_IO_CONCURRENCY,
+    stats = { statHits: 0, hashed: 0, refreshed: 0 }
+  } = options;
 
   if (!manifest || !manifest.entries) {
-    return driftReport;
+    return [];
   }
 
-  for (const entry of manifest.entries) {
-    try {
-      // 读取目标文件当前内容
-      const targetContent = await fs.promises.readFile(entry.target, 'utf8');
-      const targetCurrentHash = hashContent(targetContent);
-
-      // 漂移检测：比较目标文件当前哈希与 manifest 记录的哈希
-      // 如果不一致，说明目标文件被手动修改了
-      if (targetCurrentHash !== entry.hash) {
-        driftReport.push({
-          source: entry.source,
-          target: entry.target,
-          issue: 'target file modified since last compile'
-        });
-      }
-    } catch (error) {
-      if (error.code === 'ENOENT') {
-        driftReport.push({
-          source: entry.source,
-          target: entry.target,
-          issue: 'target file missing'
-        });
-      }
-    }
-  }
-
-  return driftReport;
+  const results = await mapWithConcurrency(
+    manifest.entries,
+    concurrency,
+    (entry) => checkEntryDrift(entry, stats)
+  );
+  return results.filter(Boolean);
 }
 
 // ============================================================
-// createManifest - 创建新的空 manifest (v2.0)
+// createManifest - 创建新的空 manifest (v3.0)
 // ============================================================
 function createManifest() {
   return {
@@ -146,28 +318,48 @@ function createManifest() {
 }
 
 // ============================================================
-// migrateToV2 - 从 v1.0 迁移到 v2.0
+// migrateEntryToV3 - v1/v2 条目只有源哈希（hash），目标哈希未知
+// ============================================================
+function migrateEntryToV3(entry) {
+  if (entry.sourceHash !== undefined) {
+    return entry;
+  }
+
+  return {
+    source: entry.source,
+    target: entry.target,
+    platform: entry.platform,
+    sourceHash: entry.hash,
+    targetHash: null,
+    timestamp: entry.timestamp || new Date().toISOString()
+  };
+}
+
+// ============================================================
+// migrateToV3 - 从 v1.0 / v2.0 迁移到 v3.0
 // ============================================================
-function migrateToV2(manifest) {
+function migrateToV3(manifest) {
   if (!manifest) {
     return createManifest();
   }
 
-  // 已是 v2.0
-  if (manifest.version === '2.0' || manifest.version === MANIFEST_VERSION) {
+  // 已是 v3.0
+  if (manifest.version === MANIFEST_VERSION) {
     return manifest;
   }
 
-  // v1.0 → v2.0 迁移
   return {
     version: MANIFEST_VERSION,
     generatedAt: manifest.generatedAt || new Date().toISOString(),
-    entries: manifest.entries || [],
-    skills: [],
-    rulesEntry: {}
+    entries: (manifest.entries || []).map(migrateEntryToV3),
+    skills: manifest.skills || [],
+    rulesEntry: manifest.rulesEntry || {}
   };
 }
 
+// 兼容旧命名：历史调用方仍使用 migrateToV2，统一迁移到当前版本。
+const migrateToV2 = migrateToV3;
+
 // ============================================================
 // addSkillEntry - 添加或更新技能记录
 // ============================================================
@@ -238,9 +430,13 @@ module.exports = {
   loadManifest,
   saveManifest,
   needsRecompile,
+  findEntries,
+  setEntries,
+  removeOrphanedTargets,
   addEntry,
   checkDrift,
   createManifest,
+  migrateToV3,
   migrateToV2,
   addSkillEntry,
   replaceSkillEntries,
@@ -0,0 +1,248 @@
+/**
+ * Parse Cache Module
+ *
+ * 持久化解析缓存，避免 adapt 重复解析未变更文件:
+ * - 以绝对路径为 key，记录 size / mtimeMs / SHA-256 内容哈希
+ * - stat 命中时直接复用 PromptIR / registry 条目（零读取、零 YAML 解析、零 schema 校验）
+ * - mtime 变化但内容哈希不变时只读取哈希，仍复用解析结果
+ * - parser / schemas / skills-registry 源码变化时整体失效（fingerprint）
+ * - 写入窗口内修改的文件标记为 racy，下次必须校验哈希
+ *
+ * 缓存文件: devflow/.generated/parse-cache.json
+ */
+const fs = require('fs');
+const path = require('path');
+const crypto = require('crypto');
+
+const PARSE_CACHE_PATH = 'devflow/.generated/parse-cache.json';
+const PARSE_CACHE_VERSION = '1.0';
+
+// 这些模块决定解析结果的形状；任何一个变化都必须让缓存整体失效。
+const FINGERPRINT_SOURCES = [
+  'parser.js',
+  'schemas.js',
+  'tokenizer.js',
+  'skills-registry.js',
+  'parse-cache.js'
+];
+
+// mtime 与缓存写入时间过近时无法区分同一时钟周期内的二次修改。
+const RACY_WINDOW_MS = 2000;
+
+// ============================================================
+// hashContent - 计算 SHA-256 哈希（编译器各模块共用的唯一实现）
+// ============================================================
+function hashContent(content) {
+  return crypto.createHash('sha256').update(content).digest('hex');
+}
+
+// ============================================================
+// computeParserFingerprint - 计算解析器指纹
+// ============================================================
+let cachedFingerprint = null;
+
+function computeParserFingerprint() {
+  if (cachedFingerprint) {
+    return cachedFingerprint;
+  }
+
+  const hash = crypto.createHash('sha256');
+  hash.update(PARSE_CACHE_VERSION);
+
+  for (const source of FINGERPRINT_SOURCES) {
+    hash.update(`\0${source}\0`);
+    try {
+      hash.update(fs.readFileSync(path.join(__dirname, source)));
+    } catch {
+      hash.update('missing');
+    }
+  }
+
+  cachedFingerprint = hash.digest('hex');
+  return cachedFingerprint;
+}
+
+// ============================================================
+// createParseCache - 创建空缓存
+// ============================================================
+function createParseCache() {
+  return {
+    version: PARSE_CACHE_VERSION,
+    fingerprint: computeParserFingerprint(),
+    cwd: process.cwd(),
+    entries: {},
+    seen: new Set(),
+    kinds: new Set(),
+    dirty: false
+  };
+}
+
+// ============================================================
+// loadParseCache - 加载缓存，版本或指纹不匹配时返回空缓存
+// ============================================================
+async function loadParseCache(cachePath = PARSE_CACHE_PATH) {
+  const cache = createParseCache();
+
+  let stored;
+  try {
+    stored = JSON.parse(await fs.promises.readFile(cachePath, 'utf8'));
+  } catch {
+    // 缺失或损坏的缓存等同于冷启动
+    return cache;
+  }
+
+  if (
+    !stored ||
+    stored.version !== cache.version ||
+    stored.fingerprint !== cache.fingerprint ||
+    stored.cwd !== cache.cwd ||
+    !stored.entries ||
+    typeof stored.entries !== 'object'
+  ) {
+    cache.dirty = true;
+    return cache;
+  }
+
+  cache.entries = stored.entries;
+  return cache;
+}
+
+// ============================================================
+// saveParseCache - 保存缓存，清理本次扫描中已消失的条目
+// options.prune = false: 只访问了部分文件的增量构建（watch）不做清理
+// ============================================================
+async function saveParseCache(cache, cachePath = PARSE_CACHE_PATH, options = {}) {
+  const { prune = true } = options;
+  if (!cache) {
+    return false;
+  }
+
+  for (const [key, record] of Object.entries(cache.entries)) {
+    if (prune && cache.kinds.has(record.kind) && !cache.seen.has(key)) {
+      delete cache.entries[key];
+      cache.dirty = true;
+    }
+  }
+
+  if (!cache.dirty) {
+    return false;
+  }
+
+  const payload = {
+    version: cache.version,
+    fingerprint: cache.fingerprint,
+    cwd: cache.cwd,
+    entries: cache.entries
+  };
+
+  await fs.promises.mkdir(path.dirname(cachePath), { recursive: true });
+  const tempPath = `${cachePath}.${process.pid}.tmp`;
+  await fs.promises.writeFile(tempPath, JSON.stringify(payload), 'utf8');
+  await fs.promises.rename(tempPath, cachePath);
+  cache.dirty = false;
+  return true;
+}
+
+function markSeen(cache, kind, filePath) {
+  cache.kinds.add(kind);
+  cache.seen.add(filePath);
+}
+
+// ============================================================
+// lookupParseCache - stat 快速路径：size + mtime 一致即命中
+// ============================================================
+function lookupParseCache(cache, kind, filePath, stats) {
+  markSeen(cache, kind, filePath);
+
+  const record = cache.entries[filePath];
+  if (!record || record.kind !== kind || record.racy) {
+    return null;
+  }
+
+  if (record.size !== stats.size || record.mtimeMs !== stats.mtimeMs) {
+    return null;
+  }
+
+  return record;
+}
+
+// ============================================================
+// lookupParseCacheByHash - 内容哈希路径：文件被 touch 但内容未变
+// ============================================================
+function lookupParseCacheByHash(cache, kind, filePath, hash) {
+  markSeen(cache, kind, filePath);
+
+  const record = cache.entries[filePath];
+  if (!record || record.kind !== kind || record.hash !== hash) {
+    return null;
+  }
+
+  return record;
+}
+
+// ============================================================
+// storeParseCache - 写入/刷新缓存条目
+// ============================================================
+function storeParseCache(cache, kind, filePath, stats, hash, value, extra = {}) {
+  markSeen(cache, kind, filePath);
+
+  const previous = cache.entries[filePath];
+  const racy = Date.now() - stats.mtimeMs < RACY_WINDOW_MS;
+
+  if (
+    previous &&
+    previous.kind === kind &&
+    previous.hash === hash &&
+    previous.size === stats.size &&
+    previous.mtimeMs === stats.mtimeMs &&
+    previous.racy === racy &&
+    previous.value === value
+  ) {
+    return previous;
+  }
+
+  const record = {
+    kind,
+    size: stats.size,
+    mtimeMs: stats.mtimeMs,
+    hash,
+    racy,
+    ...extra,
+    value
+  };
+
+  cache.entries[filePath] = record;
+  cache.dirty = true;
+  return record;
+}
+
+// ============================================================
+// getSkillEntryHash - 复用缓存中的 registry 条目哈希
+// skill.skillPath 相对于仓库根；按传入的 repoRoot 解析，不依赖当前 cwd
+// ============================================================
+function getSkillEntryHash(cache, skill, repoRoot = cache ? cache.cwd : process.cwd()) {
+  if (cache && skill.skillPath) {
+    const key = path.resolve(repoRoot, skill.skillPath);
+    const record = cache.entries[key];
+    if (record && record.kind === 'skill' && record.entryHash && cache.seen.has(key)) {
+      return record.entryHash;
+    }
+  }
+
+  return hashContent(JSON.stringify(skill));
+}
+
+module.exports = {
+  PARSE_CACHE_PATH,
+  PARSE_CACHE_VERSION,
+  RACY_WINDOW_MS,
+  hashContent,
+  computeParserFingerprint,
+  createParseCache,
+  loadParseCache,
+  saveParseCache,
+  lookupParseCache,
+  lookupParseCacheByHash,
+  storeParseCache,
+  getSkillEntryHash
+};
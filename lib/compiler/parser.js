@@ -5,15 +5,23 @@
  * - Extracts YAML frontmatter using gray-matter
  * - Validates frontmatter with Zod schema
  * - Detects placeholders ({SCRIPT:*}, {TEMPLATE:*}, {GUIDE:*}, {AGENT_SCRIPT}, $ARGUMENTS)
+ *   and inline .claude/ paths in a single scan (tokenizer.js)
  * - Computes SHA-256 content hash
  * - Returns PromptIR structure
+ * - Reuses cached PromptIR for unchanged files (parse-cache.js)
  */
 const fs = require('fs');
 const path = require('path');
-const crypto = require('crypto');
 const matter = require('gray-matter');
 
 const { FrontmatterSchema, PromptIRSchema } = require('./schemas.js');
+const {
+  hashContent,
+  lookupParseCache,
+  lookupParseCacheByHash,
+  storeParseCache
+} = require('./parse-cache.js');
+const { tokenize, splitTokens } = require('./tokenizer.js');
 const {
   MissingFrontmatterError,
   InvalidFrontmatterError,
@@ -27,83 +35,12 @@ const {
 // ============================================================
 const MAX_FILE_SIZE = 1024 * 1024; // 1MB limit (FINDING-003: Resource Exhaustion)
 
-// ============================================================
-// Placeholder Detection Patterns
-// ============================================================
-const SCRIPT_PATTERN = /\{SCRIPT:([^}]+)\}/g;
-const TEMPLATE_PATTERN = /\{TEMPLATE:([^}]+)\}/g;
-const GUIDE_PATTERN = /\{GUIDE:([^}]+)\}/g;
-const AGENT_SCRIPT_PATTERN = /\{AGENT_SCRIPT\}/g;
-const ARGUMENTS_PATTERN = /\$ARGUMENTS/g;
-
-// ============================================================
-// hashContent - 计算 SHA-256 哈希
-// ============================================================
-function hashContent(content) {
-  return crypto.createHash('sha256').update(content).digest('hex');
-}
-
 // ============================================================
 // detectPlaceholders - 检测正文中的占位符
+// 单次扫描（tokenizer.js），按出现位置排序
 // ============================================================
 function detectPlaceholders(body) {
-  const placeholders = [];
-
-  // 检测 {SCRIPT:alias}
-  let match;
-  const scriptPattern = new RegExp(SCRIPT_PATTERN.source, 'g');
-  while ((match = scriptPattern.exec(body)) !== null) {
-    placeholders.push({
-      type: 'SCRIPT',
-      raw: match[0],
-      alias: match[1],
-      position: { start: match.index, end: match.index + match[0].length }
-    });
-  }
-
-  // 检测 {TEMPLATE:alias}
-  const templatePattern = new RegExp(TEMPLATE_PATTERN.source, 'g');
-  while ((match = templatePattern.exec(body)) !== null) {
-    placeholders.push({
-      type: 'TEMPLATE',
-      raw: match[0],
-      alias: match[1],
-      position: { start: match.index, end: match.index + match[0].length }
-    });
-  }
-
-  // 检测 {GUIDE:alias}
-  const guidePattern = new RegExp(GUIDE_PATTERN.source, 'g');
-  while ((match = guidePattern.exec(body)) !== null) {
-    placeholders.push({
-      type: 'GUIDE',
-      raw: match[0],
-      alias: match[1],
-      position: { start: match.index, end: match.index + match[0].length }
-    });
-  }
-
-  // 检测 {AGENT_SCRIPT}
-  const agentPattern = new RegExp(AGENT_SCRIPT_PATTERN.source, 'g');
-  while ((match = agentPattern.exec(body)) !== null) {
-    placeholders.push({
-      type: 'AGENT_SCRIPT',
-      raw: match[0],
-      position: { start: match.index, end: match.index + match[0].length }
-    });
-  }
-
-  // 检测 $ARGUMENTS
-  const argsPattern = new RegExp(ARGUMENTS_PATTERN.source, 'g');
-  while ((match = argsPattern.exec(body)) !== null) {
-    placeholders.push({
-      type: 'ARGUMENTS',
-      raw: match[0],
-      position: { start: match.index, end: match.index + match[0].length }
-    });
-  }
-
-  return placeholders;
+  return splitTokens(tokenize(body)).placeholders;
 }
 
 // ============================================================
@@ -159,8 +96,13 @@ function parsePromptFile(filePath) {
   }
 
   const content = fs.readFileSync(absolutePath, 'utf8');
-  const hash = hashContent(content);
+  return parsePromptContent(filePath, absolutePath, content, hashContent(content));
+}
 
+// ============================================================
+// parsePromptContent - 解析已读取的提示词内容
+// ============================================================
+function parsePromptContent(filePath, absolutePath, content, hash) {
   // ✅ SECURITY FIX (FINDING-002): Enable YAML safe mode (CORE_SCHEMA)
   const yaml = require('js-yaml');
   const parsed = matter(content, {
@@ -186,8 +128,8 @@ function parsePromptFile(filePath) {
   const frontmatter = frontmatterResult.data;
   const body = parsed.content;
 
-  // 检测占位符
-  const placeholders = detectPlaceholders(body);
+  // 单次扫描检测占位符与内联 .claude/ 路径（transform / 资源收集阶段复用）
+  const { placeholders, inlinePaths } = splitTokens(tokenize(body));
 
   // 验证 SCRIPT alias 存在性
   validateScriptAliases(placeholders, frontmatter.scripts, filePath);
@@ -207,7 +149,8 @@ function parsePromptFile(filePath) {
     },
     frontmatter,
     body,
-    placeholders
+    placeholders,
+    inlinePaths
   };
 
   // 最终验证 PromptIR
@@ -219,10 +162,41 @@ function parsePromptFile(filePath) {
   return irResult.data;
 }
 
+// ============================================================
+// parsePromptFileCached - 带持久化缓存的单文件解析
+// stat 命中直接返回；内容哈希命中跳过 YAML 解析与 schema 校验
+// 缓存中的 IR 只在本函数内持有，对外一律返回副本，调用方修改不会污染缓存
+// ============================================================
+function parsePromptFileCached(filePath, cache) {
+  const absolutePath = path.resolve(filePath);
+  const stats = fs.statSync(absolutePath);
+
+  const cached = lookupParseCache(cache, 'prompt', absolutePath, stats);
+  if (cached) {
+    return structuredClone(cached.value);
+  }
+
+  // ✅ SECURITY FIX (FINDING-003): Check file size before reading
+  if (stats.size > MAX_FILE_SIZE) {
+    throw new Error(`File too large: ${filePath} (${stats.size} bytes > ${MAX_FILE_SIZE} bytes)`);
+  }
+
+  const content = fs.readFileSync(absolutePath, 'utf8');
+  const hash = hashContent(content);
+  const sameContent = lookupParseCacheByHash(cache, 'prompt', absolutePath, hash);
+  const ir = sameContent
+    ? sameContent.value
+    : parsePromptContent(filePath, absolutePath, content, hash);
+
+  storeParseCache(cache, 'prompt', absolutePath, stats, hash, ir);
+  return structuredClone(ir);
+}
+
 // ============================================================
 // parseAllPromptFiles - 批量解析提示词目录
 // ============================================================
-async function parseAllPromptFiles(dirPath) {
+async function parseAllPromptFiles(dirPath, options = {}) {
+  const { cache = null } = options;
   const absoluteDir = path.resolve(dirPath);
 
   // skills-first 仓库可以没有 .claude/commands；此时只生成 skill/rules 产物。
@@ -241,7 +215,7 @@ async function parseAllPromptFiles(dirPath) {
   for (const file of mdFiles) {
     const filePath = path.join(absoluteDir, file);
     try {
-      const ir = parsePromptFile(filePath);
+      const ir = cache ? parsePromptFileCached(filePath, cache) : parsePromptFile(filePath);
       results.push(ir);
     } catch (error) {
       // 重新抛出以便调用者处理
@@ -254,6 +228,7 @@ async function parseAllPromptFiles(dirPath) {
 
 module.exports = {
   parsePromptFile,
+  parsePromptFileCached,
   parseAllPromptFiles,
   // 兼容旧命名，避免历史调用方立即断裂。
   parseCommand: parsePromptFile,
@@ -0,0 +1,140 @@
+/**
+ * Compile Pipeline
+ *
+ * (file × platform) 编译任务执行器:
+ * - formatForPlatform(): transform + format，纯 CPU，可在 worker 中运行
+ * - runCompileTasks(): 有界并发执行任务，结果按任务顺序返回
+ *   - jobs = 1: 与历史串行路径一致
+ *   - jobs > 1: 重叠各平台文件写入；任务量较大时 transform/format 交给 worker 池
+ * - 调用方按返回顺序合并 manifest，保证输出与串行路径逐字节一致
+ */
+const os = require('os');
+
+const { transformForPlatform } = require('./transformer.js');
+const { getEmitter } = require('./emitters/index.js');
+const { createEntry } = require('./manifest.js');
+const { mapWithConcurrency } = require('../concurrency.js');
+
+// 低于该任务数时 worker 启动与消息复制开销大于收益
+const WORKER_TASK_THRESHOLD = 200;
+
+// ============================================================
+// getAvailableParallelism - 可用 CPU 数
+// ============================================================
+function getAvailableParallelism() {
+  if (typeof os.availableParallelism === 'function') {
+    return os.availableParallelism();
+  }
+  return os.cpus().length || 1;
+}
+
+// ============================================================
+// normalizeJobs - 解析 --jobs 参数
+// ============================================================
+function normalizeJobs(jobs) {
+  const value = Number(jobs);
+  if (!Number.isInteger(value) || value < 1) {
+    throw new Error(`Invalid jobs value: ${jobs}. Use a positive integer.`);
+  }
+  return value;
+}
+
+// ============================================================
+// formatForPlatform - transform + format 单个 (file × platform)
+// ============================================================
+function formatForPlatform(ir, platform, pathMap = {}) {
+  // 转换（传入 pathMap 以重写路径）
+  const transformed = transformForPlatform(ir, platform, { pathMap });
+
+  // 格式化
+  return getEmitter(platform).format(ir, transformed.body);
+}
+
+// ============================================================
+// shouldUseWorkers - 判断是否启用 worker 池
+// ============================================================
+function shouldUseWorkers(workers, jobs, taskCount) {
+  if (jobs <= 1 || workers === false) {
+    return false;
+  }
+  if (workers === true) {
+    return true;
+  }
+  return taskCount >= WORKER_TASK_THRESHOLD && getAvailableParallelism() > 1;
+}
+
+// ============================================================
+// runCompileTask - 编译并写出单个 (file × platform)
+// ============================================================
+async function runCompileTask(task, pathMaps, pool) {
+  const { ir, platform, sourceRelative } = task;
+  const emitter = getEmitter(platform);
+  const formatted = pool
+    ? await pool.run({ ir, platform })
+    : formatForPlatform(ir, platform, pathMaps[platform] || {});
+
+  // 处理拆分文件（Antigravity 可能返回数组）
+  const split = Array.isArray(formatted);
+  const parts = split ? formatted : [{ filename: ir.source.filename, content: formatted }];
+  const entries = [];
+
+  for (const part of parts) {
+    const emitResult = await emitter.emit(part.filename, part.content);
+
+    entries.push(createEntry({
+      source: sourceRelative,
+      target: emitResult.path,
+      sourceHash: ir.source.hash,
+      targetHash: emitResult.hash,
+      targetSize: emitResult.size,
+      targetMtimeMs: emitResult.mtimeMs,
+      platform
+    }));
+  }
+
+  return {
+    entries,
+    partNames: split ? parts.map((part) => part.filename) : null
+  };
+}
+
+// ============================================================
+// runCompileTasks - 有界并发执行编译任务
+// 返回与 tasks 顺序一致的 [{ task, entries, partNames } | { task, error }]
+// ============================================================
+async function runCompileTasks(tasks, options = {}) {
+  const { pathMaps = {}, workers = 'auto' } = options;
+  const jobs = normalizeJobs(options.jobs || 1);
+
+  let pool = null;
+  if (shouldUseWorkers(workers, jobs, tasks.length)) {
+    const { TransformWorkerPool } = require('./worker-pool.js');
+    pool = new TransformWorkerPool({
+      size: Math.min(jobs, getAvailableParallelism()),
+      pathMaps
+    });
+  }
+
+  try {
+    return await mapWithConcurrency(tasks, jobs, async (task) => {
+      try {
+        return { task, ...(await runCompileTask(task, pathMaps, pool)) };
+      } catch (error) {
+        return { task, error };
+      }
+    });
+  } finally {
+    if (pool) {
+      await pool.close();
+    }
+  }
+}
+
+module.exports = {
+  WORKER_TASK_THRESHOLD,
+  getAvailableParallelism,
+  normalizeJobs,
+  formatForPlatform,
+  shouldUseWorkers,
+  runCompileTasks
+};
@@ -5,6 +5,8 @@
  * - 收集 IR 中引用的 scripts/templates/guides 文件
  * - 复制到各平台对应目录
  * - 提供路径映射表供 transformer 重写内容中的路径
+ * - 通过 file-mirror.js 同步文件：stat 快速路径 + 流式哈希 + COPYFILE_FICLONE，
+ *   可选 hardlink 模式；目录遍历并行进行，总 I/O 并发受共享闸门限制
  *
  * 目录映射规则:
  *   .claude/scripts/       → .{platform}/scripts/
@@ -13,8 +15,19 @@
  */
 const fs = require('fs');
 const path = require('path');
-const crypto = require('crypto');
 const matter = require('gray-matter');
+const {
+  DEFAULT_IO_CONCURRENCY,
+  mapWithConcurrency,
+  createLimiter
+} = require('../concurrency.js');
+const { mirrorFile, forgetMirrorTarget } = require('./file-mirror.js');
+const {
+  INLINE_CLAUDE_PATH_SOURCE,
+  tokenize,
+  splitTokens,
+  getPathRewriter
+} = require('./tokenizer.js');
 
 // ============================================================
 // Platform Directory Mapping
@@ -29,7 +42,7 @@ const PLATFORM_DIRS = {
 // ============================================================
 // Patterns for inline .claude/ path detection
 // ============================================================
-const INLINE_CLAUDE_PATH_PATTERN = /\.claude\/(scripts|docs\/templates|docs\/guides)\/[^\s"'`<>)}\]]+/g;
+const INLINE_CLAUDE_PATH_PATTERN = new RegExp(INLINE_CLAUDE_PATH_SOURCE, 'g');
 
 // ============================================================
 // collectReferencedResources - 收集 IR 中引用的资源文件
@@ -77,8 +90,8 @@ function collectReferencedResources(irs) {
       }
     }
 
-    // 5. 扫描内容中直接硬编码的 .claude/ 路径
-    const inlinePaths = scanInlineClaudePaths(ir.body);
+    // 5. 内容中直接硬编码的 .claude/ 路径（优先复用 parser 的扫描结果）
+    const inlinePaths = ir.inlinePaths || scanInlineClaudePaths(ir.body);
     for (const inlinePath of inlinePaths) {
       if (inlinePath.startsWith('.claude/scripts/')) {
         resources.scripts.add(inlinePath);
@@ -110,21 +123,10 @@ function extractScriptPath(commandString) {
 
 // ============================================================
 // scanInlineClaudePaths - 扫描内容中直接硬编码的 .claude/ 路径
+// 与 parser 共用单次扫描 tokenizer，末尾标点已清理
 // ============================================================
 function scanInlineClaudePaths(content) {
-  const paths = new Set();
-  const pattern = new RegExp(INLINE_CLAUDE_PATH_PATTERN.source, 'g');
-
-  let match;
-  while ((match = pattern.exec(content)) !== null) {
-    // 清理路径末尾可能的标点符号
-    let cleanPath = match[0];
-    // 移除末尾的常见标点
-    cleanPath = cleanPath.replace(/[,;:.\s]+$/, '');
-    paths.add(cleanPath);
-  }
-
-  return Array.from(paths);
+  return splitTokens(tokenize(content)).inlinePaths;
 }
 
 // ============================================================
@@ -175,8 +177,8 @@ async function copyResourceFile(sourcePath, targetPath, options = {}) {
     const targetDir = path.dirname(absoluteTarget);
     await fs.promises.mkdir(targetDir, { recursive: true, mode: 0o755 });
 
-    // 复制文件
-    await fs.promises.copyFile(absoluteSource, absoluteTarget);
+    // 复制文件（支持时使用 copy-on-write 克隆）
+    await fs.promises.copyFile(absoluteSource, absoluteTarget, fs.constants.COPYFILE_FICLONE);
 
     // 设置权限
     await fs.promises.chmod(absoluteTarget, 0o644);
@@ -198,7 +200,7 @@ async function copyResourceFile(sourcePath, targetPath, options = {}) {
 // copyResourcesForPlatform - 为单个平台复制所有资源
 // ============================================================
 async function copyResourcesForPlatform(resources, platform, options = {}) {
-  const { verbose = false, dryRun = false } = options;
+  const { verbose = false, dryRun = false, state = null, linkMode = 'copy' } = options;
   const results = {
     platform,
     copied: 0,
@@ -215,31 +217,55 @@ async function copyResourcesForPlatform(resources, platform, options = {}) {
   ];
 
   for (const sourcePath of allResources) {
-    const targetPath = mapPathToPlatform(sourcePath, platform);
-    results.pathMap[sourcePath] = targetPath;
+    results.pathMap[sourcePath] = mapPathToPlatform(sourcePath, platform);
+  }
 
-    // 检查目标文件是否已存在且相同
+  const outcomes = await mapWithConcurrency(allResources, DEFAULT_IO_CONCURRENCY, async (sourcePath) => {
+    const targetPath = results.pathMap[sourcePath];
     const absoluteSource = path.resolve(process.cwd(), sourcePath);
     const absoluteTarget = path.resolve(process.cwd(), targetPath);
 
-    if (fs.existsSync(absoluteTarget) && fs.existsSync(absoluteSource)) {
-      const sourceHash = hashFile(absoluteSource);
-      const targetHash = hashFile(absoluteTarget);
-      if (sourceHash === targetHash) {
-        results.skipped++;
-        if (verbose) {
+    if (!fs.existsSync(absoluteSource)) {
+      if (verbose) {
+        console.warn(`Warning: Source file not found: ${sourcePath}`);
+      }
+      return { source: sourcePath, error: 'Source not found' };
+    }
+
+    try {
+      const { status } = await mirrorFile(absoluteSource, absoluteTarget, {
+        state,
+        linkMode,
+        dryRun,
+        mode: 0o644
+      });
+
+      if (verbose) {
+        if (status === 'unchanged') {
           console.log(`Skipped (unchanged): ${targetPath}`);
+        } else if (dryRun) {
+          console.log(`[DRY-RUN] Would copy: ${sourcePath} → ${targetPath}`);
+        } else {
+          console.log(`Copied: ${sourcePath} → ${targetPath}`);
         }
-        continue;
       }
-    }
 
-    const copyResult = await copyResourceFile(sourcePath, targetPath, { verbose, dryRun });
+      return { source: sourcePath, status };
+    } catch (error) {
+      if (verbose) {
+        console.error(`Error copying ${sourcePath}: ${error.message}`);
+      }
+      return { source: sourcePath, error: error.message };
+    }
+  });
 
-    if (copyResult.success) {
-      results.copied++;
+  for (const outcome of outcomes) {
+    if (outcome.error) {
+      results.errors.push({ source: outcome.source, error: outcome.error });
+    } else if (outcome.status === 'unchanged') {
+      results.skipped++;
     } else {
-      results.errors.push({ source: sourcePath, error: copyResult.error });
+      results.copied++;
     }
   }
 
@@ -258,58 +284,40 @@ async function copyResourcesForAllPlatforms(irs, platforms, options = {}) {
     allPathMaps: {} // platform → pathMap
   };
 
-  for (const platform of platforms) {
-    const platformResult = await copyResourcesForPlatform(resources, platform, options);
+  // 各平台目标目录互不重叠，可并行复制；汇总仍按 platforms 顺序
+  const { concurrency = 1 } = options;
+  const platformResults = await mapWithConcurrency(platforms, concurrency, (platform) =>
+    copyResourcesForPlatform(resources, platform, options)
+  );
+
+  platforms.forEach((platform, index) => {
+    const platformResult = platformResults[index];
     results.platforms[platform] = platformResult;
     results.allPathMaps[platform] = platformResult.pathMap;
     results.totalCopied += platformResult.copied;
     results.totalSkipped += platformResult.skipped;
-  }
+  });
 
   return results;
 }
 
 // ============================================================
 // rewritePathsInContent - 重写内容中的 .claude/ 路径
+// 编译后的 trie 单遍替换（最长路径优先）
 // ============================================================
 function rewritePathsInContent(content, pathMap) {
-  let result = content;
-
-  // 按路径长度降序排序，避免短路径替换长路径的部分
-  const sortedPaths = Object.keys(pathMap).sort((a, b) => b.length - a.length);
-
-  for (const sourcePath of sortedPaths) {
-    const targetPath = pathMap[sourcePath];
-    // 全局替换
-    result = result.split(sourcePath).join(targetPath);
-  }
-
-  return result;
-}
-
-// ============================================================
-// hashFile - 计算文件哈希
-// ============================================================
-function hashFile(filePath) {
-  try {
-    const content = fs.readFileSync(filePath);
-    return crypto.createHash('sha256').update(content).digest('hex');
-  } catch {
-    return null;
-  }
-}
-
-function hashContent(content) {
-  return crypto.createHash('sha256').update(content).digest('hex');
+  return getPathRewriter(pathMap)(content);
 }
 
 function toRepoRelativePath(absolutePath) {
   return path.relative(process.cwd(), absolutePath).split(path.sep).join('/');
 }
 
+// 返回改写后的内容与探测过的 bundled reads（供 mirror 记录改写输入签名）
 function rewriteCodexSkillReads(content, sourceSkillDir, targetSkillDir) {
   const parsed = matter(content);
   const reads = Array.isArray(parsed.data.reads) ? parsed.data.reads : [];
+  const probes = [];
 
   parsed.data.reads = reads.map((entry) => {
     const relativeEntry = String(entry || '').trim();
@@ -318,59 +326,50 @@ function rewriteCodexSkillReads(content, sourceSkillDir, targetSkillDir) {
     }
 
     const bundledSourcePath = path.join(sourceSkillDir, relativeEntry);
-    if (!fs.existsSync(bundledSourcePath)) {
+    const exists = fs.existsSync(bundledSourcePath);
+    probes.push({ path: bundledSourcePath, exists });
+    if (!exists) {
       return relativeEntry;
     }
 
     return toRepoRelativePath(path.join(targetSkillDir, relativeEntry));
   });
 
-  return matter.stringify(parsed.content, parsed.data);
+  return { content: matter.stringify(parsed.content, parsed.data), probes };
 }
 
-async function copyMirroredFile(sourcePath, targetPath, platform, options = {}) {
-  const { sourceSkillDir = null, targetSkillDir = null } = options;
-  const stat = await fs.promises.stat(sourcePath);
-  await fs.promises.mkdir(path.dirname(targetPath), { recursive: true, mode: 0o755 });
-
-  if (
+function needsCodexReadsRewrite(sourcePath, platform, options = {}) {
+  return (
     platform === 'codex' &&
     path.basename(sourcePath) === 'SKILL.md' &&
-    sourceSkillDir &&
-    targetSkillDir
-  ) {
-    const sourceContent = await fs.promises.readFile(sourcePath, 'utf8');
-    const rewritten = rewriteCodexSkillReads(sourceContent, sourceSkillDir, targetSkillDir);
-    await fs.promises.writeFile(targetPath, rewritten, 'utf8');
-  } else {
-    await fs.promises.copyFile(sourcePath, targetPath);
-  }
-
-  await fs.promises.chmod(targetPath, stat.mode & 0o777);
+    Boolean(options.sourceSkillDir) &&
+    Boolean(options.targetSkillDir)
+  );
 }
 
-async function getExpectedMirroredHash(sourcePath, targetPath, platform, options = {}) {
+// ============================================================
+// getMirroredContent - 需要改写的文件返回目标内容的延迟生成函数，其余返回 null（逐字节镜像）
+// 由 mirrorFile 在 stat 快速路径或改写输入签名未命中时才调用
+// ============================================================
+function getMirroredContent(sourcePath, platform, options = {}) {
   const { sourceSkillDir = null, targetSkillDir = null } = options;
 
-  if (
-    platform === 'codex' &&
-    path.basename(sourcePath) === 'SKILL.md' &&
-    sourceSkillDir &&
-    targetSkillDir
-  ) {
-    const sourceContent = await fs.promises.readFile(sourcePath, 'utf8');
-    const rewritten = rewriteCodexSkillReads(sourceContent, sourceSkillDir, targetSkillDir);
-    return hashContent(rewritten);
+  if (!needsCodexReadsRewrite(sourcePath, platform, options)) {
+    return null;
   }
 
-  return hashFile(sourcePath);
+  return async () => {
+    const sourceContent = await fs.promises.readFile(sourcePath, 'utf8');
+    return rewriteCodexSkillReads(sourceContent, sourceSkillDir, targetSkillDir);
+  };
 }
 
 // ============================================================
 // mirrorSkillDirectoriesForPlatform - 镜像 skills 目录到平台目录
+// options.state    - file-mirror 记录（stat 快速路径）
+// options.linkMode - 'copy' | 'hardlink'
 // ============================================================
 async function mirrorSkillDirectoriesForPlatform(skillsDir, platform, skillNames, options = {}) {
-  const { verbose = false, dryRun = false } = options;
   const result = {
     platform,
     copied: 0,
@@ -385,33 +384,51 @@ async function mirrorSkillDirectoriesForPlatform(skillsDir, platform, skillNames
 
   const sourceRoot = path.resolve(process.cwd(), skillsDir);
   const targetRoot = path.resolve(process.cwd(), platformDir, 'skills');
+  // 所有 skill 目录并行遍历，共享同一个 I/O 并发闸门
+  const limit = options.limit || createLimiter(DEFAULT_IO_CONCURRENCY);
 
-  for (const skillName of skillNames) {
+  const skillResults = await Promise.all(skillNames.map(async (skillName) => {
     const sourceSkillDir = path.join(sourceRoot, skillName);
     const targetSkillDir = path.join(targetRoot, skillName);
 
     if (!fs.existsSync(sourceSkillDir)) {
-      result.errors.push({ skill: skillName, error: 'Source skill directory not found' });
-      continue;
+      return { copied: 0, skipped: 0, errors: ['Source skill directory not found'] };
     }
 
-    const mirrorResult = await mirrorDirectoryRecursive(sourceSkillDir, targetSkillDir, {
-      verbose,
-      dryRun,
+    return mirrorDirectoryRecursive(sourceSkillDir, targetSkillDir, {
+      ...options,
+      limit,
       platform,
       sourceSkillDir,
       targetSkillDir
     });
+  }));
+
+  skillNames.forEach((skillName, index) => {
+    const mirrorResult = skillResults[index];
     result.copied += mirrorResult.copied;
     result.skipped += mirrorResult.skipped;
     result.errors.push(...mirrorResult.errors.map((error) => ({ skill: skillName, error })));
-  }
+  });
 
   return result;
 }
 
+// ============================================================
+// mirrorDirectoryRecursive - 并行镜像目录树
+// 子目录与文件同时展开；文件同步经 options.limit 限流，结果按目录项顺序汇总
+// ============================================================
 async function mirrorDirectoryRecursive(sourceDir, targetDir, options = {}) {
-  const { verbose = false, dryRun = false, platform, sourceSkillDir, targetSkillDir } = options;
+  const {
+    verbose = false,
+    dryRun = false,
+    platform,
+    sourceSkillDir,
+    targetSkillDir,
+    state = null,
+    linkMode = 'copy'
+  } = options;
+  const limit = options.limit || createLimiter(DEFAULT_IO_CONCURRENCY);
   const result = {
     copied: 0,
     skipped: 0,
@@ -428,87 +445,94 @@ async function mirrorDirectoryRecursive(sourceDir, targetDir, options = {}) {
 
   if (!dryRun) {
     await fs.promises.mkdir(targetDir, { recursive: true, mode: 0o755 });
-    await pruneMirroredDirectoryRecursive(sourceDir, targetDir, options);
+    await pruneMirroredEntries(entries, targetDir, { verbose, state });
   }
 
-  for (const entry of entries) {
+  const nestedOptions = { ...options, limit };
+  const outcomes = await Promise.all(entries.map(async (entry) => {
     const sourcePath = path.join(sourceDir, entry.name);
     const targetPath = path.join(targetDir, entry.name);
 
     if (entry.isDirectory()) {
-      const nested = await mirrorDirectoryRecursive(sourcePath, targetPath, options);
-      result.copied += nested.copied;
-      result.skipped += nested.skipped;
-      result.errors.push(...nested.errors);
-      continue;
+      return mirrorDirectoryRecursive(sourcePath, targetPath, nestedOptions);
     }
 
     if (!entry.isFile()) {
-      continue;
+      return null;
     }
 
-    const sourceHash = await getExpectedMirroredHash(sourcePath, targetPath, platform, {
-      sourceSkillDir,
-      targetSkillDir
-    });
-    const targetHash = fs.existsSync(targetPath) ? hashFile(targetPath) : null;
+    return limit(async () => {
+      try {
+        const content = getMirroredContent(sourcePath, platform, {
+          sourceSkillDir,
+          targetSkillDir
+        });
+        const { status } = await mirrorFile(sourcePath, targetPath, {
+          state,
+          content,
+          linkMode,
+          dryRun
+        });
+        const relativeTarget = path.relative(process.cwd(), targetPath);
+
+        if (status === 'unchanged') {
+          if (verbose) {
+            console.log(`Skipped skill file (unchanged): ${relativeTarget}`);
+          }
+          return { copied: 0, skipped: 1, errors: [] };
+        }
 
-    if (sourceHash && targetHash && sourceHash === targetHash) {
-      result.skipped++;
-      if (verbose) {
-        console.log(`Skipped skill file (unchanged): ${path.relative(process.cwd(), targetPath)}`);
+        if (verbose) {
+          console.log(`Mirrored skill file: ${relativeTarget}`);
+        }
+        return { copied: 1, skipped: 0, errors: [] };
+      } catch (error) {
+        return { copied: 0, skipped: 0, errors: [error.message] };
       }
-      continue;
-    }
-
-    if (!dryRun) {
-      await copyMirroredFile(sourcePath, targetPath, platform, { sourceSkillDir, targetSkillDir });
-    }
+    });
+  }));
 
-    result.copied++;
-    if (verbose) {
-      console.log(`Mirrored skill file: ${path.relative(process.cwd(), targetPath)}`);
+  for (const outcome of outcomes) {
+    if (!outcome) {
+      continue;
     }
+    result.copied += outcome.copied;
+    result.skipped += outcome.skipped;
+    result.errors.push(...outcome.errors);
   }
 
   return result;
 }
 
-async function pruneMirroredDirectoryRecursive(sourceDir, targetDir, options = {}) {
-  const { verbose = false } = options;
+// ============================================================
+// pruneMirroredEntries - 删除源目录中已不存在的目标项
+// 每一层目录在遍历时各自清理，避免重复扫描子树
+// ============================================================
+async function pruneMirroredEntries(sourceEntries, targetDir, options = {}) {
+  const { verbose = false, state = null } = options;
+  const sourceNames = new Set(sourceEntries.map((entry) => entry.name));
 
-  if (!fs.existsSync(targetDir)) {
+  let targetEntries;
+  try {
+    targetEntries = await fs.promises.readdir(targetDir);
+  } catch {
     return;
   }
 
-  const targetEntries = await fs.promises.readdir(targetDir, { withFileTypes: true });
   await Promise.all(
-    targetEntries.map(async (entry) => {
-      const sourcePath = path.join(sourceDir, entry.name);
-      const targetPath = path.join(targetDir, entry.name);
-
-      if (!fs.existsSync(sourcePath)) {
+    targetEntries
+      .filter((name) => !sourceNames.has(name))
+      .map(async (name) => {
+        const targetPath = path.join(targetDir, name);
         await fs.promises.rm(targetPath, { recursive: true, force: true });
+        forgetMirrorTarget(state, targetPath);
         if (verbose) {
           console.log(`Pruned stale skill file: ${path.relative(process.cwd(), targetPath)}`);
         }
-        return;
-      }
-
-      if (entry.isDirectory()) {
-        await pruneMirroredDirectoryRecursive(sourcePath, targetPath, options);
-      }
-    })
+      })
   );
 }
 
-// ============================================================
-// clearResourceCache - 清除资源缓存（用于测试）
-// ============================================================
-function clearResourceCache() {
-  // 目前没有缓存，预留接口
-}
-
 module.exports = {
   PLATFORM_DIRS,
   INLINE_CLAUDE_PATH_PATTERN,
@@ -520,6 +544,5 @@ module.exports = {
   copyResourcesForPlatform,
   copyResourcesForAllPlatforms,
   mirrorSkillDirectoriesForPlatform,
-  rewritePathsInContent,
-  clearResourceCache
+  rewritePathsInContent
 };
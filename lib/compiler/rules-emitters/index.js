@@ -3,7 +3,7 @@
  *
  * 规则入口文件 Emitter 工厂:
  * - getRulesEmitter(platform): 获取对应平台的 emitter
- * - emitAllRules(registry, commands): 为所有平台生成规则文件
+ * - emitAllRules(registry, commands, options): 为所有平台生成规则文件（可并行）
  *
  * Reference: TECH_DESIGN.md#RulesEmitter
  */
@@ -11,6 +11,7 @@ const { CursorRulesEmitter } = require('./cursor-rules-emitter');
 const { QwenRulesEmitter } = require('./qwen-rules-emitter');
 const { AntigravityRulesEmitter } = require('./antigravity-rules-emitter');
 const { PLATFORMS } = require('../platforms');
+const { mapWithConcurrency } = require('../../concurrency');
 
 // ============================================================
 // Emitter Registry
@@ -36,35 +37,28 @@ function getRulesEmitter(platform) {
 
 // ============================================================
 // emitAllRules - 为所有平台生成规则文件
+// concurrency > 1 时各平台并行写入，结果仍按 platforms 顺序返回
 // ============================================================
 async function emitAllRules(registry, commands, options = {}) {
-  const { platforms = PLATFORMS } = options;
-  const results = [];
-
-  for (const platform of platforms) {
-    const EmitterClass = EMITTER_REGISTRY[platform];
-    if (!EmitterClass) {
-      continue;
-    }
+  const { platforms = PLATFORMS, concurrency = 1 } = options;
+  const targets = platforms.filter((platform) => EMITTER_REGISTRY[platform]);
 
+  const perPlatform = await mapWithConcurrency(targets, concurrency, async (platform) => {
     try {
-      const emitter = new EmitterClass();
+      const emitter = new EMITTER_REGISTRY[platform]();
       const result = await emitter.emit(registry, commands);
 
       // 处理多文件输出（Antigravity 分块）
       if (Array.isArray(result)) {
-        for (const r of result) {
-          results.push({ platform, ...r });
-        }
-      } else {
-        results.push({ platform, ...result });
+        return result.map((r) => ({ platform, ...r }));
       }
+      return [{ platform, ...result }];
     } catch (error) {
-      results.push({ platform, error: error.message });
+      return [{ platform, error: error.message }];
     }
-  }
+  });
 
-  return results;
+  return perPlatform.flat();
 }
 
 module.exports = {
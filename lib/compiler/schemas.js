@@ -101,7 +101,9 @@ const PromptIRSchema = z.object({
   source: SourceSchema,
   frontmatter: FrontmatterSchema,
   body: z.string(),
-  placeholders: z.array(PlaceholderSchema)
+  placeholders: z.array(PlaceholderSchema),
+  // parser 单次扫描得到的内联 .claude/ 路径；存在时 placeholders 即为完整 token 列表
+  inlinePaths: z.array(z.string()).optional()
 });
 
 // 保留旧导出名，避免外部调用方立即断裂。
@@ -109,17 +111,25 @@ const CommandIRSchema = PromptIRSchema;
 
 // ============================================================
 // ManifestEntrySchema - 单条编译记录
+// v3.0: sourceHash + targetHash (+ targetSize/targetMtimeMs)；v1/v2: hash
 // ============================================================
 const ManifestEntrySchema = z.object({
   source: z.string(),
   target: z.string(),
-  hash: z.string(),
+  hash: z.string().optional(),
+  sourceHash: z.string().optional(),
+  targetHash: z.string().nullable().optional(),
+  targetSize: z.number().optional(),
+  targetMtimeMs: z.number().optional(),
   timestamp: z.string().refine(
     (val) => !isNaN(Date.parse(val)),
     { message: 'timestamp must be a valid ISO 8601 date' }
   ),
   platform: z.enum(['codex', 'cursor', 'qwen', 'antigravity'])
-});
+}).refine(
+  (entry) => entry.hash !== undefined || entry.sourceHash !== undefined,
+  { message: 'entry must record hash (v1/v2) or sourceHash (v3)' }
+);
 
 // ============================================================
 // ManifestSchema - 完整 manifest 文件
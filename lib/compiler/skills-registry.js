@@ -5,12 +5,19 @@
  * - 扫描技能目录提取 SKILL.md frontmatter
  * - 合并 skill-rules.json 触发规则
  * - 输出标准化 SkillRegistry JSON
+ * - 可选 parse cache：未变更 SKILL.md 只需一次 stat
  *
  * Reference: REQ-006/data-model.md#SkillRegistry
  */
 const fs = require('fs');
 const path = require('path');
 const matter = require('gray-matter');
+const {
+  hashContent,
+  lookupParseCache,
+  lookupParseCacheByHash,
+  storeParseCache
+} = require('./parse-cache.js');
 
 // ============================================================
 // Constants
@@ -37,6 +44,20 @@ function normalizeBundledReadPaths(value, skillDir) {
   });
 }
 
+// 记录 reads 归一化时探测过的 bundled 路径，缓存命中前需确认存在性未变化。
+function collectBundledReadProbes(value, skillDir) {
+  return normalizeStringList(value)
+    .filter((entry) => !path.isAbsolute(entry))
+    .map((entry) => {
+      const bundledPath = path.join(skillDir, entry);
+      return { path: bundledPath, exists: fs.existsSync(bundledPath) };
+    });
+}
+
+function bundledReadProbesUnchanged(probes) {
+  return Array.isArray(probes) && probes.every((probe) => fs.existsSync(probe.path) === probe.exists);
+}
+
 function normalizeStringList(value) {
   if (!Array.isArray(value)) {
     return [];
@@ -221,7 +242,8 @@ function generateSkillsRegistry(skillsDir) {
 // ============================================================
 // generateSkillsRegistryV2 - 合并 skill-rules.json + SKILL.md
 // ============================================================
-async function generateSkillsRegistryV2(skillsDir) {
+async function generateSkillsRegistryV2(skillsDir, options = {}) {
+  const { cache = null } = options;
   const absoluteDir = path.resolve(skillsDir);
   const skills = [];
 
@@ -260,7 +282,9 @@ async function generateSkillsRegistryV2(skillsDir) {
     }
 
     try {
-      const skillEntry = parseSkillEntry(entry.name, skillDir, skillMdPath, skillRules);
+      const skillEntry = cache
+        ? parseSkillEntryCached(entry.name, skillDir, skillMdPath, skillRules, cache)
+        : parseSkillEntry(entry.name, skillDir, skillMdPath, skillRules);
       if (skillEntry) {
         skills.push(skillEntry);
       }
@@ -282,25 +306,83 @@ function parseSkillEntry(skillName, _skillDir, skillMdPath, skillRules) {
   // 从 skill-rules.json 获取额外配置
   const ruleConfig = skillRules.skills?.[skillName] || {};
 
+  return buildSkillEntry(skillName, skillMdPath, parsed.data, ruleConfig);
+}
+
+// ============================================================
+// parseSkillEntryCached - 带持久化缓存的技能解析
+// 命中条件: 文件未变 + 对应 skill-rules.json 片段未变 + bundled reads 存在性未变
+// ============================================================
+function parseSkillEntryCached(skillName, skillDir, skillMdPath, skillRules, cache) {
+  const ruleConfig = skillRules.skills?.[skillName] || {};
+  const rulesHash = hashContent(JSON.stringify(ruleConfig));
+  const isValid = (record) => (
+    record &&
+    record.rulesHash === rulesHash &&
+    bundledReadProbesUnchanged(record.probes)
+  );
+
+  const stats = fs.statSync(skillMdPath);
+  const cached = lookupParseCache(cache, 'skill', skillMdPath, stats);
+  if (isValid(cached)) {
+    return hydrateSkillEntry(cached.value);
+  }
+
+  const skillMdContent = fs.readFileSync(skillMdPath, 'utf8');
+  const hash = hashContent(skillMdContent);
+  const sameContent = lookupParseCacheByHash(cache, 'skill', skillMdPath, hash);
+  if (isValid(sameContent)) {
+    storeParseCache(cache, 'skill', skillMdPath, stats, hash, sameContent.value, {
+      rulesHash,
+      probes: sameContent.probes,
+      entryHash: sameContent.entryHash
+    });
+    return hydrateSkillEntry(sameContent.value);
+  }
+
+  const parsed = matter(skillMdContent);
+  const entry = buildSkillEntry(skillName, skillMdPath, parsed.data, ruleConfig);
+  storeParseCache(cache, 'skill', skillMdPath, stats, hash, entry, {
+    rulesHash,
+    probes: collectBundledReadProbes(parsed.data.reads, skillDir),
+    entryHash: hashContent(JSON.stringify(entry))
+  });
+
+  return entry;
+}
+
+// JSON 往返会丢掉值为 undefined 的字段，恢复它们以保持与冷解析一致的条目形状。
+function hydrateSkillEntry(value) {
+  return {
+    ...value,
+    skillClass: value.skillClass,
+    routeFamily: value.routeFamily
+  };
+}
+
+// ============================================================
+// buildSkillEntry - 合并 frontmatter 与 skill-rules 配置
+// ============================================================
+function buildSkillEntry(skillName, skillMdPath, data, ruleConfig) {
   // 合并 SKILL.md frontmatter 与 skill-rules.json
   const entry = {
-    name: parsed.data.name || skillName,
-    description: parsed.data.description || ruleConfig.description || '',
-    type: ruleConfig.type || parsed.data.type || 'utility',
-    skillClass: parsed.data.skill_class,
-    routeFamily: parsed.data.route_family,
+    name: data.name || skillName,
+    description: data.description || ruleConfig.description || '',
+    type: ruleConfig.type || data.type || 'utility',
+    skillClass: data.skill_class,
+    routeFamily: data.route_family,
     enforcement: ruleConfig.enforcement || 'suggest',
     priority: ruleConfig.priority || 'medium',
     skillPath: toRepoRelativePath(skillMdPath),
-    triggers: buildTriggers(ruleConfig, parsed.data.triggers),
-    reads: normalizeBundledReadPaths(parsed.data.reads, path.dirname(skillMdPath)),
-    writes: normalizeWrites(parsed.data.writes),
-    effects: normalizeEffects(parsed.data.effects),
-    entryGate: normalizeStringList(parsed.data.entry_gate),
-    exitCriteria: normalizeStringList(parsed.data.exit_criteria),
-    reroutes: normalizeReroutes(parsed.data.reroutes),
-    recoveryModes: normalizeRecoveryModes(parsed.data.recovery_modes),
-    toolBudget: normalizeToolBudget(parsed.data.tool_budget)
+    triggers: buildTriggers(ruleConfig, data.triggers),
+    reads: normalizeBundledReadPaths(data.reads, path.dirname(skillMdPath)),
+    writes: normalizeWrites(data.writes),
+    effects: normalizeEffects(data.effects),
+    entryGate: normalizeStringList(data.entry_gate),
+    exitCriteria: normalizeStringList(data.exit_criteria),
+    reroutes: normalizeReroutes(data.reroutes),
+    recoveryModes: normalizeRecoveryModes(data.recovery_modes),
+    toolBudget: normalizeToolBudget(data.tool_budget)
   };
 
   return entry;
@@ -0,0 +1,214 @@
+/**
+ * Placeholder Tokenizer & Multi-Pattern Rewriter
+ *
+ * 编译器共享的文本扫描层:
+ * - tokenize(): 单次扫描同时识别 {SCRIPT:*} / {TEMPLATE:*} / {GUIDE:*} /
+ *   {AGENT_SCRIPT} / $ARGUMENTS / 内联 .claude/ 资源路径，按位置顺序返回 token
+ * - compileReplacer(): 把 { 源串 → 目标串 } 编译成 trie，单遍最左最长替换，
+ *   代价与正文长度线性相关，而不是 O(键数 × 正文长度)
+ * - getPathRewriter(): 按 pathMap 对象缓存编译结果，同一平台的所有文件共享一个 trie
+ *
+ * parser 在解析期生成 token 列表并写入 PromptIR，transformer 直接复用。
+ */
+
+// ============================================================
+// Token Patterns
+// ============================================================
+const INLINE_CLAUDE_PATH_SOURCE = '\\.claude\\/(?:scripts|docs\\/templates|docs\\/guides)\\/[^\\s"\'`<>)}\\]]+';
+const TOKEN_PATTERN = new RegExp(
+  `\\{(SCRIPT|TEMPLATE|GUIDE):([^}]+)\\}|\\{AGENT_SCRIPT\\}|\\$ARGUMENTS|${INLINE_CLAUDE_PATH_SOURCE}`,
+  'g'
+);
+const CLAUDE_PREFIX = '.claude/';
+const ARGUMENTS_TOKEN = '$ARGUMENTS';
+
+// ============================================================
+// cleanInlinePath - 清理路径末尾的标点符号
+// ============================================================
+function cleanInlinePath(rawPath) {
+  return rawPath.replace(/[,;:.\s]+$/, '');
+}
+
+// ============================================================
+// tokenize - 单次扫描正文，返回按位置排序的 token
+// 占位符 token: { type, raw, alias?, position }
+// 路径 token:   { type: 'PATH', raw, path, position }
+// ============================================================
+function tokenize(content) {
+  const tokens = [];
+  const pattern = new RegExp(TOKEN_PATTERN.source, 'g');
+  // 路径匹配不吞掉其中的占位符：只前进到 ".claude/" 之后继续扫描，
+  // 同时忽略落在上一条路径内部的路径匹配（与独立路径扫描的结果一致）
+  let pathEnd = -1;
+
+  let match;
+  while ((match = pattern.exec(content)) !== null) {
+    const start = match.index;
+    const end = start + match[0].length;
+    const raw = match[0];
+
+    if (match[1]) {
+      tokens.push({ type: match[1], raw, alias: match[2], position: { start, end } });
+    } else if (raw === '{AGENT_SCRIPT}') {
+      tokens.push({ type: 'AGENT_SCRIPT', raw, position: { start, end } });
+    } else if (raw === ARGUMENTS_TOKEN) {
+      tokens.push({ type: 'ARGUMENTS', raw, position: { start, end } });
+    } else {
+      if (start >= pathEnd) {
+        tokens.push({ type: 'PATH', raw, path: cleanInlinePath(raw), position: { start, end } });
+        pathEnd = end;
+      }
+      pattern.lastIndex = start + CLAUDE_PREFIX.length;
+    }
+  }
+
+  return tokens;
+}
+
+// ============================================================
+// splitTokens - 拆分为占位符列表与去重后的内联路径列表
+// ============================================================
+function splitTokens(tokens) {
+  const placeholders = [];
+  const inlinePaths = new Set();
+
+  for (const token of tokens) {
+    if (token.type === 'PATH') {
+      inlinePaths.add(token.path);
+    } else {
+      placeholders.push(token);
+    }
+  }
+
+  return { placeholders, inlinePaths: Array.from(inlinePaths) };
+}
+
+// ============================================================
+// tokensMatchContent - 校验 token 位置仍与正文一致
+// ============================================================
+function tokensMatchContent(tokens, content) {
+  for (const token of tokens) {
+    const { start, end } = token.position;
+    if (content.slice(start, end) !== token.raw) {
+      return false;
+    }
+  }
+  return true;
+}
+
+// ============================================================
+// compileReplacer - 编译多模式替换器（trie，最左最长匹配）
+// 对于互不以对方内部片段开头的键（如均以 ".claude/" 开头的路径），
+// 结果与"按长度降序逐键 split/join"一致
+// ============================================================
+function compileReplacer(replacements) {
+  const keys = Object.keys(replacements).filter((key) => key.length > 0);
+  if (keys.length === 0) {
+    return (content) => content;
+  }
+
+  const root = new Map();
+  const firstChars = new Set();
+
+  for (const key of keys) {
+    let children = root;
+    let node = null;
+    for (let i = 0; i < key.length; i++) {
+      const code = key.charCodeAt(i);
+      node = children.get(code);
+      if (!node) {
+        node = { children: new Map(), value: undefined };
+        children.set(code, node);
+      }
+      children = node.children;
+    }
+    node.value = replacements[key];
+    firstChars.add(key.charCodeAt(0));
+  }
+
+  return function replace(content) {
+    let output = '';
+    let copiedUntil = 0;
+    let i = 0;
+
+    while (i < content.length) {
+      if (!firstChars.has(content.charCodeAt(i))) {
+        i++;
+        continue;
+      }
+
+      let children = root;
+      let matchEnd = -1;
+      let matchValue;
+      for (let j = i; j < content.length; j++) {
+        const node = children.get(content.charCodeAt(j));
+        if (!node) {
+          break;
+        }
+        if (node.value !== undefined) {
+          matchEnd = j + 1;
+          matchValue = node.value;
+        }
+        children = node.children;
+      }
+
+      if (matchEnd === -1) {
+        i++;
+        continue;
+      }
+
+      output += content.slice(copiedUntil, i) + matchValue;
+      copiedUntil = matchEnd;
+      i = matchEnd;
+    }
+
+    return copiedUntil === 0 ? content : output + content.slice(copiedUntil);
+  };
+}
+
+// ============================================================
+// getPathRewriter - 按 pathMap 缓存编译后的替换器
+// argumentSyntax 非空时同一遍内完成 $ARGUMENTS 映射
+// pathMap 在一次编译期间视为不可变
+// ============================================================
+const rewriterCache = new WeakMap();
+
+function getPathRewriter(pathMap, argumentSyntax = null) {
+  const map = pathMap || {};
+  let byArguments = rewriterCache.get(map);
+  if (!byArguments) {
+    byArguments = new Map();
+    rewriterCache.set(map, byArguments);
+  }
+
+  const cacheKey = argumentSyntax || '';
+  let rewriter = byArguments.get(cacheKey);
+  if (rewriter) {
+    return rewriter;
+  }
+
+  const pathRewriter = compileReplacer(map);
+  if (!argumentSyntax || argumentSyntax === ARGUMENTS_TOKEN) {
+    rewriter = pathRewriter;
+  } else if (Object.keys(map).some((key) => key.includes(ARGUMENTS_TOKEN))) {
+    // 路径键自身包含 $ARGUMENTS 时保持"先映射参数、再重写路径"的两遍语义
+    const argumentRewriter = compileReplacer({ [ARGUMENTS_TOKEN]: argumentSyntax });
+    rewriter = (content) => pathRewriter(argumentRewriter(content));
+  } else {
+    rewriter = compileReplacer({ ...map, [ARGUMENTS_TOKEN]: argumentSyntax });
+  }
+
+  byArguments.set(cacheKey, rewriter);
+  return rewriter;
+}
+
+module.exports = {
+  INLINE_CLAUDE_PATH_SOURCE,
+  TOKEN_PATTERN,
+  tokenize,
+  splitTokens,
+  tokensMatchContent,
+  cleanInlinePath,
+  compileReplacer,
+  getPathRewriter
+};
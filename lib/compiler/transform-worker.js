@@ -0,0 +1,19 @@
+/**
+ * Transform Worker
+ *
+ * worker_threads 入口：在独立线程中执行 transformForPlatform + emitter.format。
+ * 文件写入仍由主线程完成，以保证 manifest 合并顺序确定。
+ */
+const { parentPort, workerData } = require('worker_threads');
+const { formatForPlatform } = require('./pipeline.js');
+
+const pathMaps = (workerData && workerData.pathMaps) || {};
+
+parentPort.on('message', ({ id, ir, platform }) => {
+  try {
+    const result = formatForPlatform(ir, platform, pathMaps[platform] || {});
+    parentPort.postMessage({ id, result });
+  } catch (error) {
+    parentPort.postMessage({ id, error: error.message });
+  }
+});
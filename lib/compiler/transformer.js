@@ -11,10 +11,15 @@
  *   - qwen: {{args}}
  *   - antigravity: [arguments]
  * - Rewrites .claude/ paths to platform-specific paths via pathMap
+ *
+ * transformForPlatform() 是唯一的转换入口：复用 parser 的单次扫描 token 列表
+ * 展开占位符，再用编译好的 trie 一遍完成 $ARGUMENTS 映射与路径重写（tokenizer.js）。
  */
 const fs = require('fs');
 const path = require('path');
 
+const { tokenize, tokensMatchContent, getPathRewriter } = require('./tokenizer.js');
+
 // ============================================================
 // Platform Argument Mapping
 // ============================================================
@@ -27,26 +32,30 @@ const ARGUMENT_MAPPING = {
 
 // ============================================================
 // readFileContent - 读取文件内容，带缓存
+// 缓存按 size + mtime 校验，常驻进程（adapt --watch）中文件变更后自动失效
 // ============================================================
 const fileCache = new Map();
 
 function readFileContent(filePath) {
-  // 检查缓存
-  if (fileCache.has(filePath)) {
-    return fileCache.get(filePath);
-  }
-
   // 解析相对路径
   const absolutePath = path.resolve(process.cwd(), filePath);
 
   try {
     if (!fs.existsSync(absolutePath)) {
+      fileCache.delete(absolutePath);
       console.warn(`Warning: File not found: ${absolutePath}`);
       return `[File not found: ${filePath}]`;
     }
 
+    // 检查缓存
+    const stats = fs.statSync(absolutePath);
+    const cached = fileCache.get(absolutePath);
+    if (cached && cached.size === stats.size && cached.mtimeMs === stats.mtimeMs) {
+      return cached.content;
+    }
+
     const content = fs.readFileSync(absolutePath, 'utf8');
-    fileCache.set(filePath, content);
+    fileCache.set(absolutePath, { content, size: stats.size, mtimeMs: stats.mtimeMs });
     return content;
   } catch (error) {
     console.warn(`Warning: Cannot read file: ${absolutePath} - ${error.message}`);
@@ -62,159 +71,142 @@ function clearFileCache() {
 }
 
 // ============================================================
-// expandScriptPlaceholders - 展开 {SCRIPT:alias} 占位符
-// 智能处理：如果前面已有 bash，则只替换路径；否则加 bash 前缀
+// evictFileCache - 按路径逐出缓存（watch 模式收到变更事件时调用）
 // ============================================================
-function expandScriptPlaceholders(content, scripts) {
-  if (!scripts) return content;
-
-  // 先处理已有 bash 前缀的情况: bash {SCRIPT:xxx} → bash path
-  content = content.replace(/bash\s+\{SCRIPT:([^}]+)\}/g, (match, alias) => {
-    const scriptPath = scripts[alias];
-    if (scriptPath) {
-      return `bash ${scriptPath}`;
-    }
-    return match;
-  });
-
-  // 再处理没有 bash 前缀的情况: {SCRIPT:xxx} → bash path
-  return content.replace(/\{SCRIPT:([^}]+)\}/g, (match, alias) => {
-    const scriptPath = scripts[alias];
-    if (scriptPath) {
-      return `bash ${scriptPath}`;
-    }
-    return match; // 保留原样，由 parser 阶段验证
-  });
+function evictFileCache(filePaths) {
+  for (const filePath of filePaths) {
+    fileCache.delete(path.resolve(process.cwd(), filePath));
+  }
 }
 
 // ============================================================
-// expandTemplatePlaceholders - 展开 {TEMPLATE:alias} 占位符
-// 将占位符替换为模板文件的实际内容
+// resolvePlaceholderTokens - 取得正文 token 列表
+// parser 生成的 IR（带 inlinePaths）且位置仍匹配时直接复用，否则重新扫描
 // ============================================================
-function expandTemplatePlaceholders(content, templates, options = {}) {
-  if (!templates) return content;
-
-  const { inline = false } = options;
-
-  return content.replace(/\{TEMPLATE:([^}]+)\}/g, (match, alias) => {
-    const templatePath = templates[alias];
-    if (templatePath) {
-      if (inline) {
-        // 内联模式：读取文件内容并嵌入
-        const templateContent = readFileContent(templatePath);
-        return `\n<!-- Inlined from: ${templatePath} -->\n${templateContent}\n<!-- End of: ${templatePath} -->\n`;
-      }
-      // 默认模式：返回路径
-      return templatePath;
-    }
-    return match;
-  });
+function resolvePlaceholderTokens(ir) {
+  if (Array.isArray(ir.inlinePaths) && Array.isArray(ir.placeholders)
+    && tokensMatchContent(ir.placeholders, ir.body)) {
+    return ir.placeholders;
+  }
+  return tokenize(ir.body);
 }
 
 // ============================================================
-// expandGuidePlaceholders - 展开 {GUIDE:alias} 占位符
-// 将占位符替换为指南文件的实际内容
+// endsWithBashPrefix - 检查片段是否以 "bash<空白>" 结尾
+// 返回 "bash" 起始下标，不匹配时返回 -1
 // ============================================================
-function expandGuidePlaceholders(content, guides, options = {}) {
-  if (!guides) return content;
-
-  const { inline = false } = options;
-
-  return content.replace(/\{GUIDE:([^}]+)\}/g, (match, alias) => {
-    const guidePath = guides[alias];
-    if (guidePath) {
-      if (inline) {
-        // 内联模式：读取文件内容并嵌入
-        const guideContent = readFileContent(guidePath);
-        return `\n<!-- Inlined from: ${guidePath} -->\n${guideContent}\n<!-- End of: ${guidePath} -->\n`;
-      }
-      // 默认模式：返回路径
-      return guidePath;
-    }
-    return match;
-  });
+function endsWithBashPrefix(segment) {
+  let index = segment.length;
+  while (index > 0 && /\s/.test(segment[index - 1])) {
+    index--;
+  }
+  if (index === segment.length || index < 4 || segment.slice(index - 4, index) !== 'bash') {
+    return -1;
+  }
+  return index - 4;
 }
 
 // ============================================================
-// expandAgentScript - 展开 {AGENT_SCRIPT} 占位符
+// expandTokens - 按 token 单遍展开占位符
+// expandable 控制本层允许展开的类型，保持与逐类替换相同的语义：
+// - 正文: SCRIPT / TEMPLATE / GUIDE / AGENT_SCRIPT
+// - 内联模板: SCRIPT / GUIDE / AGENT_SCRIPT
+// - 内联指南: SCRIPT / AGENT_SCRIPT
 // ============================================================
-function expandAgentScript(content, agentScripts, platform) {
-  if (!agentScripts || !agentScripts.sh) {
-    return content;
-  }
+function expandTokens(content, tokens, context, expandable) {
+  const { frontmatter, platform, inline } = context;
+  let output = '';
+  let cursor = 0;
+
+  for (const token of tokens) {
+    if (!expandable.has(token.type)) {
+      continue;
+    }
 
-  // 替换 __AGENT__ 为平台名称
-  const scriptContent = agentScripts.sh.replace(/__AGENT__/g, platform);
+    const { start, end } = token.position;
+    let segment = content.slice(cursor, start);
+    let replacement = null;
+
+    switch (token.type) {
+      case 'SCRIPT': {
+        const scriptPath = frontmatter.scripts && frontmatter.scripts[token.alias];
+        if (scriptPath) {
+          // 已有 bash 前缀时只替换路径: bash {SCRIPT:xxx} → bash path
+          const bashIndex = endsWithBashPrefix(segment);
+          if (bashIndex !== -1) {
+            segment = segment.slice(0, bashIndex);
+          }
+          replacement = `bash ${scriptPath}`;
+        }
+        break;
+      }
+      case 'TEMPLATE':
+      case 'GUIDE': {
+        const references = token.type === 'TEMPLATE' ? frontmatter.templates : frontmatter.guides;
+        const referencePath = references && references[token.alias];
+        if (referencePath) {
+          replacement = inline
+            ? inlineReference(referencePath, token.type, context)
+            : referencePath;
+        }
+        break;
+      }
+      case 'AGENT_SCRIPT': {
+        const agentScripts = frontmatter.agent_scripts;
+        if (agentScripts && agentScripts.sh) {
+          replacement = agentScripts.sh.replace(/__AGENT__/g, platform);
+        }
+        break;
+      }
+      default:
+        break;
+    }
 
-  // 展开 {AGENT_SCRIPT}
-  return content.replace(/\{AGENT_SCRIPT\}/g, scriptContent);
-}
+    if (replacement === null) {
+      continue; // 保留原样，由 parser 阶段验证
+    }
 
-// ============================================================
-// mapArguments - 映射 $ARGUMENTS 到平台语法
-// ============================================================
-function mapArguments(content, platform) {
-  const targetSyntax = ARGUMENT_MAPPING[platform];
-  if (!targetSyntax || targetSyntax === '$ARGUMENTS') {
-    return content;
+    output += segment + replacement;
+    cursor = end;
   }
 
-  return content.replace(/\$ARGUMENTS/g, targetSyntax);
+  return cursor === 0 ? content : output + content.slice(cursor);
 }
 
 // ============================================================
-// rewritePaths - 重写内容中的 .claude/ 路径为平台路径
+// inlineReference - 内联模板/指南内容，并展开其中的下游占位符
 // ============================================================
-function rewritePaths(content, pathMap) {
-  if (!pathMap || Object.keys(pathMap).length === 0) {
-    return content;
-  }
+const TEMPLATE_INLINE_TYPES = new Set(['SCRIPT', 'GUIDE', 'AGENT_SCRIPT']);
+const GUIDE_INLINE_TYPES = new Set(['SCRIPT', 'AGENT_SCRIPT']);
 
-  let result = content;
-
-  // 按路径长度降序排序，避免短路径替换长路径的部分
-  const sortedPaths = Object.keys(pathMap).sort((a, b) => b.length - a.length);
-
-  for (const sourcePath of sortedPaths) {
-    const targetPath = pathMap[sourcePath];
-    // 全局替换
-    result = result.split(sourcePath).join(targetPath);
-  }
-
-  return result;
+function inlineReference(referencePath, type, context) {
+  const referenceContent = readFileContent(referencePath);
+  const expandable = type === 'TEMPLATE' ? TEMPLATE_INLINE_TYPES : GUIDE_INLINE_TYPES;
+  const expanded = expandTokens(referenceContent, tokenize(referenceContent), context, expandable);
+  return `\n<!-- Inlined from: ${referencePath} -->\n${expanded}\n<!-- End of: ${referencePath} -->\n`;
 }
 
 // ============================================================
 // transformForPlatform - 主转换函数
 // ============================================================
-function transformForPlatform(ir, platform, options = {}) {
-  let body = ir.body;
+const BODY_EXPANDABLE_TYPES = new Set(['SCRIPT', 'TEMPLATE', 'GUIDE', 'AGENT_SCRIPT']);
 
-  // 默认关闭内联，保持引用（仅替换为路径）
-  const inlineOptions = { inline: options.inline === true };
+function transformForPlatform(ir, platform, options = {}) {
   const pathMap = options.pathMap || {};
+  const context = {
+    frontmatter: ir.frontmatter,
+    platform,
+    // 默认关闭内联，保持引用（仅替换为路径）
+    inline: options.inline === true
+  };
 
-  // 1. 展开 {SCRIPT:alias} - 第一轮
-  body = expandScriptPlaceholders(body, ir.frontmatter.scripts);
-
-  // 2. 展开 {TEMPLATE:alias} - 内联模板内容
-  body = expandTemplatePlaceholders(body, ir.frontmatter.templates, inlineOptions);
-
-  // 3. 展开 {GUIDE:alias} - 内联指南内容
-  body = expandGuidePlaceholders(body, ir.frontmatter.guides, inlineOptions);
-
-  // 4. 递归展开内联内容中的 {SCRIPT:alias}
-  // 模板/指南中可能也包含 {SCRIPT:xxx}，需要用原始 frontmatter 的 scripts 展开
-  body = expandScriptPlaceholders(body, ir.frontmatter.scripts);
-
-  // 5. 展开 {AGENT_SCRIPT}
-  body = expandAgentScript(body, ir.frontmatter.agent_scripts, platform);
-
-  // 6. 映射 $ARGUMENTS
-  body = mapArguments(body, platform);
+  // 1. 单遍展开 {SCRIPT} / {TEMPLATE} / {GUIDE} / {AGENT_SCRIPT}
+  const tokens = resolvePlaceholderTokens(ir);
+  let body = expandTokens(ir.body, tokens, context, BODY_EXPANDABLE_TYPES);
 
-  // 7. 重写 .claude/ 路径为平台路径
-  body = rewritePaths(body, pathMap);
+  // 2. 单遍映射 $ARGUMENTS 并重写 .claude/ 路径为平台路径
+  const argumentSyntax = ARGUMENT_MAPPING[platform] || null;
+  body = getPathRewriter(pathMap, argumentSyntax)(body);
 
   return {
     body,
@@ -224,13 +216,8 @@ function transformForPlatform(ir, platform, options = {}) {
 
 module.exports = {
   transformForPlatform,
-  expandScriptPlaceholders,
-  expandTemplatePlaceholders,
-  expandGuidePlaceholders,
-  expandAgentScript,
-  mapArguments,
-  rewritePaths,
   readFileContent,
   clearFileCache,
+  evictFileCache,
   ARGUMENT_MAPPING
 };
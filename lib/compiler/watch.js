@@ -0,0 +1,539 @@
+/**
+ * Watch Mode - adapt --watch
+ *
+ * 常驻编译器，按依赖图做增量重建:
+ * - 首次运行完整 compile()，随后保留 parse cache / mirror state / manifest / IR / registry
+ * - fs.watch 监听 skills、commands、scripts、templates、guides 目录
+ * - 反向依赖图: 资源文件 → 引用它的命令；skill 目录与 reads → skill；
+ *   skill-rules.json → registry + 规则入口文件
+ * - 变更事件经防抖合并后，只重建受影响的 (file × platform) 输出、资源镜像、
+ *   registry 条目与规则文件
+ * - 变更路径会从 transformer 的文件缓存中逐出
+ * - 删除的命令源会移除其各平台产物与 manifest 条目
+ * - --no-cache 时不读写磁盘缓存，会话内存中的缓存仍用于增量重建
+ */
+const fs = require('fs');
+const path = require('path');
+
+const {
+  compile,
+  PLATFORMS,
+  buildSkillManifestEntries,
+  summarizeCommands,
+  getDistributedCodexSkillNames,
+  saveManagedCodexSkills
+} = require('./index.js');
+const { parsePromptFileCached } = require('./parser.js');
+const { evictFileCache } = require('./transformer.js');
+const { runCompileTasks, normalizeJobs } = require('./pipeline.js');
+const {
+  collectReferencedResources,
+  copyResourcesForPlatform,
+  extractScriptPath,
+  mapPathToPlatform,
+  mirrorSkillDirectoriesForPlatform
+} = require('./resource-copier.js');
+const { generateSkillsRegistryV2, writeSkillsRegistry } = require('./skills-registry.js');
+const { emitAllRules } = require('./rules-emitters/index.js');
+const {
+  loadManifest,
+  saveManifest,
+  setEntries,
+  removeOrphanedTargets,
+  migrateToV3,
+  replaceSkillEntries,
+  addRulesEntry,
+  MANIFEST_PATH
+} = require('./manifest.js');
+const {
+  createParseCache,
+  loadParseCache,
+  saveParseCache,
+  PARSE_CACHE_PATH
+} = require('./parse-cache.js');
+const {
+  createMirrorState,
+  loadMirrorState,
+  saveMirrorState,
+  MIRROR_STATE_PATH
+} = require('./file-mirror.js');
+
+const WATCH_DEBOUNCE_MS = 50;
+
+const RESOURCE_DIRS = [
+  '.claude/scripts',
+  '.claude/docs/templates',
+  '.claude/docs/guides'
+];
+
+function isWithin(parentDir, filePath) {
+  const relative = path.relative(parentDir, filePath);
+  return relative !== '' && !relative.startsWith('..') && !path.isAbsolute(relative);
+}
+
+function toRepoRelativePath(absolutePath) {
+  return path.relative(process.cwd(), absolutePath).split(path.sep).join('/');
+}
+
+function addDependent(graph, filePath, node) {
+  const absolutePath = path.resolve(filePath);
+  if (!graph.has(absolutePath)) {
+    graph.set(absolutePath, new Set());
+  }
+  graph.get(absolutePath).add(node);
+}
+
+// ============================================================
+// buildDependencyGraph - 构建反向依赖图
+// 返回 Map<绝对路径, Set<节点>>，节点为 "command:<绝对路径>" 或 "skill:<名称>"
+// ============================================================
+function buildDependencyGraph(promptIrs, registry, skillsDir) {
+  const graph = new Map();
+
+  for (const ir of promptIrs) {
+    const node = `command:${ir.source.path}`;
+    const fm = ir.frontmatter || {};
+
+    addDependent(graph, ir.source.path, node);
+    for (const group of [fm.scripts, fm.templates, fm.guides]) {
+      for (const resourcePath of Object.values(group || {})) {
+        addDependent(graph, resourcePath, node);
+      }
+    }
+
+    const agentScriptPath = fm.agent_scripts ? extractScriptPath(fm.agent_scripts.sh) : null;
+    if (agentScriptPath) {
+      addDependent(graph, agentScriptPath, node);
+    }
+
+    for (const inlinePath of ir.inlinePaths || []) {
+      addDependent(graph, inlinePath, node);
+    }
+  }
+
+  const absoluteSkillsDir = path.resolve(skillsDir);
+  for (const skill of registry?.skills || []) {
+    const skillDir = path.join(absoluteSkillsDir, skill.name);
+    const node = `skill:${skill.name}`;
+
+    // reads 可能指向 skill 目录之外；目录内文件按路径前缀归属，无需逐个登记
+    for (const entry of skill.reads || []) {
+      const readPath = path.isAbsolute(entry) ? entry : path.resolve(entry);
+      if (!isWithin(skillDir, readPath)) {
+        addDependent(graph, readPath, node);
+      }
+    }
+  }
+
+  return graph;
+}
+
+// ============================================================
+// classifyChanges - 将变更路径映射到受影响的构建单元
+// ============================================================
+function classifyChanges(changedPaths, graph, layout) {
+  const affected = {
+    commands: new Set(),
+    resources: new Set(),
+    skills: new Set(),
+    registry: false,
+    rules: false
+  };
+  const skillRulesPath = path.join(layout.skillsDir, 'skill-rules.json');
+
+  for (const changedPath of changedPaths) {
+    const absolutePath = path.resolve(changedPath);
+
+    if (absolutePath === skillRulesPath) {
+      affected.registry = true;
+      affected.rules = true;
+    } else if (isWithin(layout.skillsDir, absolutePath)) {
+      const skillName = path.relative(layout.skillsDir, absolutePath).split(path.sep)[0];
+      if (!skillName.startsWith('_')) {
+        affected.skills.add(skillName);
+        affected.registry = true;
+      }
+    }
+
+    if (isWithin(layout.commandsDir, absolutePath) && absolutePath.endsWith('.md')) {
+      affected.commands.add(absolutePath);
+    }
+
+    if (layout.resourceDirs.some((dir) => isWithin(dir, absolutePath))) {
+      affected.resources.add(toRepoRelativePath(absolutePath));
+    }
+
+    for (const node of graph.get(absolutePath) || []) {
+      if (node.startsWith('command:')) {
+        affected.commands.add(node.slice('command:'.length));
+      } else if (node.startsWith('skill:')) {
+        affected.skills.add(node.slice('skill:'.length));
+        affected.registry = true;
+      }
+    }
+  }
+
+  return affected;
+}
+
+function buildPathMaps(promptIrs, platforms) {
+  const resources = collectReferencedResources(promptIrs);
+  const allResources = [...resources.scripts, ...resources.templates, ...resources.guides];
+  const pathMaps = {};
+
+  for (const platform of platforms) {
+    pathMaps[platform] = {};
+    for (const sourcePath of allResources) {
+      pathMaps[platform][sourcePath] = mapPathToPlatform(sourcePath, platform);
+    }
+  }
+
+  return { pathMaps, referenced: new Set(allResources) };
+}
+
+function sortedIrs(irsByPath) {
+  return Array.from(irsByPath.keys()).sort().map((filePath) => irsByPath.get(filePath));
+}
+
+// ============================================================
+// createWatchSession - 常驻编译状态与增量重建
+// ============================================================
+async function createWatchSession(options = {}) {
+  const {
+    commandsDir = '.claude/commands/',
+    skillsDir = '.claude/skills/',
+    outputBaseDir = '.',
+    platforms = PLATFORMS,
+    verbose = false,
+    jobs = 1,
+    linkMode = 'copy',
+    cache = true
+  } = options;
+  const concurrency = normalizeJobs(jobs);
+  // 常驻会话期间 cwd 可能被改变，skillPath 始终按会话开始时的仓库根解析
+  const repoRoot = process.cwd();
+
+  // 1. 首次完整编译（cache 开启时同时把缓存写盘）
+  const initial = await compile({ ...options, check: false, cache });
+
+  // 2. 载入常驻状态（缓存全部命中，仅 stat）
+  // --no-cache 时不读写磁盘缓存，仅在会话内存中保留本次解析结果
+  const manifestPath = path.join(outputBaseDir, MANIFEST_PATH);
+  const parseCachePath = path.join(outputBaseDir, PARSE_CACHE_PATH);
+  const mirrorStatePath = path.join(outputBaseDir, MIRROR_STATE_PATH);
+  const manifest = migrateToV3(await loadManifest(manifestPath));
+  const parseCache = cache ? await loadParseCache(parseCachePath) : createParseCache();
+  const mirrorState = cache ? await loadMirrorState(mirrorStatePath) : createMirrorState();
+
+  const layout = {
+    commandsDir: path.resolve(commandsDir),
+    skillsDir: path.resolve(skillsDir),
+    resourceDirs: RESOURCE_DIRS.map((dir) => path.resolve(dir))
+  };
+
+  const irsByPath = new Map();
+  if (fs.existsSync(layout.commandsDir)) {
+    for (const file of fs.readdirSync(layout.commandsDir)) {
+      if (!file.endsWith('.md')) {
+        continue;
+      }
+      const filePath = path.join(layout.commandsDir, file);
+      try {
+        irsByPath.set(filePath, parsePromptFileCached(filePath, parseCache));
+      } catch {
+        // 首次编译已报告解析错误；修复后由变更事件重新解析
+      }
+    }
+  }
+
+  let registry = await generateSkillsRegistryV2(skillsDir, { cache: parseCache });
+  let graph = buildDependencyGraph(sortedIrs(irsByPath), registry, skillsDir);
+
+  // 删除的命令源：移除各平台产物与 manifest 条目，避免残留到下次完整 adapt
+  async function pruneCommandOutputs(commandPath, errors) {
+    const sourceRelative = path.relative(outputBaseDir, commandPath);
+    const orphaned = platforms.flatMap((platform) => setEntries(manifest, sourceRelative, platform, []));
+    return removeOrphanedTargets(orphaned, errors);
+  }
+
+  // ----------------------------------------------------------
+  // rebuild() - 处理一批变更路径
+  // ----------------------------------------------------------
+  async function rebuild(changedPaths) {
+    const startedAt = process.hrtime.bigint();
+    const summary = { compiled: 0, removed: 0, resourcesCopied: 0, skillsMirrored: 0, rules: 0, errors: [] };
+
+    evictFileCache(changedPaths);
+    const affected = classifyChanges(changedPaths, graph, layout);
+    const previousCommands = JSON.stringify(summarizeCommands(sortedIrs(irsByPath)));
+
+    // 重新解析受影响的命令文件（依赖变化的命令 IR 不变，只需重编译）
+    for (const commandPath of affected.commands) {
+      if (!isWithin(layout.commandsDir, commandPath)) {
+        continue;
+      }
+      if (!fs.existsSync(commandPath)) {
+        irsByPath.delete(commandPath);
+        summary.removed += await pruneCommandOutputs(commandPath, summary.errors);
+        continue;
+      }
+      try {
+        irsByPath.set(commandPath, parsePromptFileCached(commandPath, parseCache));
+      } catch (error) {
+        irsByPath.delete(commandPath);
+        summary.errors.push(error.message);
+      }
+    }
+
+    const promptIrs = sortedIrs(irsByPath);
+    const { pathMaps, referenced } = buildPathMaps(promptIrs, platforms);
+
+    // 资源镜像: 变更的资源 + 受影响命令新引用的资源
+    const resourcesToCopy = new Set(
+      Array.from(affected.resources).filter((resourcePath) => referenced.has(resourcePath))
+    );
+    const affectedIrs = promptIrs.filter((ir) => affected.commands.has(ir.source.path));
+    const affectedResources = collectReferencedResources(affectedIrs);
+    for (const group of Object.values(affectedResources)) {
+      group.forEach((resourcePath) => resourcesToCopy.add(resourcePath));
+    }
+
+    if (resourcesToCopy.size > 0) {
+      const resources = { scripts: Array.from(resourcesToCopy), templates: [], guides: [] };
+      const copyResults = await Promise.all(platforms.map((platform) =>
+        copyResourcesForPlatform(resources, platform, { verbose, state: mirrorState, linkMode })
+      ));
+      for (const copyResult of copyResults) {
+        summary.resourcesCopied += copyResult.copied;
+        for (const error of copyResult.errors) {
+          summary.errors.push(`Resource ${error.source}: ${error.error}`);
+        }
+      }
+    }
+
+    // 重编译受影响的 (file × platform)
+    const tasks = [];
+    for (const ir of affectedIrs) {
+      for (const platform of platforms) {
+        tasks.push({ ir, platform, sourceRelative: path.relative(outputBaseDir, ir.source.path) });
+      }
+    }
+    const outcomes = await runCompileTasks(tasks, { jobs: concurrency, pathMaps });
+    const orphaned = [];
+    for (const outcome of outcomes) {
+      const { ir, platform, sourceRelative } = outcome.task;
+      if (outcome.error) {
+        summary.errors.push(`${ir.source.filename} -> ${platform}: ${outcome.error.message}`);
+        continue;
+      }
+      orphaned.push(...setEntries(manifest, sourceRelative, platform, outcome.entries));
+      summary.compiled++;
+    }
+    summary.removed += await removeOrphanedTargets(orphaned, summary.errors);
+
+    // registry 与 Codex skill 镜像
+    let rulesNeeded = affected.rules ||
+      previousCommands !== JSON.stringify(summarizeCommands(promptIrs));
+
+    if (affected.registry) {
+      const previousRegistry = JSON.stringify(registry.skills);
+      registry = await generateSkillsRegistryV2(skillsDir, { cache: parseCache });
+      if (JSON.stringify(registry.skills) !== previousRegistry) {
+        await writeSkillsRegistry(registry);
+        replaceSkillEntries(manifest, buildSkillManifestEntries(registry, parseCache, repoRoot));
+        rulesNeeded = true;
+      }
+
+      if (platforms.includes('codex')) {
+        const distributed = getDistributedCodexSkillNames(registry);
+        const skillNames = distributed.filter((name) => affected.skills.has(name));
+        if (skillNames.length > 0) {
+          const mirrorResult = await mirrorSkillDirectoriesForPlatform(skillsDir, 'codex', skillNames, {
+            verbose,
+            state: mirrorState,
+            linkMode
+          });
+          summary.skillsMirrored += mirrorResult.copied;
+          for (const error of mirrorResult.errors) {
+            summary.errors.push(`Codex skill mirror ${error.skill}: ${error.error}`);
+          }
+        }
+        await saveManagedCodexSkills(distributed);
+      }
+    }
+
+    // 规则入口文件
+    if (rulesNeeded) {
+      const rulesResults = await emitAllRules(registry, summarizeCommands(promptIrs), {
+        platforms,
+        concurrency
+      });
+      for (const ruleResult of rulesResults) {
+        if (ruleResult.error) {
+          summary.errors.push(`Rules ${ruleResult.platform}: ${ruleResult.error}`);
+          continue;
+        }
+        addRulesEntry(manifest, ruleResult.platform, {
+          path: ruleResult.path,
+          hash: ruleResult.hash,
+          timestamp: ruleResult.timestamp
+        });
+        summary.rules++;
+      }
+    }
+
+    graph = buildDependencyGraph(promptIrs, registry, skillsDir);
+
+    manifest.generatedAt = new Date().toISOString();
+    await saveManifest(manifest, manifestPath);
+    if (cache) {
+      try {
+        await saveParseCache(parseCache, parseCachePath, { prune: false });
+        await saveMirrorState(mirrorState, mirrorStatePath);
+      } catch (error) {
+        summary.errors.push(`Cache: ${error.message}`);
+      }
+    }
+
+    summary.elapsedMs = Number(process.hrtime.bigint() - startedAt) / 1e6;
+    return summary;
+  }
+
+  return {
+    initial,
+    layout,
+    rebuild,
+    getGraph: () => graph
+  };
+}
+
+// ============================================================
+// watchDirectory - fs.watch 递归监听，不支持时逐目录监听
+// ============================================================
+function watchDirectory(rootDir, onChange) {
+  const watchers = new Map();
+
+  const watchOne = (dir, recursive) => {
+    if (watchers.has(dir)) {
+      return;
+    }
+    try {
+      const watcher = fs.watch(dir, { recursive }, (eventType, filename) => {
+        const changedPath = filename ? path.join(dir, filename.toString()) : dir;
+        if (!recursive && eventType === 'rename') {
+          // 新建子目录需要补充监听
+          try {
+            if (fs.statSync(changedPath).isDirectory()) {
+              watchTree(changedPath);
+            }
+          } catch {
+            // 已删除
+          }
+        }
+        onChange(changedPath);
+      });
+      watchers.set(dir, watcher);
+    } catch (error) {
+      if (recursive && error.code === 'ERR_FEATURE_UNAVAILABLE_ON_PLATFORM') {
+        watchTree(dir);
+        return;
+      }
+      throw error;
+    }
+  };
+
+  const watchTree = (dir) => {
+    watchOne(dir, false);
+    for (const entry of fs.readdirSync(dir, { withFileTypes: true })) {
+      if (entry.isDirectory()) {
+        watchTree(path.join(dir, entry.name));
+      }
+    }
+  };
+
+  watchOne(rootDir, true);
+
+  return () => {
+    for (const watcher of watchers.values()) {
+      watcher.close();
+    }
+    watchers.clear();
+  };
+}
+
+// ============================================================
+// watchCompile - adapt --watch 入口
+// ============================================================
+async function watchCompile(options = {}) {
+  const {
+    debounceMs = WATCH_DEBOUNCE_MS,
+    log = console.log,
+    logError = console.error
+  } = options;
+  const session = await createWatchSession(options);
+
+  const watchRoots = [
+    session.layout.skillsDir,
+    session.layout.commandsDir,
+    ...session.layout.resourceDirs
+  ].filter((dir) => fs.existsSync(dir));
+
+  let pending = new Set();
+  let timer = null;
+  let running = Promise.resolve();
+
+  const flush = () => {
+    timer = null;
+    const batch = Array.from(pending);
+    pending = new Set();
+
+    // 串行处理批次，避免两次重建交错写 manifest
+    running = running.then(async () => {
+      try {
+        const summary = await session.rebuild(batch);
+        log(
+          `Rebuilt in ${summary.elapsedMs.toFixed(1)}ms: ` +
+          `${summary.compiled} outputs, ${summary.resourcesCopied} resources, ` +
+          `${summary.skillsMirrored} skill files, ${summary.rules} rules`
+        );
+        for (const error of summary.errors) {
+          logError(`  - ${error}`);
+        }
+      } catch (error) {
+        logError(`Watch rebuild failed: ${error.message}`);
+      }
+    });
+  };
+
+  const onChange = (changedPath) => {
+    pending.add(changedPath);
+    if (timer) {
+      clearTimeout(timer);
+    }
+    timer = setTimeout(flush, debounceMs);
+  };
+
+  const closers = watchRoots.map((dir) => watchDirectory(dir, onChange));
+  log(`Watching ${watchRoots.map(toRepoRelativePath).join(', ')}`);
+
+  return {
+    initial: session.initial,
+    rebuild: session.rebuild,
+    async close() {
+      if (timer) {
+        clearTimeout(timer);
+        flush();
+      }
+      closers.forEach((close) => close());
+      await running;
+    }
+  };
+}
+
+module.exports = {
+  WATCH_DEBOUNCE_MS,
+  buildDependencyGraph,
+  classifyChanges,
+  createWatchSession,
+  watchCompile
+};
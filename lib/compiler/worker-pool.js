@@ -0,0 +1,143 @@
+/**
+ * Transform Worker Pool
+ *
+ * worker_threads 池，把 CPU 密集的 transform/format 移出主线程:
+ * - 每个 worker 启动时通过 workerData 接收一次 pathMaps，避免逐任务复制
+ * - run({ ir, platform }) 返回 emitter.format() 的结果（字符串或拆分数组）
+ * - worker 崩溃时拒绝其在途任务并补充新 worker
+ */
+const path = require('path');
+const { Worker } = require('worker_threads');
+
+const WORKER_SCRIPT = path.join(__dirname, 'transform-worker.js');
+
+class TransformWorkerPool {
+  constructor({ size, pathMaps = {} }) {
+    this.size = Math.max(1, size);
+    this.pathMaps = pathMaps;
+    this.workers = [];
+    this.idle = [];
+    this.queue = [];
+    this.nextId = 0;
+    this.closed = false;
+
+    for (let i = 0; i < this.size; i++) {
+      this.spawnWorker();
+    }
+  }
+
+  // ----------------------------------------------------------
+  // spawnWorker() - 创建 worker 并挂接消息处理
+  // ----------------------------------------------------------
+  spawnWorker() {
+    const worker = new Worker(WORKER_SCRIPT, {
+      workerData: { pathMaps: this.pathMaps }
+    });
+    worker.current = null;
+
+    worker.on('message', (message) => {
+      const job = worker.current;
+      worker.current = null;
+
+      if (job) {
+        if (message.error) {
+          job.reject(new Error(message.error));
+        } else {
+          job.resolve(message.result);
+        }
+      }
+
+      this.release(worker);
+    });
+
+    worker.on('error', (error) => {
+      this.retire(worker, error);
+    });
+
+    worker.on('exit', (code) => {
+      if (!this.closed && code !== 0) {
+        this.retire(worker, new Error(`Transform worker exited with code ${code}`));
+      }
+    });
+
+    this.workers.push(worker);
+    this.idle.push(worker);
+    return worker;
+  }
+
+  // ----------------------------------------------------------
+  // retire() - 移除异常 worker，拒绝在途任务并补位
+  // ----------------------------------------------------------
+  retire(worker, error) {
+    if (!this.workers.includes(worker)) {
+      return;
+    }
+
+    this.workers = this.workers.filter((candidate) => candidate !== worker);
+    this.idle = this.idle.filter((candidate) => candidate !== worker);
+
+    if (worker.current) {
+      worker.current.reject(error);
+      worker.current = null;
+    }
+
+    if (!this.closed) {
+      this.release(this.spawnWorker());
+    }
+  }
+
+  // ----------------------------------------------------------
+  // release() - worker 空闲后领取下一个排队任务
+  // ----------------------------------------------------------
+  release(worker) {
+    const job = this.queue.shift();
+    if (!job) {
+      if (!this.idle.includes(worker)) {
+        this.idle.push(worker);
+      }
+      return;
+    }
+
+    this.idle = this.idle.filter((candidate) => candidate !== worker);
+    worker.current = job;
+    worker.postMessage({ id: job.id, ir: job.payload.ir, platform: job.payload.platform });
+  }
+
+  // ----------------------------------------------------------
+  // run() - 提交一个 transform/format 任务
+  // ----------------------------------------------------------
+  run(payload) {
+    if (this.closed) {
+      return Promise.reject(new Error('Transform worker pool is closed'));
+    }
+
+    return new Promise((resolve, reject) => {
+      this.queue.push({ id: this.nextId++, payload, resolve, reject });
+
+      const worker = this.idle.shift();
+      if (worker) {
+        this.release(worker);
+      }
+    });
+  }
+
+  // ----------------------------------------------------------
+  // close() - 终止全部 worker
+  // ----------------------------------------------------------
+  async close() {
+    this.closed = true;
+
+    for (const job of this.queue.splice(0)) {
+      job.reject(new Error('Transform worker pool is closed'));
+    }
+
+    await Promise.all(this.workers.map((worker) => worker.terminate()));
+    this.workers = [];
+    this.idle = [];
+  }
+}
+
+module.exports = {
+  TransformWorkerPool,
+  WORKER_SCRIPT
+};
@@ -0,0 +1,74 @@
+/**
+ * Concurrency Helpers
+ *
+ * 编译器与 skill runtime 共用的有界并发工具（无其他依赖，可被任意子命令加载）:
+ * - mapWithConcurrency(): 按输入顺序返回结果的有界并行 map
+ * - createLimiter(): 跨调用共享的并发闸门（递归遍历时限制总 I/O 数）
+ * - DEFAULT_IO_CONCURRENCY: 文件 I/O 默认并发上限
+ */
+
+// 过高的并发只会争抢文件描述符与 libuv 线程池（默认 4 线程）
+const DEFAULT_IO_CONCURRENCY = 16;
+
+// ============================================================
+// mapWithConcurrency - 有界并行 map，结果顺序与输入一致
+// ============================================================
+async function mapWithConcurrency(items, limit, mapper) {
+  const list = Array.from(items);
+  const results = new Array(list.length);
+  const workerCount = Math.max(1, Math.min(Number(limit) || 1, list.length));
+  let nextIndex = 0;
+
+  async function worker() {
+    while (nextIndex < list.length) {
+      const index = nextIndex++;
+      results[index] = await mapper(list[index], index);
+    }
+  }
+
+  const workers = [];
+  for (let i = 0; i < workerCount; i++) {
+    workers.push(worker());
+  }
+  await Promise.all(workers);
+
+  return results;
+}
+
+// ============================================================
+// createLimiter - 共享并发闸门，limit(fn) 在名额可用时执行 fn
+// ============================================================
+function createLimiter(limit = DEFAULT_IO_CONCURRENCY) {
+  const maxActive = Math.max(1, Number(limit) || 1);
+  const waiting = [];
+  let active = 0;
+
+  function next() {
+    if (active >= maxActive || waiting.length === 0) {
+      return;
+    }
+
+    active++;
+    const { fn, resolve, reject } = waiting.shift();
+    Promise.resolve()
+      .then(fn)
+      .then(resolve, reject)
+      .finally(() => {
+        active--;
+        next();
+      });
+  }
+
+  return function limitConcurrency(fn) {
+    return new Promise((resolve, reject) => {
+      waiting.push({ fn, resolve, reject });
+      next();
+    });
+  };
+}
+
+module.exports = {
+  DEFAULT_IO_CONCURRENCY,
+  mapWithConcurrency,
+  createLimiter
+};
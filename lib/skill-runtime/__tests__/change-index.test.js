@@ -0,0 +1,169 @@
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const { spawn, execFileSync } = require('child_process');
+
+const {
+  CHANGES_INDEX_PATH,
+  getActiveChangeKeys,
+  getArchivedChanges,
+  withAllocationLock,
+  clearChangeIndexMemo
+} = require('../change-index');
+const { nextChangeKey } = require('../paths');
+const { archiveChange, restoreChange } = require('../archive-change');
+
+const PATHS_MODULE = path.resolve(__dirname, '../paths.js');
+
+function makeTempRepo() {
+  const repoRoot = fs.mkdtempSync(path.join(os.tmpdir(), 'cc-devflow-change-index-'));
+  fs.mkdirSync(path.join(repoRoot, 'devflow', 'changes'), { recursive: true });
+  return repoRoot;
+}
+
+// 把目录 mtime 推出 racy 窗口，模拟跨会话复用的稳定索引
+function settle(dirPath) {
+  const past = new Date(Date.now() - 60 * 60 * 1000);
+  fs.utimesSync(dirPath, past, past);
+}
+
+function allocateInChild(repoRoot, description) {
+  const script = `
+    const { nextChangeKey } = require(${JSON.stringify(PATHS_MODULE)});
+    process.stdout.write(nextChangeKey(${JSON.stringify(repoRoot)}, 'REQ', ${JSON.stringify(description)}).changeId);
+  `;
+
+  return new Promise((resolve, reject) => {
+    const child = spawn(process.execPath, ['-e', script], { stdio: ['ignore', 'pipe', 'inherit'] });
+    let stdout = '';
+    child.stdout.on('data', (chunk) => { stdout += chunk; });
+    child.on('error', reject);
+    child.on('close', (code) => (code === 0 ? resolve(stdout) : reject(new Error(`exit ${code}`))));
+  });
+}
+
+describe('change index', () => {
+  let repoRoot;
+
+  beforeEach(() => {
+    clearChangeIndexMemo();
+    repoRoot = makeTempRepo();
+  });
+
+  afterEach(() => {
+    fs.rmSync(repoRoot, { recursive: true, force: true });
+  });
+
+  test('reuses the persisted listing until the changes directory changes', () => {
+    const changesRoot = path.join(repoRoot, 'devflow', 'changes');
+    fs.mkdirSync(path.join(changesRoot, 'REQ-001-first'));
+    settle(changesRoot);
+
+    expect(getActiveChangeKeys(repoRoot)).toEqual(['REQ-001-first']);
+
+    // 篡改持久化索引：mtime 未变时应直接信任索引，而不是重新 readdir
+    const indexPath = path.join(repoRoot, CHANGES_INDEX_PATH);
+    const stored = JSON.parse(fs.readFileSync(indexPath, 'utf8'));
+    stored.active.keys.push('REQ-999-sentinel');
+    fs.writeFileSync(indexPath, JSON.stringify(stored));
+    clearChangeIndexMemo();
+    expect(getActiveChangeKeys(repoRoot)).toEqual(['REQ-001-first', 'REQ-999-sentinel']);
+
+    fs.mkdirSync(path.join(changesRoot, 'REQ-002-second'));
+    expect(getActiveChangeKeys(repoRoot)).toEqual(['REQ-001-first', 'REQ-002-second']);
+  });
+
+  test('tracks archive and restore moves', () => {
+    fs.mkdirSync(path.join(repoRoot, 'devflow', 'changes', 'REQ-004-move'));
+
+    const { archived, month } = archiveChange(repoRoot, 'REQ-004-move');
+    expect(getActiveChangeKeys(repoRoot)).toEqual(['archive']);
+    expect(getArchivedChanges(repoRoot).map((entry) => [entry.month, entry.changeKey]))
+      .toEqual([[month, 'REQ-004-move']]);
+
+    restoreChange(repoRoot, archived);
+    expect(getActiveChangeKeys(repoRoot)).toEqual(['REQ-004-move', 'archive']);
+    expect(getArchivedChanges(repoRoot)).toEqual([]);
+  });
+
+  test('does not reuse numbers of archived changes', () => {
+    fs.mkdirSync(path.join(repoRoot, 'devflow', 'changes', 'archive', '2026-03', 'REQ-041-old'), { recursive: true });
+
+    expect(nextChangeKey(repoRoot, 'REQ', 'new work').changeId).toBe('REQ-042');
+  });
+
+  test('returns the same key for repeated calls and previews', () => {
+    expect(nextChangeKey(repoRoot, 'REQ', 'first', { reserve: false }).changeKey).toBe('REQ-001-first');
+    expect(nextChangeKey(repoRoot, 'REQ', 'first', { reserve: false }).changeKey).toBe('REQ-001-first');
+    expect(nextChangeKey(repoRoot, 'REQ', 'first').changeKey).toBe('REQ-001-first');
+    expect(nextChangeKey(repoRoot, 'REQ', 'first').changeKey).toBe('REQ-001-first');
+    expect(nextChangeKey(repoRoot, 'REQ', 'first', { reserve: false }).changeKey).toBe('REQ-001-first');
+  });
+
+  test('reserves numbers by default until the change appears or the reservation expires', () => {
+    expect(nextChangeKey(repoRoot, 'REQ', 'first').changeId).toBe('REQ-001');
+    expect(nextChangeKey(repoRoot, 'REQ', 'second', { reserve: false }).changeId).toBe('REQ-002');
+    expect(nextChangeKey(repoRoot, 'REQ', 'second').changeId).toBe('REQ-002');
+    expect(nextChangeKey(repoRoot, 'REQ', 'third', { reserve: false }).changeId).toBe('REQ-003');
+    expect(nextChangeKey(repoRoot, 'FIX', 'bug', { reserve: false }).changeId).toBe('FIX-001');
+
+    // 目录出现后预留被兑现，不再重复占号
+    fs.mkdirSync(path.join(repoRoot, 'devflow', 'changes', 'REQ-001-first'));
+    nextChangeKey(repoRoot, 'REQ', 'second');
+    const allocationsPath = path.join(repoRoot, 'devflow', '.generated', 'change-allocations.json');
+    const stored = JSON.parse(fs.readFileSync(allocationsPath, 'utf8'));
+    expect(stored.reservations.map((entry) => entry.changeId)).toEqual(['REQ-002']);
+
+    // 过期预留释放编号
+    stored.reservations[0].expiresAt = Date.now() - 1;
+    fs.writeFileSync(allocationsPath, JSON.stringify(stored));
+    expect(nextChangeKey(repoRoot, 'REQ', 'other').changeId).toBe('REQ-002');
+  });
+
+  test('gives separate worktrees distinct keys for the same description', () => {
+    const git = (cwd, ...args) => execFileSync('git', args, { cwd, stdio: 'ignore' });
+    git(repoRoot, 'init', '-q');
+    git(repoRoot, '-c', 'user.name=t', '-c', 'user.email=t@t', 'commit', '-q', '--allow-empty', '-m', 'init');
+    const worktree = path.join(repoRoot, '..', `${path.basename(repoRoot)}-wt`);
+    git(repoRoot, 'worktree', 'add', '-q', '--detach', worktree);
+    try {
+      fs.mkdirSync(path.join(worktree, 'devflow', 'changes'), { recursive: true });
+
+      expect(nextChangeKey(repoRoot, 'REQ', 'same work').changeId).toBe('REQ-001');
+      expect(nextChangeKey(worktree, 'REQ', 'same work').changeId).toBe('REQ-002');
+    } finally {
+      fs.rmSync(worktree, { recursive: true, force: true });
+    }
+  });
+
+  test('breaks a lock left by a dead process but waits for a live holder', () => {
+    const lockPath = path.join(repoRoot, 'devflow', '.generated', 'change-allocations.json.lock');
+    fs.mkdirSync(path.dirname(lockPath), { recursive: true });
+
+    fs.writeFileSync(lockPath, '999999999-dead');
+    expect(withAllocationLock(repoRoot, () => 'acquired')).toBe('acquired');
+    expect(fs.existsSync(lockPath)).toBe(false);
+
+    fs.writeFileSync(lockPath, `${process.pid}-live`);
+    expect(() => withAllocationLock(repoRoot, () => 'acquired', { timeoutMs: 100 }))
+      .toThrow(/Timed out waiting for change allocation lock/);
+    expect(fs.readFileSync(lockPath, 'utf8')).toBe(`${process.pid}-live`);
+  });
+
+  test('keeps allocation locks out of repos without devflow', () => {
+    const bareRoot = fs.mkdtempSync(path.join(os.tmpdir(), 'cc-devflow-no-devflow-'));
+    try {
+      expect(nextChangeKey(bareRoot, 'REQ', 'outside').changeId).toBe('REQ-001');
+      expect(fs.readdirSync(bareRoot)).toEqual([]);
+    } finally {
+      fs.rmSync(bareRoot, { recursive: true, force: true });
+    }
+  });
+
+  test('hands out distinct numbers to concurrent allocators', async () => {
+    const ids = await Promise.all(Array.from({ length: 6 }, (_, i) => allocateInChild(repoRoot, `parallel ${i}`)));
+
+    expect(new Set(ids).size).toBe(6);
+    expect(ids.slice().sort()).toEqual(['REQ-001', 'REQ-002', 'REQ-003', 'REQ-004', 'REQ-005', 'REQ-006']);
+  }, 30000);
+});
@@ -0,0 +1,104 @@
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+
+const { runCommand } = require('../store');
+const { resolvePackageGates, runGates } = require('../gates');
+
+function node(script) {
+  return `${JSON.stringify(process.execPath)} -e ${JSON.stringify(script)}`;
+}
+
+describe('gate runner', () => {
+  let tmpDir;
+
+  beforeEach(() => {
+    tmpDir = fs.mkdtempSync(path.join(os.tmpdir(), 'cc-devflow-gates-'));
+  });
+
+  afterEach(() => {
+    fs.rmSync(tmpDir, { recursive: true, force: true });
+  });
+
+  test('runs gates concurrently and appends per-gate timings', async () => {
+    const timingsPath = path.join(tmpDir, 'timings.jsonl');
+    const gates = ['lint', 'typecheck', 'test'].map((name) => ({
+      name,
+      command: node('setTimeout(() => {}, 400)')
+    }));
+
+    const report = await runGates(gates, { cwd: tmpDir, concurrency: 3, timingsPath });
+
+    expect(report.ok).toBe(true);
+    expect(report.gates.map((gate) => gate.name)).toEqual(['lint', 'typecheck', 'test']);
+    expect(report.wallMs).toBeLessThan(1000);
+
+    const lines = fs.readFileSync(timingsPath, 'utf8').trim().split('\n').map((line) => JSON.parse(line));
+    expect(lines.map((line) => line.gate).sort()).toEqual(['lint', 'test', 'typecheck']);
+    for (const line of lines) {
+      expect(line.ok).toBe(true);
+      expect(line.wallMs).toBeGreaterThan(0);
+      expect(typeof line.cpuUserMs).toBe('number');
+    }
+  }, 30000);
+
+  test('keeps only the output tail and spills the full log', async () => {
+    const report = await runGates([{
+      name: 'noisy test',
+      command: node("for (let i = 0; i < 20000; i++) console.log('line ' + i)")
+    }], { cwd: tmpDir, maxOutputBytes: 1024, spillDir: path.join(tmpDir, 'logs') });
+
+    const [gate] = report.gates;
+    expect(gate.truncated).toBe(true);
+    expect(Buffer.byteLength(gate.stdout)).toBeLessThan(1025);
+    expect(gate.stdout.endsWith('line 19999\n')).toBe(true);
+    expect(fs.statSync(gate.spillPath).size).toBe(gate.outputBytes);
+    expect(path.basename(gate.spillPath)).toBe('noisy-test.log');
+  }, 30000);
+
+  test('kills the whole process group on timeout', async () => {
+    // 后台 sleep 继承 stdout；只有整组被终止，管道关闭才会早于 30s
+    const result = await runCommand('sleep 30 & wait', { cwd: tmpDir, timeoutMs: 300 });
+
+    expect(result.killedByTimeout).toBe(true);
+    expect(result.durationMs).toBeLessThan(5000);
+  }, 30000);
+
+  test('decodes a truncated CJK tail without replacement characters', async () => {
+    const result = await runCommand(node("process.stdout.write('门禁输出'.repeat(1000))"), {
+      cwd: tmpDir,
+      maxOutputBytes: 1000
+    });
+
+    expect(result.truncated).toBe(true);
+    expect(result.stdout.includes('\uFFFD')).toBe(false);
+    expect(result.stdout.endsWith('门禁输出')).toBe(true);
+  });
+
+  test('does not wait for backgrounded daemons that left the output pipes', async () => {
+    const result = await runCommand('sleep 3 > /dev/null 2>&1 &', { cwd: tmpDir, stream: true });
+
+    expect(result.code).toBe(0);
+    expect(result.durationMs).toBeLessThan(2000);
+  });
+
+  test('shares one signal handler across concurrent commands', async () => {
+    const baseline = process.listenerCount('SIGINT');
+    const pending = Array.from({ length: 4 }, () => runCommand('sleep 0.2', { cwd: tmpDir }));
+
+    expect(process.listenerCount('SIGINT')).toBe(baseline + 1);
+    await Promise.all(pending);
+    expect(process.listenerCount('SIGINT')).toBe(baseline);
+  });
+
+  test('resolves gates from package.json scripts', async () => {
+    fs.writeFileSync(path.join(tmpDir, 'package.json'), JSON.stringify({
+      scripts: { test: 'jest', lint: 'eslint .', build: 'tsc' }
+    }));
+
+    const gates = await resolvePackageGates(tmpDir);
+
+    expect(gates.map((gate) => gate.name)).toEqual(['lint', 'test']);
+    expect(gates[0].command).toBe('npm run --silent lint');
+  });
+});
@@ -1,6 +1,11 @@
 const fs = require('fs');
 const path = require('path');
 const { getChangesRoot } = require('./paths.js');
+const {
+  getArchivedChanges,
+  recordArchivedChange,
+  recordRestoredChange
+} = require('./change-index.js');
 
 function getArchiveRoot(repoRoot) {
   return path.join(getChangesRoot(repoRoot), 'archive');
@@ -24,6 +29,7 @@ function archiveChange(repoRoot, changeKey) {
   }
 
   fs.renameSync(changeDir, dest);
+  recordArchivedChange(repoRoot, changeKey, month);
   return { archived: dest, month };
 }
 
@@ -42,23 +48,12 @@ function restoreChange(repoRoot, archivedPath) {
 
   fs.mkdirSync(changesRoot, { recursive: true });
   fs.renameSync(archivedPath, dest);
+  recordRestoredChange(repoRoot, changeKey, path.basename(path.dirname(archivedPath)));
   return { restored: dest, changeKey };
 }
 
 function listArchived(repoRoot) {
-  const archiveRoot = getArchiveRoot(repoRoot);
-  if (!fs.existsSync(archiveRoot)) return [];
-
-  const results = [];
-  for (const month of fs.readdirSync(archiveRoot, { withFileTypes: true })) {
-    if (!month.isDirectory()) continue;
-    const monthDir = path.join(archiveRoot, month.name);
-    for (const entry of fs.readdirSync(monthDir, { withFileTypes: true })) {
-      if (!entry.isDirectory()) continue;
-      results.push({ month: month.name, changeKey: entry.name, path: path.join(monthDir, entry.name) });
-    }
-  }
-  return results;
+  return getArchivedChanges(repoRoot);
 }
 
 module.exports = { archiveChange, restoreChange, listArchived, getArchiveRoot };
@@ -0,0 +1,567 @@
+/**
+ * [INPUT]: 依赖 fs/os/path/crypto/child_process，接收 repoRoot 与 change key/month。
+ * [OUTPUT]: 对外提供 devflow/changes 的持久化索引（活跃 key、归档月份、分支/worktree 占用）
+ *           与跨 worktree 的编号分配锁及带有效期的编号预留。
+ * [POS]: skill runtime 的 change 目录索引层，替代每次调用的目录扫描与 git 子进程。
+ * [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+ */
+
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const crypto = require('crypto');
+const { spawnSync } = require('child_process');
+const { getDevflowRoot, getChangesRoot } = require('./paths');
+
+const CHANGES_INDEX_PATH = path.join('devflow', '.generated', 'changes-index.json');
+const CHANGES_INDEX_VERSION = 1;
+const ALLOCATIONS_FILE = 'change-allocations.json';
+
+// mtime 与记录时间过近时，同一时钟周期内的二次修改无法区分，下次读取需重新列目录
+const RACY_WINDOW_MS = 2000;
+
+const LOCK_TIMEOUT_MS = 10000;
+const LOCK_RETRY_MS = 20;
+
+// 预留编号的有效期：足够调用方创建目录或分支，放弃的编号到期后回收
+const RESERVATION_TTL_MS = 15 * 60 * 1000;
+
+// repoRoot → 已校验的索引（同一进程内避免重复读取 JSON）
+const memo = new Map();
+
+function getArchiveRoot(repoRoot) {
+  return path.join(getChangesRoot(repoRoot), 'archive');
+}
+
+function getIndexPath(repoRoot) {
+  return path.join(repoRoot, CHANGES_INDEX_PATH);
+}
+
+function mtimeOrNull(targetPath) {
+  try {
+    return fs.statSync(targetPath).mtimeMs;
+  } catch {
+    return null;
+  }
+}
+
+function isRacy(mtimeMs) {
+  return mtimeMs !== null && Date.now() - mtimeMs < RACY_WINDOW_MS;
+}
+
+function listDirectoryNames(dirPath) {
+  try {
+    return fs.readdirSync(dirPath, { withFileTypes: true })
+      .filter((entry) => entry.isDirectory())
+      .map((entry) => entry.name)
+      .sort();
+  } catch {
+    return [];
+  }
+}
+
+function writeJsonAtomic(filePath, value) {
+  fs.mkdirSync(path.dirname(filePath), { recursive: true });
+  const tempPath = `${filePath}.${process.pid}.tmp`;
+  fs.writeFileSync(tempPath, `${JSON.stringify(value, null, 2)}\n`, 'utf8');
+  fs.renameSync(tempPath, filePath);
+}
+
+function readJsonOrNull(filePath) {
+  try {
+    return JSON.parse(fs.readFileSync(filePath, 'utf8'));
+  } catch {
+    return null;
+  }
+}
+
+// ============================================================
+// Git layout - 定位 git 目录（兼容 worktree 的 .git 文件）
+// ============================================================
+function findGitDirs(repoRoot) {
+  let current = path.resolve(repoRoot);
+
+  while (true) {
+    const dotGit = path.join(current, '.git');
+    let stats = null;
+    try {
+      stats = fs.statSync(dotGit);
+    } catch {
+      stats = null;
+    }
+
+    if (stats) {
+      let gitDir = dotGit;
+      if (stats.isFile()) {
+        const match = fs.readFileSync(dotGit, 'utf8').match(/^gitdir:\s*(.+)$/m);
+        if (!match) {
+          return null;
+        }
+        gitDir = path.resolve(current, match[1].trim());
+      }
+
+      let commonDir = gitDir;
+      const commonDirFile = path.join(gitDir, 'commondir');
+      if (fs.existsSync(commonDirFile)) {
+        commonDir = path.resolve(gitDir, fs.readFileSync(commonDirFile, 'utf8').trim());
+      }
+
+      return { gitDir, commonDir };
+    }
+
+    const parent = path.dirname(current);
+    if (parent === current) {
+      return null;
+    }
+    current = parent;
+  }
+}
+
+function collectDirectoryMtimes(dirPath, output) {
+  const mtimeMs = mtimeOrNull(dirPath);
+  output.push([dirPath, mtimeMs]);
+  if (mtimeMs === null) {
+    return;
+  }
+
+  for (const name of listDirectoryNames(dirPath)) {
+    collectDirectoryMtimes(path.join(dirPath, name), output);
+  }
+}
+
+// 分支增删会改动 refs/heads 下某一层目录或 packed-refs；worktree 增删/移动会改动 worktrees/
+function computeGitSignature(gitDirs) {
+  const { commonDir } = gitDirs;
+  const entries = [[path.join(commonDir, 'packed-refs'), mtimeOrNull(path.join(commonDir, 'packed-refs'))]];
+
+  collectDirectoryMtimes(path.join(commonDir, 'refs', 'heads'), entries);
+
+  const worktreesDir = path.join(commonDir, 'worktrees');
+  entries.push([worktreesDir, mtimeOrNull(worktreesDir)]);
+  for (const name of listDirectoryNames(worktreesDir)) {
+    const gitdirFile = path.join(worktreesDir, name, 'gitdir');
+    entries.push([gitdirFile, mtimeOrNull(gitdirFile)]);
+  }
+
+  return {
+    signature: entries.map(([entryPath, mtimeMs]) => `${path.relative(commonDir, entryPath)}:${mtimeMs}`).join('|'),
+    racy: entries.some(([, mtimeMs]) => isRacy(mtimeMs))
+  };
+}
+
+function listGitChangeRefs(repoRoot) {
+  const result = spawnSync(
+    'git',
+    ['for-each-ref', '--format=%(refname:short)', 'refs/heads'],
+    { cwd: repoRoot, encoding: 'utf8' }
+  );
+
+  if (result.status !== 0) {
+    return [];
+  }
+
+  return result.stdout
+    .split('\n')
+    .map((line) => line.trim())
+    .filter(Boolean);
+}
+
+function listGitWorktreeChangeKeys(repoRoot) {
+  const result = spawnSync(
+    'git',
+    ['worktree', 'list', '--porcelain'],
+    { cwd: repoRoot, encoding: 'utf8' }
+  );
+
+  if (result.status !== 0) {
+    return [];
+  }
+
+  return result.stdout
+    .split('\n')
+    .filter((line) => line.startsWith('worktree '))
+    .map((line) => path.basename(path.dirname(line.slice('worktree '.length))))
+    .filter(Boolean);
+}
+
+// ============================================================
+// Index persistence
+// ============================================================
+function createEmptyIndex() {
+  return {
+    version: CHANGES_INDEX_VERSION,
+    active: null,
+    archive: null,
+    git: null
+  };
+}
+
+function loadIndex(repoRoot) {
+  const key = path.resolve(repoRoot);
+  if (memo.has(key)) {
+    return memo.get(key);
+  }
+
+  const stored = readJsonOrNull(getIndexPath(repoRoot));
+  const index = stored && stored.version === CHANGES_INDEX_VERSION
+    ? { ...createEmptyIndex(), ...stored }
+    : createEmptyIndex();
+  memo.set(key, index);
+  return index;
+}
+
+function saveIndex(repoRoot, index) {
+  // 不为未使用 devflow 的仓库创建目录
+  if (!fs.existsSync(getDevflowRoot(repoRoot))) {
+    return;
+  }
+
+  try {
+    writeJsonAtomic(getIndexPath(repoRoot), {
+      version: index.version,
+      active: index.active,
+      archive: index.archive,
+      git: index.git
+    });
+  } catch {
+    // 索引只是加速手段；写入失败时下次重新扫描
+  }
+}
+
+// ============================================================
+// Section refresh - 每段独立校验，只重建失效部分
+// ============================================================
+function refreshActive(repoRoot, index) {
+  const mtimeMs = mtimeOrNull(getChangesRoot(repoRoot));
+  const section = index.active;
+
+  if (section && !section.racy && section.mtimeMs === mtimeMs) {
+    return false;
+  }
+
+  index.active = {
+    mtimeMs,
+    racy: isRacy(mtimeMs),
+    keys: mtimeMs === null ? [] : listDirectoryNames(getChangesRoot(repoRoot))
+  };
+  return true;
+}
+
+function refreshArchive(repoRoot, index) {
+  const archiveRoot = getArchiveRoot(repoRoot);
+  const mtimeMs = mtimeOrNull(archiveRoot);
+  const previous = index.archive && index.archive.mtimeMs === mtimeMs && !index.archive.racy
+    ? index.archive.months
+    : null;
+  const monthNames = previous ? Object.keys(previous) : listDirectoryNames(archiveRoot);
+
+  let changed = !previous;
+  const months = {};
+  for (const month of monthNames) {
+    const monthDir = path.join(archiveRoot, month);
+    const monthMtimeMs = mtimeOrNull(monthDir);
+    const cached = previous ? previous[month] : null;
+
+    if (cached && !cached.racy && cached.mtimeMs === monthMtimeMs) {
+      months[month] = cached;
+      continue;
+    }
+
+    changed = true;
+    months[month] = {
+      mtimeMs: monthMtimeMs,
+      racy: isRacy(monthMtimeMs),
+      keys: listDirectoryNames(monthDir)
+    };
+  }
+
+  if (changed) {
+    index.archive = { mtimeMs, racy: isRacy(mtimeMs), months };
+  }
+  return changed;
+}
+
+function refreshGit(repoRoot, index) {
+  const gitDirs = findGitDirs(repoRoot);
+  if (!gitDirs) {
+    const changed = index.git === null || index.git.signature !== null;
+    index.git = { signature: null, racy: false, branches: [], worktrees: [] };
+    return changed;
+  }
+
+  const { signature, racy } = computeGitSignature(gitDirs);
+  if (index.git && !index.git.racy && index.git.signature === signature) {
+    return false;
+  }
+
+  index.git = {
+    signature,
+    racy,
+    branches: listGitChangeRefs(repoRoot),
+    worktrees: listGitWorktreeChangeKeys(repoRoot)
+  };
+  return true;
+}
+
+const REFRESHERS = {
+  active: refreshActive,
+  archive: refreshArchive,
+  git: refreshGit
+};
+
+function getIndexSections(repoRoot, sections) {
+  const index = loadIndex(repoRoot);
+  let changed = false;
+  for (const section of sections) {
+    changed = REFRESHERS[section](repoRoot, index) || changed;
+  }
+  if (changed) {
+    saveIndex(repoRoot, index);
+  }
+  return index;
+}
+
+// ============================================================
+// Queries
+// ============================================================
+const idMaps = new WeakMap();
+
+function toChangeId(name) {
+  const match = String(name).match(/^(req|fix)-(\d+)(?=-|$)/i);
+  return match ? `${match[1].toUpperCase()}-${match[2]}` : null;
+}
+
+function getActiveChangeKeys(repoRoot) {
+  return getIndexSections(repoRoot, ['active']).active.keys;
+}
+
+// 活跃 key 按 change ID（大小写归一）分组；同一 keys 数组只建一次
+function findActiveChangeKeysById(repoRoot, changeId) {
+  const keys = getActiveChangeKeys(repoRoot);
+  let byId = idMaps.get(keys);
+  if (!byId) {
+    byId = new Map();
+    for (const key of keys) {
+      const id = toChangeId(key);
+      if (id) {
+        if (!byId.has(id)) {
+          byId.set(id, []);
+        }
+        byId.get(id).push(key);
+      }
+    }
+    idMaps.set(keys, byId);
+  }
+  return byId.get(toChangeId(changeId)) || [];
+}
+
+function getArchivedChanges(repoRoot) {
+  const archiveRoot = getArchiveRoot(repoRoot);
+  const { months } = getIndexSections(repoRoot, ['archive']).archive;
+
+  return Object.keys(months).sort().flatMap((month) =>
+    months[month].keys.map((changeKey) => ({
+      month,
+      changeKey,
+      path: path.join(archiveRoot, month, changeKey)
+    }))
+  );
+}
+
+function getGitOccupancy(repoRoot) {
+  const { branches, worktrees } = getIndexSections(repoRoot, ['git']).git;
+  return { branches, worktrees };
+}
+
+// ============================================================
+// Updates - archive/restore 后直接修补索引
+// 刚改动的目录必然落在 racy 窗口内，下次读取仍会重新列目录确认
+// ============================================================
+function patchKeys(section, dirPath, update) {
+  const keys = new Set(section.keys);
+  update(keys);
+  const mtimeMs = mtimeOrNull(dirPath);
+  return { mtimeMs, racy: isRacy(mtimeMs), keys: Array.from(keys).sort() };
+}
+
+function recordArchivedChange(repoRoot, changeKey, month) {
+  const index = getIndexSections(repoRoot, ['active', 'archive']);
+  const archiveRoot = getArchiveRoot(repoRoot);
+
+  index.active = patchKeys(index.active, getChangesRoot(repoRoot), (keys) => keys.delete(changeKey));
+  const monthSection = index.archive.months[month] || { keys: [] };
+  const archiveMtimeMs = mtimeOrNull(archiveRoot);
+  index.archive = {
+    mtimeMs: archiveMtimeMs,
+    racy: isRacy(archiveMtimeMs),
+    months: {
+      ...index.archive.months,
+      [month]: patchKeys(monthSection, path.join(archiveRoot, month), (keys) => keys.add(changeKey))
+    }
+  };
+  saveIndex(repoRoot, index);
+}
+
+function recordRestoredChange(repoRoot, changeKey, month) {
+  const index = getIndexSections(repoRoot, ['active', 'archive']);
+  const archiveRoot = getArchiveRoot(repoRoot);
+
+  index.active = patchKeys(index.active, getChangesRoot(repoRoot), (keys) => keys.add(changeKey));
+  if (month && index.archive.months[month]) {
+    index.archive = {
+      ...index.archive,
+      months: {
+        ...index.archive.months,
+        [month]: patchKeys(index.archive.months[month], path.join(archiveRoot, month), (keys) => keys.delete(changeKey))
+      }
+    };
+  }
+  saveIndex(repoRoot, index);
+}
+
+// ============================================================
+// Allocation - 编号预留与跨 worktree 锁
+// 存放在 git common dir，所有 worktree 共享；非 git 仓库退回 devflow/.generated，
+// 未使用 devflow 的目录则放到系统临时目录，不污染用户工作树
+// ============================================================
+function getAllocationDir(repoRoot) {
+  const gitDirs = findGitDirs(repoRoot);
+  if (gitDirs) {
+    return path.join(gitDirs.commonDir, 'cc-devflow');
+  }
+  if (fs.existsSync(getDevflowRoot(repoRoot))) {
+    return path.dirname(getIndexPath(repoRoot));
+  }
+
+  const repoId = crypto.createHash('sha256').update(path.resolve(repoRoot)).digest('hex').slice(0, 16);
+  return path.join(os.tmpdir(), 'cc-devflow-locks', repoId);
+}
+
+function sleepSync(ms) {
+  Atomics.wait(new Int32Array(new SharedArrayBuffer(4)), 0, 0, ms);
+}
+
+function createLockToken() {
+  return `${process.pid}-${crypto.randomBytes(6).toString('hex')}`;
+}
+
+function readLockOwner(lockPath) {
+  try {
+    return fs.readFileSync(lockPath, 'utf8').trim() || null;
+  } catch {
+    return null;
+  }
+}
+
+function isPidAlive(pid) {
+  try {
+    process.kill(pid, 0);
+    return true;
+  } catch (error) {
+    return error.code !== 'ESRCH';
+  }
+}
+
+// 先写完整 token 再 link 成锁文件：锁要么不存在，要么带有可判定的持有者
+function tryAcquireLock(lockPath, token) {
+  const tempPath = `${lockPath}.${token}.tmp`;
+  fs.writeFileSync(tempPath, token, 'utf8');
+  try {
+    fs.linkSync(tempPath, lockPath);
+    return true;
+  } catch (error) {
+    if (error.code === 'EEXIST') {
+      return false;
+    }
+    throw error;
+  } finally {
+    fs.rmSync(tempPath, { force: true });
+  }
+}
+
+// 只回收持有进程已退出的锁；rename 到唯一路径后复核持有者，
+// 若其间已被其他等待者接管，则把活锁原样放回
+function breakDeadLock(lockPath) {
+  const owner = readLockOwner(lockPath);
+  const pid = owner ? Number.parseInt(owner, 10) : NaN;
+  if (!Number.isInteger(pid) || pid <= 0 || isPidAlive(pid)) {
+    return;
+  }
+
+  const movedPath = `${lockPath}.${createLockToken()}.dead`;
+  try {
+    fs.renameSync(lockPath, movedPath);
+  } catch {
+    return;
+  }
+
+  if (readLockOwner(movedPath) !== owner) {
+    try {
+      fs.linkSync(movedPath, lockPath);
+    } catch {
+      // 锁已被重新获取，移走的副本直接丢弃
+    }
+  }
+  fs.rmSync(movedPath, { force: true });
+}
+
+function withAllocationLock(repoRoot, fn, options = {}) {
+  const { timeoutMs = LOCK_TIMEOUT_MS } = options;
+  const allocationDir = getAllocationDir(repoRoot);
+  const lockPath = path.join(allocationDir, `${ALLOCATIONS_FILE}.lock`);
+  const token = createLockToken();
+  const deadline = Date.now() + timeoutMs;
+
+  fs.mkdirSync(allocationDir, { recursive: true });
+
+  while (!tryAcquireLock(lockPath, token)) {
+    breakDeadLock(lockPath);
+    if (Date.now() > deadline) {
+      throw new Error(`Timed out waiting for change allocation lock: ${lockPath}`);
+    }
+    sleepSync(LOCK_RETRY_MS);
+  }
+
+  try {
+    return fn(path.join(allocationDir, ALLOCATIONS_FILE));
+  } finally {
+    if (readLockOwner(lockPath) === token) {
+      fs.rmSync(lockPath, { force: true });
+    }
+  }
+}
+
+// 尚未出现目录/分支的预留编号；过期预留直接忽略
+function readReservations(allocationsPath) {
+  const stored = readJsonOrNull(allocationsPath);
+  const now = Date.now();
+  return stored && Array.isArray(stored.reservations)
+    ? stored.reservations.filter((entry) => entry && entry.expiresAt > now)
+    : [];
+}
+
+function writeReservations(allocationsPath, reservations) {
+  writeJsonAtomic(allocationsPath, {
+    version: CHANGES_INDEX_VERSION,
+    reservations
+  });
+}
+
+function clearChangeIndexMemo() {
+  memo.clear();
+}
+
+module.exports = {
+  CHANGES_INDEX_PATH,
+  getActiveChangeKeys,
+  findActiveChangeKeysById,
+  getArchivedChanges,
+  getGitOccupancy,
+  recordArchivedChange,
+  recordRestoredChange,
+  withAllocationLock,
+  RESERVATION_TTL_MS,
+  readReservations,
+  writeReservations,
+  clearChangeIndexMemo
+};
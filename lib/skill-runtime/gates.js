@@ -0,0 +1,118 @@
+/**
+ * [INPUT]: 依赖 store.runCommand/appendJsonl/getPackageScripts 与共享的 mapWithConcurrency。
+ * [OUTPUT]: 对外提供质量门禁（lint/typecheck/test 等）的并行执行与逐门禁计时遥测。
+ * [POS]: skill runtime 的门禁执行层，让机械门禁总耗时趋近最慢的一项而非逐项相加。
+ * [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+ */
+
+const os = require('os');
+const path = require('path');
+const {
+  nowIso,
+  appendJsonl,
+  runCommand,
+  getPackageScripts,
+  DEFAULT_MAX_OUTPUT_BYTES
+} = require('./store');
+const { mapWithConcurrency } = require('../concurrency');
+
+const DEFAULT_GATE_SCRIPTS = ['lint', 'typecheck', 'test'];
+const DEFAULT_GATE_TIMEOUT_MS = 10 * 60 * 1000;
+
+// ============================================================
+// getDefaultGateConcurrency - CPU 感知的并发上限
+// test/typecheck 自身常再开 worker，按一半 CPU 并行避免过度订阅
+// ============================================================
+function getDefaultGateConcurrency() {
+  const cpus = typeof os.availableParallelism === 'function'
+    ? os.availableParallelism()
+    : (os.cpus().length || 1);
+  return Math.max(1, Math.floor(cpus / 2));
+}
+
+// ============================================================
+// resolvePackageGates - 从 package.json scripts 选出存在的门禁
+// ============================================================
+async function resolvePackageGates(repoRoot, scriptNames = DEFAULT_GATE_SCRIPTS) {
+  const scripts = await getPackageScripts(repoRoot);
+
+  return scriptNames
+    .filter((name) => typeof scripts[name] === 'string')
+    .map((name) => ({ name, command: `npm run --silent ${name}`, cwd: repoRoot }));
+}
+
+function toSpillName(name) {
+  return `${String(name).replace(/[^A-Za-z0-9._-]+/g, '-') || 'gate'}.log`;
+}
+
+// ============================================================
+// runGates - 并行执行门禁，结果按输入顺序返回
+// ============================================================
+async function runGates(gates, options = {}) {
+  const {
+    cwd = process.cwd(),
+    concurrency = getDefaultGateConcurrency(),
+    timeoutMs = DEFAULT_GATE_TIMEOUT_MS,
+    maxOutputBytes = DEFAULT_MAX_OUTPUT_BYTES,
+    spillDir = null,
+    timingsPath = null
+  } = options;
+
+  const startedAt = Date.now();
+  // 串行化 JSONL 追加，并发完成的门禁不会交错写入同一行
+  let telemetry = Promise.resolve();
+
+  const results = await mapWithConcurrency(gates, concurrency, async (gate) => {
+    const gateStartedAt = nowIso();
+    const result = await runCommand(gate.command, {
+      cwd: gate.cwd || cwd,
+      env: gate.env || {},
+      timeoutMs: gate.timeoutMs !== undefined ? gate.timeoutMs : timeoutMs,
+      maxOutputBytes,
+      spillPath: spillDir ? path.join(spillDir, toSpillName(gate.name)) : null
+    });
+
+    const entry = {
+      name: gate.name,
+      command: gate.command,
+      ok: result.code === 0 && !result.killedByTimeout,
+      ...result,
+      startedAt: gateStartedAt,
+      finishedAt: nowIso()
+    };
+
+    if (timingsPath) {
+      telemetry = telemetry.then(() => appendJsonl(timingsPath, {
+        gate: entry.name,
+        command: entry.command,
+        ok: entry.ok,
+        code: entry.code,
+        killedByTimeout: entry.killedByTimeout,
+        wallMs: entry.durationMs,
+        cpuUserMs: entry.cpu ? entry.cpu.userMs : null,
+        cpuSystemMs: entry.cpu ? entry.cpu.systemMs : null,
+        outputBytes: entry.outputBytes,
+        startedAt: entry.startedAt,
+        finishedAt: entry.finishedAt
+      }));
+    }
+
+    return entry;
+  });
+
+  await telemetry;
+
+  return {
+    ok: results.every((entry) => entry.ok),
+    wallMs: Date.now() - startedAt,
+    gates: results
+  };
+}
+
+module.exports = {
+  DEFAULT_GATE_SCRIPTS,
+  DEFAULT_GATE_TIMEOUT_MS,
+  getDefaultGateConcurrency,
+  resolvePackageGates,
+  runGates
+};
@@ -1,13 +1,11 @@
 /**
- * [INPUT]: 依赖 fs/path，接收 repoRoot/changeId 等定位参数。
+ * [INPUT]: 依赖 path 与 change-index，接收 repoRoot/changeId 等定位参数。
  * [OUTPUT]: 对外提供 devflow canonical change layout 的唯一路径解析能力。
  * [POS]: skill runtime 的路径真相源，完整 change key 才是目录身份。
  * [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
  */
 
-const fs = require('fs');
 const path = require('path');
-const { spawnSync } = require('child_process');
 
 const CHANGE_ID_PATTERN = /^(REQ|FIX)-\d+(?:-[a-z0-9-]+)?$/;
 
@@ -71,51 +69,9 @@ function getChangesRoot(repoRoot) {
   return path.join(getDevflowRoot(repoRoot), 'changes');
 }
 
-function listChangeKeys(repoRoot) {
-  const changesRoot = getChangesRoot(repoRoot);
-  if (!fs.existsSync(changesRoot)) {
-    return [];
-  }
-
-  return fs.readdirSync(changesRoot, { withFileTypes: true })
-    .filter((entry) => entry.isDirectory())
-    .map((entry) => entry.name)
-    .sort();
-}
-
-function listGitChangeRefs(repoRoot) {
-  const result = spawnSync(
-    'git',
-    ['for-each-ref', '--format=%(refname:short)', 'refs/heads'],
-    { cwd: repoRoot, encoding: 'utf8' }
-  );
-
-  if (result.status !== 0) {
-    return [];
-  }
-
-  return result.stdout
-    .split('\n')
-    .map((line) => line.trim())
-    .filter(Boolean);
-}
-
-function listGitWorktreeChangeKeys(repoRoot) {
-  const result = spawnSync(
-    'git',
-    ['worktree', 'list', '--porcelain'],
-    { cwd: repoRoot, encoding: 'utf8' }
-  );
-
-  if (result.status !== 0) {
-    return [];
-  }
-
-  return result.stdout
-    .split('\n')
-    .filter((line) => line.startsWith('worktree '))
-    .map((line) => path.basename(path.dirname(line.slice('worktree '.length))))
-    .filter(Boolean);
+// change-index 依赖本模块的路径函数，延迟加载以避开循环引用
+function changeIndex() {
+  return require('./change-index.js');
 }
 
 function extractChangeIdNumber(value, prefix) {
@@ -132,7 +88,7 @@ function findExistingChangeKeys(repoRoot, changeId) {
   const legacyKey = slugifySegment(changeId, 'change');
   const legacyPrefix = `${legacyKey}-`;
 
-  return listChangeKeys(repoRoot).filter((name) => (
+  return changeIndex().findActiveChangeKeysById(repoRoot, changeId).filter((name) => (
     name === changeId
     || name === legacyKey
     || name.startsWith(canonicalPrefix)
@@ -147,7 +103,7 @@ function findExactChangeKey(repoRoot, changeId, changeKey) {
     `${slugifySegment(changeId, 'change')}-${slug}`
   ]);
 
-  return listChangeKeys(repoRoot).find((name) => aliases.has(name)) || null;
+  return changeIndex().findActiveChangeKeysById(repoRoot, changeId).find((name) => aliases.has(name)) || null;
 }
 
 function assertChangeKey(changeId, changeKey) {
@@ -203,38 +159,85 @@ function resolveChangeKey(repoRoot, changeId, options = {}) {
   return buildChangeKey(changeId, options);
 }
 
-function nextChangeKey(repoRoot, prefix, description) {
+function isReservationConsumed(reservation, occupiedNames) {
+  const reservedPrefix = reservation.changeId.split('-')[0];
+  const reservedNum = parseInt(extractChangeIdNumber(reservation.changeId, reservedPrefix), 10);
+
+  return occupiedNames.some((name) => {
+    const numStr = extractChangeIdNumber(name, reservedPrefix);
+    return numStr !== null && parseInt(numStr, 10) === reservedNum;
+  });
+}
+
+// ============================================================
+// nextChangeKey - 分配下一个 REQ/FIX 编号
+// 默认登记预留（reserve: false 仅预览），锁释放后到目录创建前的窗口内
+// 其他 worktree 的并发分配也不会拿到同一编号；同一 worktree 对同一描述的
+// 重复调用复用未兑现的预留
+// ============================================================
+function nextChangeKey(repoRoot, prefix, description, options = {}) {
+  const { reserve = true } = options;
   const upper = String(prefix || '').toUpperCase();
   if (upper !== 'REQ' && upper !== 'FIX') {
     throw new Error(`Invalid prefix "${prefix}". Use REQ or FIX.`);
   }
 
-  let maxNum = 0;
-  let padWidth = 3;
-  const occupiedNames = [
-    ...listChangeKeys(repoRoot),
-    ...listGitChangeRefs(repoRoot),
-    ...listGitWorktreeChangeKeys(repoRoot)
-  ];
-
-  for (const name of occupiedNames) {
-    const numStr = extractChangeIdNumber(name, upper);
-    if (numStr) {
-      const num = parseInt(numStr, 10);
-      if (num > maxNum) maxNum = num;
-      if (numStr.length > padWidth) padWidth = numStr.length;
+  const index = changeIndex();
+  const owner = path.resolve(repoRoot);
+
+  // 在共享锁内读取占用与预留，跨 worktree 并发分配不会拿到同一编号
+  return index.withAllocationLock(repoRoot, (allocationsPath) => {
+    let maxNum = 0;
+    let padWidth = 3;
+    const { branches, worktrees } = index.getGitOccupancy(repoRoot);
+    const occupiedNames = [
+      ...index.getActiveChangeKeys(repoRoot),
+      ...index.getArchivedChanges(repoRoot).map((entry) => entry.changeKey),
+      ...branches,
+      ...worktrees
+    ];
+    // 目录/分支已出现的预留视为已兑现
+    const reservations = index.readReservations(allocationsPath)
+      .filter((reservation) => !isReservationConsumed(reservation, occupiedNames));
+
+    const own = reservations.find((reservation) => (
+      reservation.owner === owner &&
+      reservation.description === description &&
+      reservation.changeId.startsWith(`${upper}-`)
+    ));
+    if (own) {
+      if (reserve) {
+        own.expiresAt = Date.now() + index.RESERVATION_TTL_MS;
+        index.writeReservations(allocationsPath, reservations);
+      }
+      return { changeId: own.changeId, changeKey: own.changeKey };
     }
-  }
 
-  const paddedNum = String(maxNum + 1).padStart(padWidth, '0');
-  const changeId = `${upper}-${paddedNum}`;
-  const slug = slugifySegment(
-    stripChangeIdPrefix(changeId, description) || description,
-    'change'
-  );
-  const changeKey = `${changeId}-${slug}`;
+    for (const name of [...occupiedNames, ...reservations.map((reservation) => reservation.changeId)]) {
+      const numStr = extractChangeIdNumber(name, upper);
+      if (numStr) {
+        const num = parseInt(numStr, 10);
+        if (num > maxNum) maxNum = num;
+        if (numStr.length > padWidth) padWidth = numStr.length;
+      }
+    }
 
-  return { changeId, changeKey };
+    const paddedNum = String(maxNum + 1).padStart(padWidth, '0');
+    const changeId = `${upper}-${paddedNum}`;
+    const slug = slugifySegment(
+      stripChangeIdPrefix(changeId, description) || description,
+      'change'
+    );
+    const changeKey = `${changeId}-${slug}`;
+
+    if (reserve) {
+      index.writeReservations(allocationsPath, [
+        ...reservations,
+        { changeId, changeKey, owner, description, expiresAt: Date.now() + index.RESERVATION_TTL_MS }
+      ]);
+    }
+    return { changeId, changeKey };
+  });
 }
 
 function getChangePaths(repoRoot, changeId, options = {}) {
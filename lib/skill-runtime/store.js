@@ -1,6 +1,6 @@
 /**
  * [INPUT]: 依赖 fs/path/child_process，依赖调用方提供 changeId 与命令参数。
- * [OUTPUT]: 对外提供 shared path、文本读写与命令执行工具。
+ * [OUTPUT]: 对外提供 shared path、文本读写与命令执行工具（有界输出捕获、进程组超时终止、CPU 计时）。
  * [POS]: skill runtime 的轻量 IO 层，不承载流程 JSON 契约。
  * [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
  */
@@ -113,71 +113,250 @@ async function listDirectories(dirPath) {
     .map((entry) => path.join(dirPath, entry.name));
 }
 
+// ============================================================
+// Command capture - 有界输出：只保留尾部，可选完整落盘
+// ============================================================
+const DEFAULT_MAX_OUTPUT_BYTES = 1024 * 1024;
+const KILL_GRACE_MS = 2000;
+const IS_WINDOWS = process.platform === 'win32';
+
+class TailBuffer {
+  constructor(limitBytes) {
+    this.limitBytes = Math.max(0, limitBytes);
+    this.chunks = [];
+    this.bytes = 0;
+    this.totalBytes = 0;
+  }
+
+  push(chunk) {
+    this.totalBytes += chunk.length;
+    this.chunks.push(chunk);
+    this.bytes += chunk.length;
+
+    while (this.bytes > this.limitBytes && this.chunks.length > 0) {
+      const overflow = this.bytes - this.limitBytes;
+      const head = this.chunks[0];
+      if (head.length <= overflow) {
+        this.chunks.shift();
+        this.bytes -= head.length;
+      } else {
+        this.chunks[0] = head.subarray(overflow);
+        this.bytes -= overflow;
+      }
+    }
+  }
+
+  get truncated() {
+    return this.totalBytes > this.bytes;
+  }
+
+  toString() {
+    const buffer = Buffer.concat(this.chunks, this.bytes);
+    if (!this.truncated) {
+      return buffer.toString('utf8');
+    }
+
+    // 截断点可能落在多字节字符中间（中文输出常见），跳过残留的 UTF-8 续字节
+    let start = 0;
+    while (start < buffer.length && (buffer[start] & 0xc0) === 0x80) {
+      start++;
+    }
+    return buffer.subarray(start).toString('utf8');
+  }
+}
+
+// 子 shell 执行命令后用 `times` 把自身与子进程的 user/sys CPU 写到 fd 3；
+// 命令本身关闭 fd 3，后台常驻进程不会持有该管道拖住 close 事件
+function wrapWithCpuTimes(command) {
+  return `(\n${command}\n) 3>&-\n__cc_status=$?\ntimes >&3\nexit $__cc_status\n`;
+}
+
+function parseShellTimes(output) {
+  const values = Array.from(String(output).matchAll(/(\d+)m([\d.]+)s/g))
+    .map((match) => (Number(match[1]) * 60 + Number(match[2])) * 1000);
+  if (values.length < 4) {
+    return null;
+  }
+
+  // 第一行是 shell 自身，第二行是已回收的子进程
+  return {
+    userMs: Math.round(values[0] + values[2]),
+    systemMs: Math.round(values[1] + values[3])
+  };
+}
+
+// 进程组登记：模块级唯一的信号处理器覆盖所有存活的 detached 命令组，
+// 仅在存在命令组时挂载，避免改变宿主进程默认的 SIGINT 退出行为
+const activeGroups = new Set();
+const FORWARDED_SIGNALS = ['SIGINT', 'SIGTERM'];
+let signalForwardingInstalled = false;
+
+function killGroup(pid, signal) {
+  try {
+    process.kill(-pid, signal);
+  } catch {
+    // 进程组已退出
+  }
+}
+
+function forwardSignal(signal) {
+  // 非交互 shell 的后台任务忽略 SIGINT，统一用 SIGTERM 清理
+  for (const pid of activeGroups) {
+    killGroup(pid, 'SIGTERM');
+  }
+  activeGroups.clear();
+  setSignalForwarding(false);
+
+  // 宿主自己监听了该信号时交给宿主处理，否则按原信号重新触发默认退出
+  if (process.listenerCount(signal) === 0) {
+    process.kill(process.pid, signal);
+  }
+}
+
+function setSignalForwarding(enabled) {
+  if (enabled === signalForwardingInstalled) {
+    return;
+  }
+  signalForwardingInstalled = enabled;
+  for (const signal of FORWARDED_SIGNALS) {
+    if (enabled) {
+      process.on(signal, forwardSignal);
+    } else {
+      process.removeListener(signal, forwardSignal);
+    }
+  }
+}
+
+function trackGroup(pid) {
+  activeGroups.add(pid);
+  setSignalForwarding(true);
+}
+
+function untrackGroup(pid) {
+  activeGroups.delete(pid);
+  if (activeGroups.size === 0) {
+    setSignalForwarding(false);
+  }
+}
+
 async function runCommand(command, options = {}) {
   const {
     cwd = process.cwd(),
     env = {},
     timeoutMs = 0,
-    stream = false
+    stream = false,
+    maxOutputBytes = DEFAULT_MAX_OUTPUT_BYTES,
+    spillPath = null
   } = options;
 
   const startedAt = Date.now();
+  // 交互式 stream 保持在前台进程组，Ctrl-C 仍直达命令
+  const useGroup = !IS_WINDOWS && !stream;
+
+  if (spillPath) {
+    await ensureDir(path.dirname(spillPath));
+  }
 
   return new Promise((resolve) => {
-    const child = spawn(command, {
-      cwd,
-      env: { ...process.env, ...env },
-      shell: true,
-      stdio: stream ? 'inherit' : 'pipe'
-    });
+    const child = IS_WINDOWS
+      ? spawn(command, {
+        cwd,
+        env: { ...process.env, ...env },
+        shell: true,
+        stdio: stream ? 'inherit' : 'pipe'
+      })
+      : spawn('/bin/sh', ['-c', wrapWithCpuTimes(command)], {
+        cwd,
+        env: { ...process.env, ...env },
+        detached: useGroup,
+        stdio: stream ? ['inherit', 'inherit', 'inherit', 'pipe'] : ['pipe', 'pipe', 'pipe', 'pipe']
+      });
 
-    let stdout = '';
-    let stderr = '';
+    const stdout = new TailBuffer(maxOutputBytes);
+    const stderr = new TailBuffer(maxOutputBytes);
+    const spill = spillPath ? fs.createWriteStream(spillPath) : null;
+    let timesOutput = '';
     let killedByTimeout = false;
     let timeoutId = null;
+    let killId = null;
+    let settled = false;
+
+    if (useGroup && child.pid) {
+      trackGroup(child.pid);
+    }
 
     if (!stream) {
       child.stdout.on('data', (chunk) => {
-        stdout += String(chunk);
+        stdout.push(chunk);
+        if (spill) spill.write(chunk);
       });
 
       child.stderr.on('data', (chunk) => {
-        stderr += String(chunk);
+        stderr.push(chunk);
+        if (spill) spill.write(chunk);
+      });
+    }
+
+    if (child.stdio[3]) {
+      child.stdio[3].on('data', (chunk) => {
+        timesOutput += String(chunk);
       });
     }
 
     if (timeoutMs > 0) {
       timeoutId = setTimeout(() => {
         killedByTimeout = true;
-        child.kill('SIGTERM');
+        if (useGroup) {
+          // 整组终止，测试 runner 派生的 worker 不会残留
+          killGroup(child.pid, 'SIGTERM');
+          killId = setTimeout(() => killGroup(child.pid, 'SIGKILL'), KILL_GRACE_MS);
+        } else {
+          child.kill('SIGTERM');
+        }
       }, timeoutMs);
     }
 
-    child.on('close', (code) => {
-      if (timeoutId) {
-        clearTimeout(timeoutId);
+    function finish(result) {
+      if (settled) {
+        return;
       }
+      settled = true;
 
-      resolve({
-        code: typeof code === 'number' ? code : 1,
-        stdout,
-        stderr,
+      if (timeoutId) clearTimeout(timeoutId);
+      if (killId) clearTimeout(killId);
+      if (useGroup && child.pid) untrackGroup(child.pid);
+
+      const payload = {
+        ...result,
+        stdout: stdout.toString(),
+        stderr: result.stderr !== undefined ? result.stderr : stderr.toString(),
         durationMs: Date.now() - startedAt,
+        cpu: parseShellTimes(timesOutput),
+        truncated: stdout.truncated || stderr.truncated,
+        outputBytes: stdout.totalBytes + stderr.totalBytes,
+        spillPath,
         killedByTimeout
+      };
+
+      if (spill) {
+        spill.end(() => resolve(payload));
+      } else {
+        resolve(payload);
+      }
+    }
+
+    child.on('close', (code, signal) => {
+      finish({
+        code: typeof code === 'number' ? code : 1,
+        signal: signal || null
       });
     });
 
     child.on('error', (error) => {
-      if (timeoutId) {
-        clearTimeout(timeoutId);
-      }
-
-      resolve({
+      finish({
         code: 1,
-        stdout,
-        stderr: `${stderr}\n${error.message}`.trim(),
-        durationMs: Date.now() - startedAt,
-        killedByTimeout
+        signal: null,
+        stderr: `${stderr.toString()}\n${error.message}`.trim()
       });
     });
   });
@@ -204,6 +383,7 @@ module.exports = {
   removePath,
   appendJsonl,
   listDirectories,
+  DEFAULT_MAX_OUTPUT_BYTES,
   runCommand,
   getPackageScripts
 };
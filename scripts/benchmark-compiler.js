@@ -0,0 +1,519 @@
+#!/usr/bin/env node
+
+/**
+ * [INPUT]: 接收规模列表（默认 50/500/5000）、迭代次数、--jobs、可选 baseline JSON。
+ * [OUTPUT]: 输出每个规模下冷/热 compile()、--check 漂移检测、Codex skill 镜像的
+ *           p50/p95、吞吐量、场景内峰值 RSS 与 compile 阶段耗时；超出阈值时退出码为 1。
+ * [POS]: 编译器性能基准，在合成仓库上复现生产编译流水线，升级前发现性能回退。
+ * [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+ */
+
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+
+const { compile, PLATFORMS } = require('../lib/compiler/index.js');
+const { clearFileCache } = require('../lib/compiler/transformer.js');
+const { mirrorSkillDirectoriesForPlatform } = require('../lib/compiler/resource-copier.js');
+const { createMirrorState } = require('../lib/compiler/file-mirror.js');
+
+const REPORT_VERSION = 1;
+const DEFAULT_SCALES = [50, 500, 5000];
+const DEFAULT_ITERATIONS = 3;
+const DEFAULT_TOLERANCE = 1.25;
+const SCENARIOS = ['coldCompile', 'warmCompile', 'check', 'codexMirrorCold', 'codexMirrorWarm'];
+
+// p95 每个源文件（skill + command）允许的毫秒数；宽松上限，用于拦截数量级回退
+const DEFAULT_THRESHOLDS = {
+  coldCompile: 40,
+  warmCompile: 8,
+  check: 4,
+  codexMirrorCold: 10,
+  codexMirrorWarm: 2
+};
+
+const BODY_SECTIONS = 8;
+
+// ============================================================
+// Synthetic corpus
+// ============================================================
+function writeFile(filePath, content) {
+  fs.mkdirSync(path.dirname(filePath), { recursive: true });
+  fs.writeFileSync(filePath, content);
+}
+
+function corpusShape(scale) {
+  return {
+    skills: scale,
+    commands: scale,
+    scripts: scale,
+    templates: Math.max(1, Math.ceil(scale / 4)),
+    guides: Math.max(1, Math.ceil(scale / 4))
+  };
+}
+
+function scriptPath(index) {
+  return `.claude/scripts/bench/script-${index}.sh`;
+}
+
+function templatePath(index) {
+  return `.claude/docs/templates/bench/TEMPLATE-${index}.md`;
+}
+
+function guidePath(index) {
+  return `.claude/docs/guides/bench/guide-${index}.md`;
+}
+
+function renderCommand(index, shape) {
+  const pick = (offset, count) => (index * 7 + offset * 13) % count;
+  const scripts = [0, 1, 2].map((offset) => scriptPath(pick(offset, shape.scripts)));
+  const template = templatePath(pick(3, shape.templates));
+  const guide = guidePath(pick(4, shape.guides));
+
+  const sections = [];
+  for (let section = 0; section < BODY_SECTIONS; section++) {
+    const inlineScript = scriptPath(pick(section + 5, shape.scripts));
+    const inlineGuide = guidePath(pick(section + 6, shape.guides));
+    sections.push([
+      `## Step ${section + 1}`,
+      '',
+      `Run {SCRIPT:prereq} $ARGUMENTS, then {SCRIPT:setup} and {SCRIPT:verify}.`,
+      `Follow {GUIDE:style}; see ${inlineGuide} and ${inlineScript} for details.`,
+      'Report with {AGENT_SCRIPT} once the step is complete.',
+      ''
+    ].join('\n'));
+  }
+
+  return [
+    '---',
+    `name: bench-cmd-${index}`,
+    `description: Synthetic benchmark command ${index}`,
+    'scripts:',
+    `  prereq: ${scripts[0]}`,
+    `  setup: ${scripts[1]}`,
+    `  verify: ${scripts[2]}`,
+    'templates:',
+    `  plan: ${template}`,
+    'guides:',
+    `  style: ${guide}`,
+    'agent_scripts:',
+    `  sh: ${scripts[0]} __AGENT__`,
+    '---',
+    '',
+    `# Command ${index}`,
+    '',
+    'Use {TEMPLATE:plan} as the output skeleton.',
+    '',
+    ...sections
+  ].join('\n');
+}
+
+function renderSkill(index) {
+  return [
+    '---',
+    `name: bench-skill-${index}`,
+    `description: Synthetic benchmark skill ${index}`,
+    'reads: ["references/notes.md"]',
+    '---',
+    '',
+    `# Skill ${index}`,
+    '',
+    'Read references/notes.md, then run scripts/run.sh.',
+    ''
+  ].join('\n');
+}
+
+// ============================================================
+// generateCorpus - 在 rootDir 下生成规模为 scale 的合成仓库
+// ============================================================
+function generateCorpus(rootDir, scale) {
+  const shape = corpusShape(scale);
+  const skillRules = { version: '1.0', skills: {} };
+
+  for (let i = 0; i < shape.scripts; i++) {
+    writeFile(path.join(rootDir, scriptPath(i)), `#!/bin/bash\n# benchmark script ${i}\necho "${i}"\n`);
+  }
+  for (let i = 0; i < shape.templates; i++) {
+    writeFile(
+      path.join(rootDir, templatePath(i)),
+      `# Template ${i}\n\n- Summary\n- Evidence: see ${guidePath(i % shape.guides)}\n`
+    );
+  }
+  for (let i = 0; i < shape.guides; i++) {
+    writeFile(path.join(rootDir, guidePath(i)), `# Guide ${i}\n\nKeep changes small.\n`);
+  }
+
+  for (let i = 0; i < shape.skills; i++) {
+    const skillDir = path.join(rootDir, '.claude/skills', `bench-skill-${i}`);
+    writeFile(path.join(skillDir, 'SKILL.md'), renderSkill(i));
+    writeFile(path.join(skillDir, 'references/notes.md'), `# Notes ${i}\n\n${'Context line.\n'.repeat(20)}`);
+    writeFile(path.join(skillDir, 'scripts/run.sh'), `#!/bin/bash\necho "skill ${i}"\n`);
+    skillRules.skills[`bench-skill-${i}`] = {
+      type: 'domain',
+      enforcement: 'suggest',
+      priority: 'medium',
+      promptTriggers: { keywords: [`bench-${i}`], intentPatterns: [] }
+    };
+  }
+  writeFile(path.join(rootDir, '.claude/skills/skill-rules.json'), `${JSON.stringify(skillRules, null, 2)}\n`);
+
+  for (let i = 0; i < shape.commands; i++) {
+    writeFile(path.join(rootDir, '.claude/commands', `bench-cmd-${i}.md`), renderCommand(i, shape));
+  }
+
+  return shape;
+}
+
+// 删除编译产物，保留 .claude 源文件
+function resetOutputs(rootDir) {
+  for (const entry of fs.readdirSync(rootDir)) {
+    if (entry !== '.claude') {
+      fs.rmSync(path.join(rootDir, entry), { recursive: true, force: true });
+    }
+  }
+  clearFileCache();
+}
+
+// 把整棵树的 mtime 回拨到 racy 窗口之外，模拟"源文件与产物已稳定"的热启动状态
+function settleTree(dir, secondsAgo = 60) {
+  const time = new Date(Date.now() - secondsAgo * 1000);
+  for (const entry of fs.readdirSync(dir, { withFileTypes: true })) {
+    const entryPath = path.join(dir, entry.name);
+    if (entry.isDirectory()) {
+      settleTree(entryPath, secondsAgo);
+    } else if (entry.isFile()) {
+      fs.utimesSync(entryPath, time, time);
+    }
+  }
+}
+
+// ============================================================
+// Statistics
+// ============================================================
+function percentile(sortedSamples, fraction) {
+  if (sortedSamples.length === 0) {
+    return 0;
+  }
+  const rank = Math.ceil(fraction * sortedSamples.length) - 1;
+  return sortedSamples[Math.min(sortedSamples.length - 1, Math.max(0, rank))];
+}
+
+function round(value) {
+  return Math.round(value * 100) / 100;
+}
+
+// 场景运行期间定时采样 RSS，返回 stop() → 该场景窗口内观测到的峰值（MB）
+// process.resourceUsage().maxRSS 是进程级高水位，后续场景会继承冷编译的峰值，不能按场景区分
+const RSS_SAMPLE_INTERVAL_MS = 5;
+
+function startRssSampler() {
+  if (typeof global.gc === 'function') {
+    global.gc();
+  }
+
+  let peak = process.memoryUsage().rss;
+  const timer = setInterval(() => {
+    peak = Math.max(peak, process.memoryUsage().rss);
+  }, RSS_SAMPLE_INTERVAL_MS);
+
+  return () => {
+    clearInterval(timer);
+    peak = Math.max(peak, process.memoryUsage().rss);
+    return round(peak / (1024 * 1024));
+  };
+}
+
+function summarizeSamples(samples, sourceFiles, peakRss, phaseSamples = []) {
+  const sorted = [...samples].sort((a, b) => a - b);
+  const p50 = percentile(sorted, 0.5);
+  const summary = {
+    samplesMs: samples.map(round),
+    p50Ms: round(p50),
+    p95Ms: round(percentile(sorted, 0.95)),
+    meanMs: round(samples.reduce((sum, value) => sum + value, 0) / samples.length),
+    throughputFilesPerSec: p50 > 0 ? round(sourceFiles / (p50 / 1000)) : null,
+    peakRssMb: peakRss
+  };
+
+  if (phaseSamples.length > 0) {
+    summary.phasesP50Ms = {};
+    for (const phase of Object.keys(phaseSamples[0])) {
+      const values = phaseSamples.map((timings) => timings[phase] || 0).sort((a, b) => a - b);
+      summary.phasesP50Ms[phase] = round(percentile(values, 0.5));
+    }
+  }
+
+  return summary;
+}
+
+async function timeRun(fn) {
+  const startedAt = process.hrtime.bigint();
+  const value = await fn();
+  return { ms: Number(process.hrtime.bigint() - startedAt) / 1e6, value };
+}
+
+function assertCompiled(result, scenario) {
+  if (!result.success) {
+    throw new Error(`${scenario} failed: ${result.errors.join('; ')}`);
+  }
+}
+
+// ============================================================
+// benchmarkScale - 在单个规模上运行全部场景
+// ============================================================
+async function benchmarkScale(scale, options) {
+  const { iterations, jobs, workDir } = options;
+  const rootDir = path.join(workDir, `scale-${scale}`);
+  const shape = generateCorpus(rootDir, scale);
+  const sourceFiles = shape.skills + shape.commands;
+  const compileOptions = { platforms: PLATFORMS, jobs, timings: true };
+  const samples = Object.fromEntries(SCENARIOS.map((scenario) => [scenario, []]));
+  const phases = { coldCompile: [], warmCompile: [] };
+  const peaks = {};
+  let checkStats = null;
+
+  const previousCwd = process.cwd();
+  process.chdir(rootDir);
+  try {
+    let stopSampler = startRssSampler();
+    for (let i = 0; i < iterations; i++) {
+      resetOutputs(rootDir);
+      const cold = await timeRun(() => compile(compileOptions));
+      assertCompiled(cold.value, 'coldCompile');
+      samples.coldCompile.push(cold.ms);
+      phases.coldCompile.push(cold.value.timings);
+    }
+    peaks.coldCompile = stopSampler();
+
+    // 稳定后先预热一次，让缓存记录脱离 racy 状态
+    settleTree(rootDir);
+    assertCompiled(await compile(compileOptions), 'warmCompile');
+
+    stopSampler = startRssSampler();
+    for (let i = 0; i < iterations; i++) {
+      const warm = await timeRun(() => compile(compileOptions));
+      assertCompiled(warm.value, 'warmCompile');
+      samples.warmCompile.push(warm.ms);
+      phases.warmCompile.push(warm.value.timings);
+    }
+    peaks.warmCompile = stopSampler();
+
+    // 回拨后的产物 mtime 与 manifest 记录不一致：首次 --check 校验哈希并回写 stat，
+    // 之后的 --check 应全部命中 stat 短路
+    if (!(await compile({ ...compileOptions, check: true })).success) {
+      throw new Error('check reported drift on an unchanged corpus');
+    }
+
+    stopSampler = startRssSampler();
+    for (let i = 0; i < iterations; i++) {
+      const drift = await timeRun(() => compile({ ...compileOptions, check: true }));
+      if (!drift.value.success) {
+        throw new Error(`check reported drift on an unchanged corpus (${drift.value.drift.length} items)`);
+      }
+      samples.check.push(drift.ms);
+      checkStats = drift.value.checkStats;
+    }
+    peaks.check = stopSampler();
+
+    // 合成 skill 不在分发清单中，直接镜像全部 skill 以覆盖 Codex 镜像路径
+    const skillNames = Array.from({ length: shape.skills }, (_, index) => `bench-skill-${index}`);
+    let mirrorState = null;
+    const mirror = () => mirrorSkillDirectoriesForPlatform('.claude/skills', 'codex', skillNames, {
+      state: mirrorState
+    });
+    stopSampler = startRssSampler();
+    for (let i = 0; i < iterations; i++) {
+      fs.rmSync(path.join(rootDir, '.codex/skills'), { recursive: true, force: true });
+      mirrorState = createMirrorState();
+      samples.codexMirrorCold.push((await timeRun(mirror)).ms);
+    }
+    peaks.codexMirrorCold = stopSampler();
+    settleTree(path.join(rootDir, '.codex/skills'));
+    await mirror();
+    stopSampler = startRssSampler();
+    for (let i = 0; i < iterations; i++) {
+      samples.codexMirrorWarm.push((await timeRun(mirror)).ms);
+    }
+    peaks.codexMirrorWarm = stopSampler();
+  } finally {
+    process.chdir(previousCwd);
+  }
+
+  const scenarios = {};
+  for (const scenario of SCENARIOS) {
+    scenarios[scenario] = summarizeSamples(
+      samples[scenario],
+      sourceFiles,
+      peaks[scenario],
+      phases[scenario]
+    );
+  }
+
+  // 未改动的语料上 --check 应全部命中 stat 短路
+  scenarios.check.checkStats = checkStats;
+
+  return { scale, corpus: shape, sourceFiles, scenarios };
+}
+
+// ============================================================
+// findRegressions - 对比绝对阈值与 baseline 报告
+// ============================================================
+function findRegressions(report, options = {}) {
+  const { thresholds = DEFAULT_THRESHOLDS, baseline = null, tolerance = DEFAULT_TOLERANCE } = options;
+  const regressions = [];
+  const baselineScales = new Map((baseline?.scales || []).map((entry) => [entry.scale, entry]));
+
+  for (const entry of report.scales) {
+    for (const [scenario, summary] of Object.entries(entry.scenarios)) {
+      const budgetMs = thresholds[scenario] * entry.sourceFiles;
+      if (Number.isFinite(budgetMs) && summary.p95Ms > budgetMs) {
+        regressions.push({
+          scale: entry.scale,
+          scenario,
+          kind: 'threshold',
+          p95Ms: summary.p95Ms,
+          limitMs: round(budgetMs)
+        });
+      }
+
+      const previous = baselineScales.get(entry.scale)?.scenarios?.[scenario];
+      if (previous && summary.p95Ms > previous.p95Ms * tolerance) {
+        regressions.push({
+          scale: entry.scale,
+          scenario,
+          kind: 'baseline',
+          p95Ms: summary.p95Ms,
+          limitMs: round(previous.p95Ms * tolerance)
+        });
+      }
+    }
+  }
+
+  return regressions;
+}
+
+// ============================================================
+// runCompilerBenchmark - 运行全部规模并生成报告
+// ============================================================
+async function runCompilerBenchmark(options = {}) {
+  const {
+    scales = DEFAULT_SCALES,
+    iterations = DEFAULT_ITERATIONS,
+    jobs = 1,
+    baseline = null,
+    tolerance = DEFAULT_TOLERANCE,
+    thresholds = DEFAULT_THRESHOLDS,
+    keepCorpus = false
+  } = options;
+  const workDir = fs.mkdtempSync(path.join(os.tmpdir(), 'cc-devflow-bench-'));
+
+  const report = {
+    version: REPORT_VERSION,
+    generatedAt: new Date().toISOString(),
+    node: process.version,
+    platform: `${process.platform}-${process.arch}`,
+    cpus: os.cpus().length,
+    iterations,
+    jobs,
+    thresholdsMsPerFile: thresholds,
+    scales: []
+  };
+
+  try {
+    for (const scale of [...scales].sort((a, b) => a - b)) {
+      report.scales.push(await benchmarkScale(scale, { iterations, jobs, workDir }));
+    }
+  } finally {
+    if (!keepCorpus) {
+      fs.rmSync(workDir, { recursive: true, force: true });
+    }
+  }
+
+  if (keepCorpus) {
+    report.corpusDir = workDir;
+  }
+  report.regressions = findRegressions(report, { thresholds, baseline, tolerance });
+  report.pass = report.regressions.length === 0;
+  return report;
+}
+
+// ============================================================
+// CLI
+// ============================================================
+function parsePositiveInteger(flag, value) {
+  const parsed = Number(value);
+  if (!Number.isInteger(parsed) || parsed < 1) {
+    throw new Error(`Invalid ${flag} value: ${value}`);
+  }
+  return parsed;
+}
+
+function parseArgs(argv) {
+  const options = {};
+
+  for (let i = 0; i < argv.length; i++) {
+    const arg = argv[i];
+    switch (arg) {
+      case '--scales':
+        options.scales = String(argv[++i]).split(',').map((value) => parsePositiveInteger('--scales', value));
+        break;
+      case '--iterations':
+        options.iterations = parsePositiveInteger('--iterations', argv[++i]);
+        break;
+      case '--jobs':
+        options.jobs = parsePositiveInteger('--jobs', argv[++i]);
+        break;
+      case '--baseline':
+        options.baseline = JSON.parse(fs.readFileSync(argv[++i], 'utf8'));
+        break;
+      case '--tolerance':
+        options.tolerance = Number(argv[++i]);
+        break;
+      case '--output':
+        options.output = argv[++i];
+        break;
+      case '--keep-corpus':
+        options.keepCorpus = true;
+        break;
+      default:
+        throw new Error(`Unknown option: ${arg}`);
+    }
+  }
+
+  return options;
+}
+
+async function main(argv = process.argv.slice(2)) {
+  let options;
+  try {
+    options = parseArgs(argv);
+  } catch (error) {
+    console.error(error.message);
+    process.exit(3);
+  }
+
+  const report = await runCompilerBenchmark(options);
+  const json = `${JSON.stringify(report, null, 2)}\n`;
+  if (options.output) {
+    fs.writeFileSync(options.output, json);
+  }
+  process.stdout.write(json);
+  process.exit(report.pass ? 0 : 1);
+}
+
+if (require.main === module) {
+  main().catch((error) => {
+    console.error(`Benchmark failed: ${error.message}`);
+    process.exit(1);
+  });
+}
+
+module.exports = {
+  DEFAULT_SCALES,
+  DEFAULT_THRESHOLDS,
+  SCENARIOS,
+  generateCorpus,
+  percentile,
+  findRegressions,
+  runCompilerBenchmark
+};
@@ -0,0 +1,78 @@
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const { spawnSync } = require('child_process');
+
+const ROOT = path.resolve(__dirname, '../..');
+const CLI = path.join(ROOT, 'bin', 'cc-devflow-cli.js');
+const RUNS = 3;
+
+// 绝对耗时预算在共享/慢速 CI 上容易抖动，仅在 npm run benchmark:cli 时启用
+const budgetTest = process.env.CC_DEVFLOW_STARTUP_BUDGETS ? test : test.skip;
+
+// 单次进程启动 + 执行的中位数预算（毫秒），留足 CI 抖动余量
+const STARTUP_BUDGETS = [
+  { args: ['help'], budgetMs: 600 },
+  { args: ['next-change-key', '--prefix', 'REQ', '--description', 'startup budget'], budgetMs: 800 },
+  { args: ['list-archived'], budgetMs: 600 },
+  { args: ['config', 'resolve'], budgetMs: 800 },
+  { args: ['adapt', '--check'], budgetMs: 1500 }
+];
+
+function medianRunMs(args, cwd) {
+  const samples = [];
+  for (let i = 0; i < RUNS; i++) {
+    const start = process.hrtime.bigint();
+    const result = spawnSync(process.execPath, [CLI, ...args], { cwd, encoding: 'utf8' });
+    samples.push(Number(process.hrtime.bigint() - start) / 1e6);
+    expect(result.status).toBe(0);
+  }
+  return samples.sort((a, b) => a - b)[Math.floor(RUNS / 2)];
+}
+
+function loadedModulesFor(args, cwd) {
+  const script = `
+    const { main } = require(${JSON.stringify(CLI)});
+    main(${JSON.stringify(args)}).then(() => {
+      process.stderr.write(JSON.stringify(Object.keys(require.cache)));
+    });
+  `;
+  const result = spawnSync(process.execPath, ['-e', script], { cwd, encoding: 'utf8' });
+  return JSON.parse(result.stderr);
+}
+
+describe('CLI Startup Benchmarks', () => {
+  let repoRoot;
+
+  beforeAll(() => {
+    repoRoot = fs.mkdtempSync(path.join(os.tmpdir(), 'cc-devflow-startup-'));
+    fs.mkdirSync(path.join(repoRoot, '.claude'));
+  });
+
+  afterAll(() => {
+    fs.rmSync(repoRoot, { recursive: true, force: true });
+  });
+
+  budgetTest.each(STARTUP_BUDGETS)('$args.0 should start within $budgetMs ms', ({ args, budgetMs }) => {
+    expect(medianRunMs(args, repoRoot)).toBeLessThan(budgetMs);
+  }, 30000);
+
+  test.each([
+    [['help']],
+    [['next-change-key', '--prefix', 'REQ', '--description', 'lazy modules']],
+    [['archive-change', 'REQ-001-lazy-modules']]
+  ])('%j should not load config or compiler modules', (args) => {
+    fs.mkdirSync(path.join(repoRoot, 'devflow', 'changes', 'REQ-001-lazy-modules'), { recursive: true });
+    const modules = loadedModulesFor(args, repoRoot);
+
+    expect(modules.some((file) => file.includes(`${path.sep}js-yaml${path.sep}`))).toBe(false);
+    expect(modules.some((file) => file.includes(path.join('lib', 'skill-runtime', 'config.js')))).toBe(false);
+    expect(modules.some((file) => file.includes(path.join('lib', 'compiler')))).toBe(false);
+  });
+
+  test('adapt should run in-process instead of spawning a second node', () => {
+    const modules = loadedModulesFor(['adapt', '--check'], repoRoot);
+
+    expect(modules).toContain(path.join(ROOT, 'bin', 'adapt.js'));
+  });
+});
@@ -0,0 +1,58 @@
+const {
+  SCENARIOS,
+  percentile,
+  findRegressions,
+  runCompilerBenchmark
+} = require('../../scripts/benchmark-compiler');
+
+describe('Compiler Benchmark Harness', () => {
+  test('should report every scenario with phase timings on a small corpus', async () => {
+    const report = await runCompilerBenchmark({ scales: [5], iterations: 1 });
+    const [entry] = report.scales;
+
+    expect(entry.scale).toBe(5);
+    expect(entry.sourceFiles).toBe(10);
+    expect(Object.keys(entry.scenarios)).toEqual(SCENARIOS);
+
+    for (const summary of Object.values(entry.scenarios)) {
+      expect(summary.samplesMs).toHaveLength(1);
+      expect(summary.p95Ms).toBeGreaterThanOrEqual(summary.p50Ms);
+      expect(summary.peakRssMb).toBeGreaterThan(0);
+    }
+
+    const phases = entry.scenarios.coldCompile.phasesP50Ms;
+    for (const phase of ['registry', 'parse', 'rules', 'resourceCopy', 'codexMirror', 'transformEmit', 'manifestSave']) {
+      expect(phases[phase]).toBeGreaterThanOrEqual(0);
+    }
+    expect(phases.total).toBeGreaterThan(0);
+
+    // 稳定语料上的 --check 应全部走 stat 短路，不读取产物内容
+    const { checkStats } = entry.scenarios.check;
+    expect(checkStats.statHits).toBeGreaterThan(0);
+    expect(checkStats.hashed).toBe(0);
+  }, 60000);
+
+  test('should compute nearest-rank percentiles', () => {
+    const samples = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10];
+    expect(percentile(samples, 0.5)).toBe(5);
+    expect(percentile(samples, 0.95)).toBe(10);
+    expect(percentile([], 0.5)).toBe(0);
+  });
+
+  test('should flag threshold and baseline regressions', () => {
+    const report = {
+      scales: [{ scale: 50, sourceFiles: 100, scenarios: { warmCompile: { p95Ms: 900 } } }]
+    };
+    const baseline = {
+      scales: [{ scale: 50, scenarios: { warmCompile: { p95Ms: 500 } } }]
+    };
+
+    expect(findRegressions(report, { thresholds: { warmCompile: 10 } })).toEqual([]);
+    expect(findRegressions(report, { thresholds: { warmCompile: 5 } })).toEqual([
+      { scale: 50, scenario: 'warmCompile', kind: 'threshold', p95Ms: 900, limitMs: 500 }
+    ]);
+    expect(findRegressions(report, { thresholds: { warmCompile: 10 }, baseline })).toEqual([
+      { scale: 50, scenario: 'warmCompile', kind: 'baseline', p95Ms: 900, limitMs: 625 }
+    ]);
+  });
+});